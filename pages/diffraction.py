@@ -1,25 +1,41 @@
 import streamlit as st
 import numpy as np
 import matplotlib.pyplot as plt
+import io
+import time
+from PIL import Image
+from simulations.optics import (FourierOptics, slit_mask, grating_mask, circular_mask, bitmap_mask,
+                                fresnel_number)
+
+@st.cache_resource(max_entries=4)
+def diffraction_engine(aperture, values, n, width_m, bitmap=None):
+    """
+    Fourier-optics solver for one aperture, kept across reruns.
+
+    The solver keeps the aperture's spectrum, so moving the wavelength or
+    distance sliders never repeats the forward FFT.
+    """
+    if aperture == "Single slit":
+        mask = slit_mask(n, width_m, values[0], slit_height=values[1])
+    elif aperture == "Double slit":
+        mask = slit_mask(n, width_m, values[0], slit_height=values[1], count=2, separation=values[2])
+    elif aperture == "Grating":
+        mask = grating_mask(n, width_m, values[0], duty=values[1], size=values[2])
+    elif aperture == "Circular aperture":
+        mask = circular_mask(n, width_m, values[0])
+    elif bitmap is not None:
+        image = np.asarray(Image.open(io.BytesIO(bitmap)).convert("L"), dtype=np.float32) / 255
+        mask = bitmap_mask(image, n, fill=values[0])
+    else:
+        # Triangular hole until a bitmap is uploaded
+        mask = bitmap_mask(np.tri(64)[::-1], n, fill=values[0])
+    return FourierOptics(mask, width_m)
 
 # Title and description
-st.title("Single-Slit Diffraction Simulation")
+st.title("Diffraction Simulation")
 st.write("Adjust the parameters below to explore how the diffraction pattern changes.")
 
-# Theory section
-st.markdown("### Theory")
-st.write("In single-slit diffraction, light passing through a slit of width \(a\) produces an intensity pattern on a screen at distance \(D\). The intensity as a function of position \(y\) on the screen is given by:")
-st.latex(r"I(y) = I_0 \left( \frac{\sin \beta}{\beta} \right)^2")
-st.write("where")
-st.latex(r"\beta = \frac{\pi a y}{\lambda D}")
-st.write("- \(I_0\): maximum intensity at the center (set to 1 for relative intensity)")
-st.write("- \(\lambda\): wavelength of the light")
-st.write("- \(a\): slit width")
-st.write("- \(D\): distance from slit to screen")
-st.write("- \(y\): position on the screen")
-st.write("The minima (dark bands) occur at:")
-st.latex(r"y = \pm \frac{m \lambda D}{a}, \quad m = 1, 2, 3, \dots")
-st.write("This simulation plots \(I(y)\) vs. \(y\), showing how the pattern spreads or narrows based on your inputs.")
+mode = st.radio("Model", ["Analytic single slit", "Fourier optics (any aperture)"], horizontal=True)
 
 # Parameter sliders
 lambda_nm = st.slider("Wavelength λ (nm)", 300, 800, 500, help="Wavelength of light in nanometers (visible range: 400-700 nm)")
@@ -31,26 +47,151 @@ lambda_m = lambda_nm * 1e-9  # nm to m
 a_m = a_um * 1e-6           # μm to m
 D_m = D_m                   # already in m
 
-# Generate position array (y) in meters
-y_m = np.linspace(-0.02, 0.02, 1000)  # -20 mm to 20 mm in meters
-
-# Compute the diffraction parameter β and intensity I(y)
-z = (a_m * y_m) / (lambda_m * D_m)
-I = (np.sinc(z))**2  # np.sinc(x) = sin(πx)/(πx), and I = [sin(β)/β]^2
-
-# Convert y to millimeters for plotting
-y_mm = y_m * 1e3  # m to mm
-
-# Create the plot
-fig, ax = plt.subplots(figsize=(10, 6))
-ax.plot(y_mm, I, color='blue')
-ax.set_xlabel("Position on Screen (mm)")
-ax.set_ylabel("Relative Intensity")
-ax.set_ylim(0, 1.05)  # Intensity from 0 to just above 1
-ax.grid(True)
-st.pyplot(fig)
-
-# Calculate and display the position of the first minimum
-y_min_m = lambda_m * D_m / a_m  # in meters
-y_min_mm = y_min_m * 1e3        # in millimeters
-st.write(f"First minimum at y = ± {y_min_mm:.2f} mm")
\ No newline at end of file
+if mode == "Analytic single slit":
+    # Theory section
+    st.markdown("### Theory")
+    st.write("In single-slit diffraction, light passing through a slit of width \(a\) produces an intensity pattern on a screen at distance \(D\). The intensity as a function of position \(y\) on the screen is given by:")
+    st.latex(r"I(y) = I_0 \left( \frac{\sin \beta}{\beta} \right)^2")
+    st.write("where")
+    st.latex(r"\beta = \frac{\pi a y}{\lambda D}")
+    st.write("- \(I_0\): maximum intensity at the center (set to 1 for relative intensity)")
+    st.write("- \(\lambda\): wavelength of the light")
+    st.write("- \(a\): slit width")
+    st.write("- \(D\): distance from slit to screen")
+    st.write("- \(y\): position on the screen")
+    st.write("The minima (dark bands) occur at:")
+    st.latex(r"y = \pm \frac{m \lambda D}{a}, \quad m = 1, 2, 3, \dots")
+    st.write("This simulation plots \(I(y)\) vs. \(y\), showing how the pattern spreads or narrows based on your inputs.")
+
+    # Generate position array (y) in meters
+    y_m = np.linspace(-0.02, 0.02, 1000)  # -20 mm to 20 mm in meters
+
+    # Compute the diffraction parameter β and intensity I(y)
+    z = (a_m * y_m) / (lambda_m * D_m)
+    I = (np.sinc(z))**2  # np.sinc(x) = sin(πx)/(πx), and I = [sin(β)/β]^2
+
+    # Convert y to millimeters for plotting
+    y_mm = y_m * 1e3  # m to mm
+
+    # Create the plot
+    fig, ax = plt.subplots(figsize=(10, 6))
+    ax.plot(y_mm, I, color='blue')
+    ax.set_xlabel("Position on Screen (mm)")
+    ax.set_ylabel("Relative Intensity")
+    ax.set_ylim(0, 1.05)  # Intensity from 0 to just above 1
+    ax.grid(True)
+    st.pyplot(fig)
+
+    # Calculate and display the position of the first minimum
+    y_min_m = lambda_m * D_m / a_m  # in meters
+    y_min_mm = y_min_m * 1e3        # in millimeters
+    st.write(f"First minimum at y = ± {y_min_mm:.2f} mm")
+
+else:
+    st.markdown("### Fourier Optics")
+    st.write("A plane wave passes through an aperture mask. In the far field (Fraunhofer) the pattern is the "
+             "squared magnitude of the mask's 2D Fourier transform, one FFT. Closer to the aperture (Fresnel) "
+             "the field is propagated with the angular-spectrum method: the mask's spectrum is multiplied by "
+             "the transfer function below and transformed back. That transfer function is only sampled finely "
+             "enough up to z = N dx² / λ, so farther away the single-FFT Fresnel transform is used instead, "
+             "on an output plane that widens with z.")
+    st.latex(r"U(x, y, z) = \mathcal{F}^{-1}\left\{ \mathcal{F}\{U_0\}\, e^{i z \sqrt{k^2 - k_x^2 - k_y^2}} \right\}")
+
+    aperture = st.selectbox("Aperture", ["Single slit", "Double slit", "Grating", "Circular aperture",
+                                         "Uploaded bitmap"])
+    n = st.select_slider("Grid Size (samples per side)", options=[256, 512, 1024, 2048], value=1024)
+    width_mm = st.slider("Aperture Plane Width (mm)", 1.0, 20.0, 4.0, step=0.5,
+                         help="Side of the sampled plane; near-field patterns must fit inside it")
+    width_m = width_mm * 1e-3
+    bitmap = None
+    if aperture in ("Single slit", "Double slit"):
+        height_um = st.slider("Slit height (μm)", 10, 2000, 1000)
+        values = (a_m, height_um * 1e-6)
+        size_m = a_m
+        if aperture == "Double slit":
+            separation_um = st.slider("Slit separation (μm)", 20, 2000, 400)
+            values += (separation_um * 1e-6,)
+            size_m = separation_um * 1e-6 + a_m
+    elif aperture == "Grating":
+        period_um = st.slider("Grating period (μm)", 10, 500, 50)
+        duty = st.slider("Open fraction", 0.1, 0.9, 0.5)
+        size_um = st.slider("Illuminated width (μm)", 100, 4000, 1000)
+        values = (period_um * 1e-6, duty, size_um * 1e-6)
+        size_m = size_um * 1e-6
+    elif aperture == "Circular aperture":
+        radius_um = st.slider("Aperture radius (μm)", 10, 1000, 100)
+        values = (radius_um * 1e-6,)
+        size_m = 2 * radius_um * 1e-6
+    else:
+        upload = st.file_uploader("Aperture Bitmap (bright pixels transmit)", type=["png", "jpg", "jpeg", "bmp"])
+        fill = st.slider("Bitmap size (fraction of the plane)", 0.05, 1.0, 0.25)
+        bitmap = upload.getvalue() if upload is not None else None
+        if bitmap is None:
+            st.info("Upload an image to use it as the aperture; showing a triangular hole for now.")
+        values = (fill,)
+        size_m = fill * width_m
+
+    propagation = st.radio("Propagation", ["Fraunhofer (far field)", "Fresnel (near field)"], horizontal=True)
+    if propagation.startswith("Fresnel"):
+        z_mm = st.slider("Propagation distance z (mm)", 1.0, 2000.0, 50.0, step=1.0)
+        distance = z_mm * 1e-3
+    else:
+        distance = D_m
+    log_scale = st.checkbox("Logarithmic intensity", value=aperture != "Single slit")
+
+    engine = diffraction_engine(aperture, values, n, width_m, bitmap)
+    start = time.perf_counter()
+    if propagation.startswith("Fresnel"):
+        field, x = engine.fresnel(lambda_m, distance)
+        limit = engine.fresnel_limit(lambda_m)
+        method = "angular spectrum" if distance <= limit else "single-FFT Fresnel transform"
+        I = np.abs(field)**2
+        I /= max(float(I.max()), 1e-30)
+        half = x.max()
+    else:
+        I, x = engine.fraunhofer(lambda_m, distance)
+        # Same ±20 mm screen as the analytic plot, or the whole computed screen if smaller
+        half = min(0.02, x.max())
+    elapsed = time.perf_counter() - start
+    keep = np.abs(x) <= half
+    I = I[np.ix_(keep, keep)]
+    x_mm = x[keep] * 1e3
+    shown = np.log10(np.maximum(I, 1e-6)) if log_scale else I
+
+    fig, (ax_mask, ax_screen) = plt.subplots(1, 2, figsize=(10, 5))
+    ax_mask.imshow(np.abs(engine.mask), cmap='gray', origin='lower',
+                   extent=[-width_mm / 2, width_mm / 2, -width_mm / 2, width_mm / 2])
+    ax_mask.set_title("Aperture Mask")
+    ax_mask.set_xlabel("x (mm)")
+    ax_mask.set_ylabel("y (mm)")
+    image = ax_screen.imshow(shown, cmap='inferno', origin='lower',
+                             extent=[x_mm.min(), x_mm.max(), x_mm.min(), x_mm.max()])
+    ax_screen.set_title(f"Intensity at z = {distance * 1e3:.0f} mm")
+    ax_screen.set_xlabel("x (mm)")
+    fig.colorbar(image, ax=ax_screen, label="log10 relative intensity" if log_scale else "Relative intensity")
+    st.pyplot(fig)
+    plt.close(fig)
+
+    # Horizontal cut through the centre, with the analytic sinc² for a single slit in the far field
+    fig, ax = plt.subplots(figsize=(10, 4))
+    ax.plot(x_mm, I[len(x_mm) // 2], color='blue', label="Fourier optics")
+    if aperture == "Single slit" and propagation.startswith("Fraunhofer"):
+        ax.plot(x_mm, np.sinc(a_m * x_mm * 1e-3 / (lambda_m * distance))**2, 'r--', label="Analytic sinc²")
+    ax.set_xlabel("Position on Screen (mm)")
+    ax.set_ylabel("Relative Intensity")
+    ax.set_yscale('log' if log_scale else 'linear')
+    if log_scale:
+        ax.set_ylim(1e-6, 1.5)
+    ax.grid(True)
+    ax.legend()
+    st.pyplot(fig)
+    plt.close(fig)
+
+    N_F = fresnel_number(size_m, lambda_m, distance)
+    regime = "far field" if N_F < 0.1 else "near field" if N_F > 1 else "transition"
+    details = f" · {method} (switches at z = {limit * 1e3:.0f} mm)" if propagation.startswith("Fresnel") else ""
+    st.caption(f"{n}² grid · propagated in {1e3 * elapsed:.1f} ms{details} · Fresnel number "
+               f"N_F = {N_F:.3g} ({regime}; the Fraunhofer pattern holds for N_F ≪ 1)")
+    if propagation.startswith("Fraunhofer") and N_F > 0.1:
+        st.warning(f"N_F = {N_F:.2g} is not small: the screen is too close for the far-field pattern. "
+                   "Use the Fresnel propagation for this distance.")
@@ -1,6 +1,8 @@
 import streamlit as st
 import numpy as np
 import matplotlib.pyplot as plt
+from simulations.electrostatics import ChargeTree, FieldCache, ParticleMesh
+from simulations.fieldlines import STOP_SINK, charge_seeds, trace_field_lines
 
 # Title of the Streamlit app
 st.title("Electric Field Visualization")
@@ -38,6 +40,28 @@ def calculate_electric_field(charges, X, Y, k=1, epsilon=1e-6):
         E_y_total += E_y_charge
     return E_x_total, E_y_total
 
+def electric_field_at(positions, qs, points, k=1, epsilon=1e-6, chunk=1024):
+    """
+    Direct-sum electric field of point charges at arbitrary points.
+
+    Same softened Coulomb field as calculate_electric_field, summed over
+    blocks of `chunk` charges so memory stays bounded.
+
+    Parameters:
+    - positions: (N, 2) array of charge positions
+    - qs: (N,) array of charges
+    - points: (M, 2) array of evaluation points
+
+    Returns:
+    - E: (M, 2) array of field vectors
+    """
+    E = np.zeros((len(points), 2))
+    for start in range(0, len(qs), chunk):
+        d = points[:, None, :] - positions[None, start:start + chunk]
+        r2 = np.sum(d**2, axis=-1) + epsilon
+        E += k * np.einsum('mn,mnd->md', qs[start:start + chunk] / r2**1.5, d)
+    return E
+
 # UI to add a charge
 st.subheader("Add a Charge")
 x = st.slider("X position", -5.0, 5.0, 0.0, key="x_add")
@@ -47,41 +71,123 @@ if st.button("Add Charge", key="add_charge"):
     st.session_state.charges.append({'x': x, 'y': y, 'q': q})
     st.success(f"Added charge q={q} at ({x}, {y})")
 
+# UI to add many random charges at once
+with st.expander("Add Random Charges"):
+    num_random = st.slider("Number of random charges", 100, 100000, 1000, step=100, key="n_random")
+    if st.button("Add Random Charges", key="add_random"):
+        rng = np.random.default_rng()
+        xs = rng.uniform(-5, 5, num_random).round(2)
+        ys = rng.uniform(-5, 5, num_random).round(2)
+        qs = rng.choice([1, -1], num_random)
+        st.session_state.charges.extend({'x': float(cx), 'y': float(cy), 'q': int(cq)}
+                                        for cx, cy, cq in zip(xs, ys, qs))
+        st.success(f"Added {num_random} random charges")
+
 # UI to display and remove charges
 st.subheader("Current Charges")
 if st.session_state.charges:
-    for i, charge in enumerate(st.session_state.charges):
+    # List (and offer for removal) at most the first 100 charges
+    listed = st.session_state.charges[:100]
+    for i, charge in enumerate(listed[:20]):
         st.write(f"Charge {i}: x={charge['x']}, y={charge['y']}, q={'+' if charge['q'] > 0 else '-'}1")
-    
+    if len(st.session_state.charges) > 20:
+        st.write(f"... and {len(st.session_state.charges) - 20} more")
+
     # Select and remove a charge
     charge_to_remove = st.selectbox(
         "Select charge to remove",
-        options=range(len(st.session_state.charges)),
-        format_func=lambda i: f"Charge {i}: x={st.session_state.charges[i]['x']}, y={st.session_state.charges[i]['y']}, q={'+' if st.session_state.charges[i]['q'] > 0 else '-'}1",
+        options=range(len(listed)),
+        format_func=lambda i: f"Charge {i}: x={listed[i]['x']}, y={listed[i]['y']}, q={'+' if listed[i]['q'] > 0 else '-'}1",
         key="charge_to_remove"
     )
     if st.button("Remove Selected Charge", key="remove_charge"):
         del st.session_state.charges[charge_to_remove]
         st.success("Charge removed!")
+    if st.button("Remove All Charges", key="clear_charges"):
+        st.session_state.charges = []
+        st.success("All charges removed!")
 else:
     st.write("No charges added yet. Add some to see the electric field.")
 
 # Create the plot if there are charges
 if st.session_state.charges:
-    # Define the grid for calculation
-    x_grid = np.linspace(-5, 5, 20)
-    y_grid = np.linspace(-5, 5, 20)
-    X, Y = np.meshgrid(x_grid, y_grid)
+    positions = np.array([[c['x'], c['y']] for c in st.session_state.charges])
+    qs = np.array([c['q'] for c in st.session_state.charges], dtype=float)
 
-    # Calculate the electric field
-    E_x, E_y = calculate_electric_field(st.session_state.charges, X, Y)
+    # Calculate the electric field: direct sum, or particle-mesh for large clouds
+    method = st.radio("Field Solver", ["Direct sum", "Treecode (fast multipole)", "Particle-mesh (FFT)"],
+                      index=0 if len(st.session_state.charges) <= 1000 else 1)
+    if method == "Treecode (fast multipole)":
+        theta = st.slider("Treecode accuracy θ (0 = exact)", 0.0, 1.0, 0.5, step=0.05, key="theta")
 
-    # Create the plot
+    # Traced lines follow the field itself; the streamplot samples it on a grid
+    rendering = st.radio("Rendering", ["Traced field lines", "Streamplot (grid)"], key="rendering")
     fig, ax = plt.subplots(figsize=(8, 8))
-    ax.streamplot(X, Y, E_x, E_y, color='black', linewidth=1, density=1.5)
+
+    if rendering == "Streamplot (grid)":
+        # Define the grid for calculation
+        resolution = st.slider("Grid Resolution", 10, 200, 20, step=5, key="grid_resolution")
+        x_grid = np.linspace(-5, 5, resolution)
+        y_grid = np.linspace(-5, 5, resolution)
+        X, Y = np.meshgrid(x_grid, y_grid)
+
+        if method == "Direct sum":
+            # Per-charge contributions are cached, so adding or removing one charge
+            # only updates the running total; a new grid starts a new cache
+            cache = st.session_state.get("field_cache")
+            if cache is None or not cache.matches(X, Y):
+                cache = FieldCache(X, Y, lambda charge, X, Y: calculate_electric_field([charge], X, Y))
+                st.session_state.field_cache = cache
+            E_x, E_y = cache.sync(st.session_state.charges)
+            st.caption(f"Field cache: {cache.last_added} charges added and {cache.last_removed} removed "
+                       f"since the last update, {len(cache.contributions)} contributions stored.")
+        elif method == "Treecode (fast multipole)":
+            # Same 1e-6 softening of r² as calculate_electric_field
+            _, E = ChargeTree(positions, qs).evaluate(np.column_stack([X.ravel(), Y.ravel()]),
+                                                      theta=theta, softening=1e-3)
+            E_x, E_y = E[:, 0].reshape(X.shape), E[:, 1].reshape(X.shape)
+        else:
+            mesh = ParticleMesh(256, -5, 5)
+            targets = np.column_stack([X.ravel(), Y.ravel()])
+            _, E_x, E_y = mesh.field_at(positions, qs, targets)
+            E_x, E_y = E_x.reshape(X.shape), E_y.reshape(X.shape)
+
+        ax.streamplot(X, Y, E_x, E_y, color='black', linewidth=1, density=1.5)
+    else:
+        num_lines = st.slider("Number of Field Lines", 8, 400, 64, step=8, key="num_lines")
+
+        # The tracer asks for the field at the current tip of every line, a few hundred points at a time
+        if method == "Direct sum":
+            field_fn = lambda points: electric_field_at(positions, qs, points)
+        elif method == "Treecode (fast multipole)":
+            tree = ChargeTree(positions, qs)
+            field_fn = lambda points: tree.evaluate(points, theta=theta, softening=1e-3)[1]
+        else:
+            # One mesh solve, then cheap interpolation at the line tips
+            mesh = ParticleMesh(256, -5, 5)
+            _, grid_x, grid_y = mesh.fields(positions, qs)
+            field_fn = lambda points: np.column_stack([mesh.interpolate(grid_x, points),
+                                                       mesh.interpolate(grid_y, points)])
+
+        # Lines leave each charge in proportion to |q| and end on the charges they run into
+        seeds, directions, _ = charge_seeds(positions, qs, num_lines, radius=0.1)
+        if len(seeds) == 0:
+            st.warning("No field lines to trace: the charges add up to zero magnitude. "
+                       "Try the streamplot rendering instead.")
+        lines, stops = trace_field_lines(field_fn, seeds, directions, bounds=([-5, -5], [5, 5]),
+                                         sinks=positions, sink_radius=0.05, max_length=40.0)
+        for line, direction, stop in zip(lines, directions, stops):
+            # A line traced back from a negative charge to a positive one was already drawn from the positive end
+            if direction < 0 and stop == STOP_SINK:
+                continue
+            ax.plot(line[:, 0], line[:, 1], 'k-', linewidth=1)
+            if len(line) > 2:
+                m = len(line) // 2
+                tail, head = (line[m], line[m + 1]) if direction > 0 else (line[m + 1], line[m])
+                ax.annotate('', xy=head, xytext=tail, arrowprops=dict(arrowstyle='->', color='black', lw=1))
     
-    # Plot each charge
-    for charge in st.session_state.charges:
+    # Plot each charge (the first 500 of them)
+    for charge in st.session_state.charges[:500]:
         color = 'red' if charge['q'] > 0 else 'blue'
         ax.plot(charge['x'], charge['y'], 'o', color=color, markersize=10, label=f"q={charge['q']}")
     
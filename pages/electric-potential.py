@@ -2,48 +2,195 @@ import streamlit as st
 import numpy as np
 import plotly.graph_objects as go
 from scipy.constants import k as coulomb_k
+from simulations.electrostatics import ChargeTree, MultigridPoisson, ParticleMesh
 
 # Title of the app
 st.title("Electric Potential Visualization")
 
-# Sidebar for user inputs
-st.sidebar.header("Charge Configuration")
-num_charges = st.sidebar.selectbox("Number of charges", [1, 2, 3, 4, 5])
-
-charges = []
-for i in range(num_charges):
-    st.sidebar.subheader(f"Charge {i+1}")
-    # Sliders for charge magnitude and position
-    Q = st.sidebar.slider(f"Q_{i+1} (arbitrary units)", min_value=-10.0, max_value=10.0, value=1.0, key=f"Q{i}")
-    x = st.sidebar.slider(f"x_{i+1}", min_value=-5.0, max_value=5.0, value=0.0, key=f"x{i}")
-    y = st.sidebar.slider(f"y_{i+1}", min_value=-5.0, max_value=5.0, value=0.0, key=f"y{i}")
-    charges.append({'Q': Q, 'x': x, 'y': y})
-
-# Define the 2D grid for calculation
-x = np.linspace(-10, 10, 100)
-y = np.linspace(-10, 10, 100)
-X, Y = np.meshgrid(x, y)
-
-# Calculate total electric potential
-V = np.zeros_like(X)
-for charge in charges:
-    r = np.sqrt((X - charge['x'])**2 + (Y - charge['y'])**2)
-    # Avoid division by zero at charge location
-    r = np.where(r == 0, 1e-6, r)
-    V += coulomb_k * charge['Q'] / r
-
-# Create interactive Plotly contour plot
-fig = go.Figure(data=go.Contour(x=x, y=y, z=V, colorscale='RdBu', colorbar=dict(title='Potential')))
-
-# Add charge markers
-for charge in charges:
-    color = 'red' if charge['Q'] > 0 else 'blue'
-    fig.add_trace(go.Scatter(x=[charge['x']], y=[charge['y']], mode='markers', 
-                             marker=dict(color=color, size=10)))
+modes = ["Point charges (Coulomb sum)", "Conductors and charge density (multigrid)"]
+mode = st.sidebar.radio("Model", modes)
+
+def parse_shapes(text):
+    """Parse lines of `disk x,y,r,value` or `rect x0,y0,x1,y1,value` into a list of tuples."""
+    shapes = []
+    for line in text.split('\n'):
+        if not line.strip():
+            continue
+        try:
+            kind, args = line.split(None, 1)
+            values = tuple(map(float, args.split(',')))
+            if (kind, len(values)) not in (("disk", 4), ("rect", 5)):
+                raise ValueError
+            shapes.append((kind, values))
+        except ValueError:
+            st.sidebar.error(f"Invalid shape: {line}. Use `disk x,y,r,value` or `rect x0,y0,x1,y1,value`.")
+            st.stop()
+    return shapes
+
+def shape_mask(kind, values, X, Y):
+    if kind == "disk":
+        cx, cy, r = values[:3]
+        return (X - cx)**2 + (Y - cy)**2 <= r**2
+    x0, y0, x1, y1 = values[:4]
+    return (X >= min(x0, x1)) & (X <= max(x0, x1)) & (Y >= min(y0, y1)) & (Y <= max(y0, y1))
+
+if mode == modes[0]:
+    # Sidebar for user inputs
+    st.sidebar.header("Charge Configuration")
+    num_charges = st.sidebar.selectbox("Number of charges", [1, 2, 3, 4, 5])
+
+    charges = []
+    for i in range(num_charges):
+        st.sidebar.subheader(f"Charge {i+1}")
+        # Sliders for charge magnitude and position
+        Q = st.sidebar.slider(f"Q_{i+1} (arbitrary units)", min_value=-10.0, max_value=10.0, value=1.0, key=f"Q{i}")
+        x = st.sidebar.slider(f"x_{i+1}", min_value=-5.0, max_value=5.0, value=0.0, key=f"x{i}")
+        y = st.sidebar.slider(f"y_{i+1}", min_value=-5.0, max_value=5.0, value=0.0, key=f"y{i}")
+        charges.append({'Q': Q, 'x': x, 'y': y})
+
+    # Many-charge clouds are handled by the particle-mesh solver
+    st.sidebar.header("Evaluation")
+    method = st.sidebar.radio("Method", ["Direct sum", "Treecode (fast multipole)", "Particle-mesh (FFT)"])
+    if method == "Treecode (fast multipole)":
+        theta = st.sidebar.slider("Treecode accuracy θ (0 = exact)", 0.0, 1.0, 0.5, step=0.05)
+    num_random = st.sidebar.slider("Extra random charges", 0, 100000, 0, step=1000)
+    periodic = method == "Particle-mesh (FFT)" and st.sidebar.checkbox("Periodic box")
+
+    positions = np.array([[c['x'], c['y']] for c in charges])
+    Qs = np.array([c['Q'] for c in charges])
+    if num_random:
+        rng = np.random.default_rng(0)
+        cloud = rng.uniform(-5, 5, (num_random, 2))
+        cloud_Q = rng.uniform(-1, 1, num_random)
+        positions = np.vstack([positions, cloud])
+        Qs = np.concatenate([Qs, cloud_Q])
+
+    if method == "Direct sum":
+        if len(Qs) > 1000:
+            st.warning(f"The direct sum over {len(Qs)} charges is slow; try the particle-mesh method.")
+
+        # Define the 2D grid for calculation
+        x = np.linspace(-10, 10, 100)
+        y = np.linspace(-10, 10, 100)
+        X, Y = np.meshgrid(x, y)
+
+        # Calculate total electric potential
+        V = np.zeros_like(X)
+        for (cx, cy), Q in zip(positions, Qs):
+            r = np.sqrt((X - cx)**2 + (Y - cy)**2)
+            # Avoid division by zero at charge location
+            r = np.where(r == 0, 1e-6, r)
+            V += coulomb_k * Q / r
+    elif method == "Treecode (fast multipole)":
+        # One tree walk per block of grid points instead of a pass per charge
+        x = np.linspace(-10, 10, 100)
+        y = np.linspace(-10, 10, 100)
+        X, Y = np.meshgrid(x, y)
+        V, _ = ChargeTree(positions, Qs).evaluate(np.column_stack([X.ravel(), Y.ravel()]), theta=theta, k=coulomb_k)
+        V = V.reshape(X.shape)
+    else:
+        # Cloud-in-cell deposit and one FFT convolution, whatever the number of charges
+        mesh = ParticleMesh(100, -10, 10, periodic=periodic, k=coulomb_k)
+        V, _, _ = mesh.fields(positions, Qs)
+        x, y = mesh.x, mesh.y
+
+    # Create interactive Plotly contour plot
+    fig = go.Figure(data=go.Contour(x=x, y=y, z=V, colorscale='RdBu', colorbar=dict(title='Potential')))
+
+    # Show a sample of the random cloud
+    if num_random:
+        shown = cloud[:2000]
+        fig.add_trace(go.Scatter(x=shown[:, 0], y=shown[:, 1], mode='markers',
+                                 marker=dict(color='gray', size=2), showlegend=False))
+
+    # Add charge markers
+    for charge in charges:
+        color = 'red' if charge['Q'] > 0 else 'blue'
+        fig.add_trace(go.Scatter(x=[charge['x']], y=[charge['y']], mode='markers',
+                                 marker=dict(color=color, size=10)))
+else:
+    st.markdown(r"""
+    The potential inside a grounded box ($V = 0$ on the edges) is found by solving Poisson's equation
+    $-\nabla^2 V = \rho / \varepsilon$ (with $\varepsilon = 1$) on a grid, with every conductor held at its
+    own potential. Moving a slider restarts the multigrid solver from the previous solution.
+    """)
+
+    n = st.sidebar.select_slider("Grid Points per Side", options=[129, 257, 513, 1025], value=257)
+    x = np.linspace(-10, 10, n)
+    y = np.linspace(-10, 10, n)
+    X, Y = np.meshgrid(x, y)
+    h = x[1] - x[0]
+
+    # Conductors, each with its own potential
+    st.sidebar.header("Conductors")
+    num_conductors = st.sidebar.selectbox("Number of conductors", [0, 1, 2, 3, 4], index=2)
+    conductor_shapes = []
+    conductor_potentials = []
+    for i in range(num_conductors):
+        st.sidebar.subheader(f"Conductor {i+1}")
+        kind = st.sidebar.selectbox("Shape", ["Disk", "Vertical plate", "Horizontal plate"], key=f"cshape{i}")
+        cx = st.sidebar.slider("x", -8.0, 8.0, [-4.0, 4.0, 0.0, 0.0][i], key=f"cx{i}")
+        cy = st.sidebar.slider("y", -8.0, 8.0, [0.0, 0.0, 4.0, -4.0][i], key=f"cy{i}")
+        size = st.sidebar.slider("Radius / half-length", 0.2, 6.0, 1.0, key=f"csize{i}")
+        potential = st.sidebar.slider("Potential V", -10.0, 10.0, [1.0, -1.0, 0.5, -0.5][i], key=f"cV{i}")
+        if kind == "Disk":
+            conductor_shapes.append(("disk", (cx, cy, size)))
+        elif kind == "Vertical plate":
+            conductor_shapes.append(("rect", (cx - 0.1, cy - size, cx + 0.1, cy + size)))
+        else:
+            conductor_shapes.append(("rect", (cx - size, cy - 0.1, cx + size, cy + 0.1)))
+        conductor_potentials.append(potential)
+
+    # Free charge, drawn as a list of uniformly charged shapes
+    st.sidebar.header("Charge Density")
+    density_input = st.sidebar.text_area(
+        "One shape per line: `disk x,y,r,ρ` or `rect x0,y0,x1,y1,ρ`",
+        "disk 0,5,1.5,1\nrect -2,-7,2,-6,-2"
+    )
+    rho = np.zeros((n, n))
+    for kind, values in parse_shapes(density_input):
+        rho[shape_mask(kind, values, X, Y)] += values[-1]
+
+    fixed = np.zeros((n, n), dtype=bool)
+    fixed_values = np.zeros((n, n))
+    for (kind, values), potential in zip(conductor_shapes, conductor_potentials):
+        mask = shape_mask(kind, values, X, Y)
+        fixed |= mask
+        fixed_values[mask] = potential
+
+    # Rebuild the multigrid hierarchy only when the geometry changes
+    geometry = (n, tuple(conductor_shapes))
+    if st.session_state.get("potential_mg_geometry") != geometry:
+        st.session_state.potential_mg = MultigridPoisson(n, h, fixed)
+        st.session_state.potential_mg_geometry = geometry
+    solver = st.session_state.potential_mg
+
+    # Warm start from the last solution on the same grid
+    previous = st.session_state.get("potential_mg_V")
+    V0 = previous if previous is not None and previous.shape == (n, n) else None
+    V, info = solver.solve(rho, fixed_values, V0=V0, tol=1e-6)
+    st.session_state.potential_mg_V = V
+
+    st.write(f"Multigrid: {info['cycles']} V-cycles ({'warm' if V0 is not None else 'cold'} start), "
+             f"relative residual {info['residual']:.1e} on a {n}×{n} grid.")
+
+    # Plot at most ~257 points per side
+    stride = max(1, (n - 1) // 256)
+    fig = go.Figure(data=go.Contour(x=x[::stride], y=y[::stride], z=V[::stride, ::stride],
+                                    colorscale='RdBu', reversescale=True, colorbar=dict(title='Potential')))
+
+    # Outline the conductors
+    for kind, values in conductor_shapes:
+        if kind == "disk":
+            cx, cy, r = values
+            fig.add_shape(type="circle", x0=cx - r, y0=cy - r, x1=cx + r, y1=cy + r, line=dict(color="black"))
+        else:
+            fig.add_shape(type="rect", x0=values[0], y0=values[1], x1=values[2], y1=values[3],
+                          line=dict(color="black"), fillcolor="gray")
 
 # Customize plot layout
 fig.update_layout(title='Electric Potential', xaxis_title='x', yaxis_title='y')
 fig.update_yaxes(scaleanchor="x", scaleratio=1)  # Equal aspect ratio
 
 # Display the plot in Streamlit
-st.plotly_chart(fig)
\ No newline at end of file
+st.plotly_chart(fig)
@@ -1,6 +1,7 @@
 import streamlit as st
 import numpy as np
 import matplotlib.pyplot as plt
+from simulations.electrostatics import ChargeTree
 
 # Introduction and instructions
 st.markdown("""
@@ -26,6 +27,7 @@ charges_input = st.sidebar.text_area(
     "0,0,1\n3,0,-1"
 )
 vis_type = st.sidebar.radio("Visualization Type", ["Quiver Plot", "Field Lines"])
+theta = st.sidebar.slider("Treecode accuracy θ (0 = exact)", 0.0, 1.0, 0.5, step=0.05)
 
 # Parse the input charges
 charges = []
@@ -43,20 +45,15 @@ if not charges:
     st.warning("No charges entered. Please add charges in the sidebar.")
     st.stop()
 
-# Function to compute the electric field at a point (x, y)
-def electric_field(x, y, charges):
-    Ex, Ey = 0, 0
-    for cx, cy, Q in charges:
-        dx = x - cx
-        dy = y - cy
-        r2 = dx**2 + dy**2
-        # Avoid division by zero (when point is exactly at a charge)
-        if r2 < 1e-10:
-            continue
-        r3 = r2**1.5
-        Ex += Q * dx / r3
-        Ey += Q * dy / r3
-    return Ex, Ey
+# Sort the charges into a treecode once; it evaluates the field at many points per call
+tree = ChargeTree(np.array([(cx, cy) for cx, cy, Q in charges]), np.array([Q for cx, cy, Q in charges]))
+
+# Function to compute the electric field at points (x, y) (arrays of any shape)
+def electric_field(x, y):
+    # A point exactly at a charge gets no contribution from that charge
+    points = np.column_stack([np.ravel(x), np.ravel(y)]).astype(float)
+    _, E = tree.evaluate(points, theta=theta)
+    return E[:, 0].reshape(np.shape(x)), E[:, 1].reshape(np.shape(x))
 
 # Set up the plot
 fig, ax = plt.subplots(figsize=(8, 8))
@@ -68,11 +65,7 @@ X, Y = np.meshgrid(x, y)
 
 if vis_type == "Quiver Plot":
     # Compute electric field across the grid
-    Ex = np.zeros_like(X, dtype=float)
-    Ey = np.zeros_like(Y, dtype=float)
-    for i in range(X.shape[0]):
-        for j in range(X.shape[1]):
-            Ex[i, j], Ey[i, j] = electric_field(X[i, j], Y[i, j], charges)
+    Ex, Ey = electric_field(X, Y)
     
     # Calculate field magnitude for coloring
     M = np.sqrt(Ex**2 + Ey**2)
@@ -91,27 +84,32 @@ else:  # Field Lines
             y0 = cy + 0.1 * np.sin(angle)
             starting_points.append((x0, y0))
     
-    # Trace field lines from each starting point
-    for x0, y0 in starting_points:
-        path = [(x0, y0)]
-        for _ in range(100):  # Maximum steps
-            Ex, Ey = electric_field(x0, y0, charges)
-            mag = np.sqrt(Ex**2 + Ey**2)
-            if mag < 1e-5:  # Stop if field is too weak
-                break
-            # Normalize step size
-            step_x = 0.1 * Ex / mag
-            step_y = 0.1 * Ey / mag
-            x0 += step_x
-            y0 += step_y
-            # Stop if outside the plot boundaries
-            if x0 < -10 or x0 > 10 or y0 < -10 or y0 > 10:
-                break
-            path.append((x0, y0))
-        
-        # Plot the field line
-        px, py = zip(*path)
-        ax.plot(px, py, 'k-', linewidth=1)
+    # Trace all field lines together, one field evaluation per step
+    px = np.array([p[0] for p in starting_points])
+    py = np.array([p[1] for p in starting_points])
+    paths = [[(x0, y0)] for x0, y0 in starting_points]
+    active = np.arange(len(starting_points))
+    for _ in range(100):  # Maximum steps
+        Ex, Ey = electric_field(px[active], py[active])
+        mag = np.sqrt(Ex**2 + Ey**2)
+        # Stop lines where the field is too weak
+        moving = mag >= 1e-5
+        active, Ex, Ey, mag = active[moving], Ex[moving], Ey[moving], mag[moving]
+        # Normalize step size
+        px[active] += 0.1 * Ex / mag
+        py[active] += 0.1 * Ey / mag
+        # Stop lines that leave the plot boundaries
+        inside = (px[active] >= -10) & (px[active] <= 10) & (py[active] >= -10) & (py[active] <= 10)
+        active = active[inside]
+        for i in active:
+            paths[i].append((px[i], py[i]))
+        if len(active) == 0:
+            break
+
+    # Plot the field lines
+    for path in paths:
+        line_x, line_y = zip(*path)
+        ax.plot(line_x, line_y, 'k-', linewidth=1)
 
 # Plot the charges
 for cx, cy, Q in charges:
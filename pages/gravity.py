@@ -1,11 +1,23 @@
 import streamlit as st
 import numpy as np
-import matplotlib.pyplot as plt
-from matplotlib.animation import FuncAnimation
-import matplotlib.animation as animation
+from collections import deque
+from matplotlib.figure import Figure
+from matplotlib.backends.backend_agg import FigureCanvasAgg as FigureCanvas
+import pandas as pd
+from simulations.nbody import (direct_accelerations, barnes_hut_accelerations, compare_force_backends,
+                               conserved_quantities)
+from simulations.integrators import (euler_step, leapfrog_step, yoshida4_step, block_leapfrog_step,
+                                     block_levels)
+from simulations.streaming import SimulationWorker, encode_gif, encode_mp4, mp4_available, submit_export
+
+# Memory allowed for one session's buffered position snapshots
+BUFFER_BYTES = 64 * 2**20
 
 class GravitySimulation:
-    def __init__(self, num_bodies=3, width=10, height=10):
+    def __init__(self, num_bodies=3, width=10, height=10, softening=0.05, tile_size=512,
+                 backend="direct", theta=0.5, integrator="leapfrog", max_level=4, eta=0.05,
+                 wall_restitution=0.9, diagnostic_interval=10, diagnostic_sample=1024,
+                 max_diagnostics=2000):
         """
         Initialize the gravity simulation
         
@@ -17,10 +29,44 @@ class GravitySimulation:
             Width of the simulation space (default is 10)
         height : float, optional
             Height of the simulation space (default is 10)
+        softening : float, optional
+            Plummer softening length (default is 0.05)
+        tile_size : int, optional
+            Bodies per block in the pairwise force kernel (default is 512)
+        backend : str, optional
+            Force backend, "direct" or "barnes-hut" (default is "direct")
+        theta : float, optional
+            Barnes-Hut opening angle (default is 0.5)
+        integrator : str, optional
+            "euler", "leapfrog", "yoshida4" or "block-leapfrog" (default is "leapfrog")
+        max_level : int, optional
+            Finest block time-step level, dt / 2**max_level (default is 4)
+        eta : float, optional
+            Accuracy parameter of the block time-step criterion (default is 0.05)
+        wall_restitution : float, optional
+            Fraction of normal velocity kept on a wall bounce (default is 0.9)
+        diagnostic_interval : int, optional
+            Steps between energy/momentum diagnostics per 10000 bodies, 0 disables them
+            (default is 10)
+        diagnostic_sample : int, optional
+            Bodies whose potentials estimate the potential energy when the backend is
+            not direct (default is 1024)
+        max_diagnostics : int, optional
+            Number of most recent diagnostic records kept (default is 2000)
         """
         self.num_bodies = num_bodies
         self.width = width
         self.height = height
+        self.softening = softening
+        self.tile_size = tile_size
+        self.backend = backend
+        self.theta = theta
+        self.integrator = integrator
+        self.max_level = max_level
+        self.eta = eta
+        self.wall_restitution = wall_restitution
+        # The potential sum costs O(N) per sampled body, so check less often for large N
+        self.diagnostic_interval = diagnostic_interval * -(-num_bodies // 10000)
         
         # Gravitational constant (scaled for visualization)
         self.G = 1.0
@@ -29,63 +75,154 @@ class GravitySimulation:
         self.positions = np.random.rand(num_bodies, 2) * np.array([width, height])
         self.velocities = np.random.randn(num_bodies, 2) * 0.1
         self.masses = np.random.uniform(0.5, 2, num_bodies)
+        
+        # Integrator state: cached accelerations, block levels and diagnostics
+        self.time = 0.0
+        self.step_count = 0
+        self.force_evaluations = 0
+        self._accelerations = None
+        self._levels = None
+        self.diagnostics = deque(maxlen=max_diagnostics)
+        # Off the direct backend, a fixed random sample of bodies estimates the O(N²) potential
+        self._diagnostic_bodies = None
+        if backend != "direct" and num_bodies > diagnostic_sample:
+            self._diagnostic_bodies = np.sort(np.random.choice(num_bodies, diagnostic_sample, replace=False))
+        self._initial_energy = None
+        self._initial_momentum = None
+        self._momentum_scale = None
     
-    def compute_accelerations(self):
+    def compute_accelerations(self, positions=None, targets=None):
         """
         Compute gravitational accelerations between bodies
         
+        Parameters:
+        -----------
+        positions : numpy.ndarray, optional
+            Positions to evaluate (default is the current positions)
+        targets : numpy.ndarray, optional
+            Indices of the bodies whose accelerations are needed (default is all)
+        
         Returns:
         --------
         numpy.ndarray
-            Accelerations for each body
+            Accelerations for each (targeted) body
         """
-        accelerations = np.zeros_like(self.positions)
-        
-        for i in range(self.num_bodies):
-            for j in range(self.num_bodies):
-                if i != j:
-                    # Vector from body i to body j
-                    r_vector = self.positions[j] - self.positions[i]
-                    
-                    # Distance between bodies
-                    r_magnitude = np.linalg.norm(r_vector)
-                    
-                    # Avoid division by zero
-                    if r_magnitude > 0:
-                        # Gravitational acceleration
-                        acceleration_magnitude = self.G * self.masses[j] / (r_magnitude ** 2)
-                        
-                        # Direction of acceleration
-                        acceleration = acceleration_magnitude * (r_vector / r_magnitude)
-                        
-                        accelerations[i] += acceleration
-        
-        return accelerations
+        if positions is None:
+            positions = self.positions
+        self.force_evaluations += self.num_bodies if targets is None else len(targets)
+        if self.backend == "barnes-hut":
+            return barnes_hut_accelerations(positions, self.masses, G=self.G, softening=self.softening,
+                                            theta=self.theta, targets=targets)
+        return direct_accelerations(positions, self.masses, G=self.G,
+                                    softening=self.softening,
+                                    tile_size=self.tile_size, targets=targets)
+    
+    def _desired_levels(self, accelerations, dt):
+        return block_levels(accelerations, dt, self.eta, max(self.softening, 1e-3), self.max_level)
     
     def update(self, dt=0.01):
         """
-        Update positions and velocities using Euler integration
+        Advance the simulation by one step of length dt
         
         Parameters:
         -----------
         dt : float, optional
             Time step for simulation (default is 0.01)
         """
-        # Compute accelerations
-        accelerations = self.compute_accelerations()
+        if self.diagnostic_interval and self._initial_energy is None:
+            self.record_diagnostics()
         
-        # Update velocities
-        self.velocities += accelerations * dt
-        
-        # Update positions
-        self.positions += self.velocities * dt
+        if self.integrator == "euler":
+            euler_step(self.positions, self.velocities, self.compute_accelerations, dt)
+        elif self.integrator == "yoshida4":
+            yoshida4_step(self.positions, self.velocities, self.compute_accelerations, dt)
+        elif self.integrator == "block-leapfrog":
+            if self._accelerations is None:
+                self._accelerations = self.compute_accelerations()
+                self._levels = self._desired_levels(self._accelerations, dt)
+            block_leapfrog_step(self.positions, self.velocities, self._accelerations, self._levels,
+                                lambda pos, idx: self.compute_accelerations(pos, idx), dt,
+                                lambda acc: self._desired_levels(acc, dt), self.max_level)
+        else:
+            if self._accelerations is None:
+                self._accelerations = self.compute_accelerations()
+            self._accelerations = leapfrog_step(self.positions, self.velocities, self._accelerations,
+                                                self.compute_accelerations, dt)
         
         # Simple boundary conditions (bouncing off walls)
-        for i in range(self.num_bodies):
-            for dim in range(2):
-                if (self.positions[i, dim] < 0) or (self.positions[i, dim] > [self.width, self.height][dim]):
-                    self.velocities[i, dim] *= -0.9  # Damped bounce
-                    self.positions[i, dim] = np.clip(self.positions[i, dim], 0, [self.width, self.height][dim])
+        bounds = np.array([self.width, self.height])
+        outside = (self.positions < 0) | (self.positions > bounds)
+        if np.any(outside):
+            self.velocities[outside] *= -self.wall_restitution  # Damped bounce
+            np.clip(self.positions, 0, bounds, out=self.positions)
+            # Clipped positions invalidate cached forces
+            self._accelerations = None
+        
+        self.time += dt
+        self.step_count += 1
+        if self.diagnostic_interval and self.step_count % self.diagnostic_interval == 0:
+            self.record_diagnostics()
+    
+    def record_diagnostics(self):
+        """
+        Append total energy and momentum drift to the diagnostic stream
+        """
+        energy, momentum = conserved_quantities(self.positions, self.velocities, self.masses,
+                                                G=self.G, softening=self.softening,
+                                                tile_size=self.tile_size, sample=self._diagnostic_bodies)
+        if self._initial_energy is None:
+            self._initial_energy = energy
+            self._initial_momentum = momentum
+            # Momentum scale: initial sum of |m v|, or the virial momentum for cold starts
+            self._momentum_scale = max(np.sum(self.masses * np.linalg.norm(self.velocities, axis=1)),
+                                       np.sqrt(np.sum(self.masses) * abs(energy)), 1e-12)
+        self.diagnostics.append({
+            "time": self.time,
+            "energy": energy,
+            "energy_drift": abs(energy - self._initial_energy) / max(abs(self._initial_energy), 1e-12),
+            "momentum_drift": np.linalg.norm(momentum - self._initial_momentum) / self._momentum_scale,
+            "force_evaluations": self.force_evaluations,
+        })
+
+class FrameRenderer:
+    def __init__(self, masses, width, height):
+        """
+        Render position snapshots to RGB images with a private Agg canvas
+        
+        Uses matplotlib's object API rather than pyplot so renderers can be
+        used from export threads.
+        
+        Parameters:
+        -----------
+        masses : numpy.ndarray
+            Body masses (colour and marker size)
+        width : float
+            Width of the simulation space
+        height : float
+            Height of the simulation space
+        """
+        self.fig = Figure(figsize=(8, 6))
+        self.canvas = FigureCanvas(self.fig)
+        ax = self.fig.add_subplot()
+        ax.set_xlim(0, width)
+        ax.set_ylim(0, height)
+        ax.set_title("Gravitational Interaction")
+        ax.set_xlabel("X Position")
+        ax.set_ylabel("Y Position")
+        self.scatter = ax.scatter(np.zeros(len(masses)), np.zeros(len(masses)),
+                                  c=masses, cmap='viridis',
+                                  s=masses*100/max(1.0, len(masses)/10), alpha=0.7)
+        self.label = ax.text(0.02, 0.96, "", transform=ax.transAxes)
+    
+    def __call__(self, snapshot):
+        """
+        Render a (time, positions) snapshot to an (H, W, 3) uint8 array
+        """
+        t, positions = snapshot
+        self.scatter.set_offsets(positions)
+        self.label.set_text(f"t = {t:.2f}")
+        self.canvas.draw()
+        return np.asarray(self.canvas.buffer_rgba())[..., :3].copy()
 
 def main():
     st.title("Gravitational N-Body Simulation")
@@ -94,7 +231,7 @@ def main():
     st.sidebar.header("Simulation Parameters")
     
     # Number of bodies slider
-    num_bodies = st.sidebar.slider("Number of Bodies", min_value=2, max_value=10, value=3)
+    num_bodies = st.sidebar.slider("Number of Bodies", min_value=2, max_value=100000, value=3)
     
     # Simulation space dimensions
     width = st.sidebar.number_input("Simulation Width", min_value=5.0, max_value=20.0, value=10.0)
@@ -103,58 +240,170 @@ def main():
     # Time step slider
     dt = st.sidebar.slider("Time Step", min_value=0.001, max_value=0.1, value=0.01, step=0.001)
     
-    # Create simulation
-    sim = GravitySimulation(num_bodies=num_bodies, width=width, height=height)
+    # Force kernel parameters
+    backend_label = st.sidebar.selectbox("Force Backend", ["Direct Summation", "Barnes-Hut Tree"])
+    backend = "barnes-hut" if backend_label == "Barnes-Hut Tree" else "direct"
+    theta = st.sidebar.slider("Opening Angle (θ)", min_value=0.0, max_value=1.5, value=0.5, step=0.05,
+                              disabled=backend != "barnes-hut")
+    softening = st.sidebar.slider("Softening Length", min_value=0.0, max_value=0.5, value=0.05, step=0.01)
+    tile_size = st.sidebar.select_slider("Force Tile Size", options=[64, 128, 256, 512, 1024, 2048], value=512)
     
-    # Matplotlib figure for animation
-    fig, ax = plt.subplots(figsize=(8, 6))
-    ax.set_xlim(0, width)
-    ax.set_ylim(0, height)
-    ax.set_title("Gravitational Interaction")
-    ax.set_xlabel("X Position")
-    ax.set_ylabel("Y Position")
+    # Integrator parameters
+    integrators = {
+        "Leapfrog (Velocity Verlet)": "leapfrog",
+        "Yoshida 4th Order": "yoshida4",
+        "Block Time Steps (Leapfrog)": "block-leapfrog",
+        "Explicit Euler": "euler",
+    }
+    integrator = integrators[st.sidebar.selectbox("Integrator", list(integrators))]
+    max_level = st.sidebar.slider("Finest Block Level (dt / 2^k)", min_value=0, max_value=8, value=4,
+                                  disabled=integrator != "block-leapfrog")
+    eta = st.sidebar.slider("Block Step Accuracy (η)", min_value=0.01, max_value=0.5, value=0.05, step=0.01,
+                            disabled=integrator != "block-leapfrog")
+    wall_restitution = st.sidebar.slider("Wall Restitution", min_value=0.5, max_value=1.0, value=0.9, step=0.05)
     
-    # Scatter plot for bodies
-    scatter = ax.scatter(sim.positions[:, 0], sim.positions[:, 1], 
-                         c=sim.masses, cmap='viridis', 
-                         s=sim.masses*100, alpha=0.7)
+    # Playback and buffering
+    st.sidebar.header("Animation Options")
+    display_fps = st.sidebar.slider("Display Rate (fps)", min_value=1, max_value=30, value=10)
+    buffer_frames = st.sidebar.slider("Buffered Frames", min_value=20, max_value=1000, value=200, step=20)
+    steps_per_frame = st.sidebar.slider("Steps per Frame", min_value=1, max_value=50, value=1)
+    # Snapshots are float32 positions; large systems keep fewer of them
+    frame_bytes = num_bodies * 2 * np.dtype(np.float32).itemsize
+    capacity = max(1, min(buffer_frames, BUFFER_BYTES // frame_bytes))
+    if capacity < buffer_frames:
+        st.sidebar.caption(f"Buffer limited to {capacity} frames ({BUFFER_BYTES // 2**20} MB) "
+                           f"for {num_bodies} bodies.")
     
-    # Animation update function
-    def update_plot(frame):
-        sim.update(dt)
-        scatter.set_offsets(sim.positions)
-        return scatter,
+    if backend == "direct" and num_bodies > 5000:
+        st.warning("Direct summation is O(N²); consider the Barnes-Hut backend for more than 5000 bodies.")
     
-    # Create animation
-    anim = FuncAnimation(fig, update_plot, frames=200, interval=50, blit=True)
+    # One background worker per session; rebuild the simulation only when a parameter
+    # changes or on request, so a stopped run keeps its state and error for inspection
+    params = (num_bodies, width, height, dt, backend, theta, softening, tile_size, integrator,
+              max_level, eta, wall_restitution, buffer_frames, steps_per_frame)
+    worker = st.session_state.get("gravity_worker")
+    restart = st.sidebar.button("Restart Simulation")
+    if worker is None or restart or st.session_state.get("gravity_params") != params:
+        if worker is not None:
+            worker.stop()
+        sim = GravitySimulation(num_bodies=num_bodies, width=width, height=height,
+                                softening=softening, tile_size=tile_size,
+                                backend=backend, theta=theta, integrator=integrator,
+                                max_level=max_level, eta=eta, wall_restitution=wall_restitution)
+        worker = SimulationWorker(lambda: sim.update(dt), lambda: (sim.time, sim.positions.astype(np.float32)),
+                                  capacity=capacity, steps_per_snapshot=steps_per_frame,
+                                  target_fps=30).start()
+        st.session_state.gravity_worker = worker
+        st.session_state.gravity_sim = sim
+        st.session_state.gravity_params = params
+        st.session_state.gravity_renderer = FrameRenderer(sim.masses, width, height)
+        st.session_state.pop("gravity_export", None)
+    sim = st.session_state.gravity_sim
+    renderer = st.session_state.gravity_renderer
     
-    # Convert animation to HTML for Streamlit
-    plt.close(fig)
+    # A run that stopped without an error (unwatched, or at its frame limit) can carry on;
+    # errors are reported by the live view below
+    if not worker.running and worker.error is None:
+        reasons = {"idle": "it was not being watched", "finished": "it reached its frame limit"}
+        st.info(f"Simulation paused at t = {sim.time:.2f} because "
+                f"{reasons.get(worker.stop_reason, 'it was stopped')}.")
+        if st.button("Resume Simulation"):
+            # Continue the same simulation (state and diagnostics) on a fresh worker
+            worker = SimulationWorker(lambda: sim.update(dt), lambda: (sim.time, sim.positions.astype(np.float32)),
+                                      capacity=capacity, steps_per_snapshot=steps_per_frame,
+                                      target_fps=30).start()
+            st.session_state.gravity_worker = worker
+            st.rerun()
     
-    # Display animation
-    st.pyplot(fig)
+    show_diagnostics = st.checkbox("Show Conservation Diagnostics")
     
-    # Optional: Provide download of animation
-    st.sidebar.header("Animation Options")
+    # Redraw the newest buffered snapshot at display rate; the worker keeps integrating meanwhile
+    @st.fragment(run_every=1.0 / display_fps)
+    def live_view():
+        snapshot = worker.buffer.latest()
+        st.image(renderer(snapshot))
+        status = "running" if worker.running else "stopped"
+        st.caption(f"t = {snapshot[0]:.2f} | {len(worker.buffer)} frames buffered | worker {status}")
+        if worker.error is not None:
+            st.error(f"Simulation stopped with an error at t = {sim.time:.2f}: {worker.error!r}. "
+                     "Change a parameter or press Restart Simulation to start over.")
+        
+        if show_diagnostics and sim.diagnostics:
+            # Energy / momentum drift as a diagnostic of integrator quality
+            history = pd.DataFrame(list(sim.diagnostics)).set_index("time")
+            st.line_chart(history[["energy_drift", "momentum_drift"]])
+            if sim.step_count:
+                st.write(f"Force evaluations per body per step: "
+                         f"{sim.force_evaluations / (num_bodies * sim.step_count):.2f}")
+    
+    live_view()
+    
+    # Export the buffered frames in memory on the shared export pool
+    formats = ["GIF", "MP4"] if mp4_available() else ["GIF"]
+    export_format = st.sidebar.selectbox("Export Format", formats)
     if st.sidebar.button("Save Animation"):
-        # Save animation as gif
-        anim.save('gravity_simulation.gif', writer='pillow')
-        with open('gravity_simulation.gif', 'rb') as f:
+        encode = encode_mp4 if export_format == "MP4" else encode_gif
+        export_renderer = FrameRenderer(sim.masses, width, height)
+        st.session_state.gravity_export = (export_format,
+                                           submit_export(encode, worker.buffer.frames(), export_renderer,
+                                                         fps=display_fps))
+    
+    @st.fragment(run_every=1.0)
+    def export_status():
+        job = st.session_state.get("gravity_export")
+        if job is None:
+            return
+        export_format, future = job
+        if not future.done():
+            st.sidebar.info(f"Encoding {export_format}...")
+        elif future.exception() is not None:
+            st.sidebar.error(f"Export failed: {future.exception()}")
+        else:
+            extension = export_format.lower()
             st.sidebar.download_button(
                 label="Download Animation",
-                data=f.read(),
-                file_name="gravity_simulation.gif",
-                mime="image/gif"
+                data=future.result(),
+                file_name=f"gravity_simulation.{extension}",
+                mime="image/gif" if extension == "gif" else "video/mp4"
             )
     
+    export_status()
+    
+    # Accuracy vs speed of the tree backend against direct summation
+    st.sidebar.header("Force Backend Report")
+    if st.sidebar.button("Compare Backends"):
+        if num_bodies > 20000:
+            st.sidebar.warning("The report runs direct summation; use 20000 bodies or fewer.")
+        else:
+            _, positions = worker.buffer.latest()
+            rows = compare_force_backends(positions, sim.masses, thetas=(0.3, 0.5, 0.8, 1.0),
+                                          G=sim.G, softening=softening, tile_size=tile_size)
+            st.markdown("## Barnes-Hut Accuracy vs Speed")
+            st.dataframe(pd.DataFrame(rows).rename(columns={
+                "theta": "θ",
+                "direct_time_s": "Direct (s)",
+                "tree_time_s": "Barnes-Hut (s)",
+                "speedup": "Speedup",
+                "median_rel_error": "Median Rel. Error",
+                "p99_rel_error": "99th pct Rel. Error",
+            }))
+    
     # Information section
     st.markdown("## About the Simulation")
     st.markdown("""
     This simulation demonstrates gravitational interactions between multiple bodies:
     - Bodies attract each other based on their masses
     - Gravitational force is inversely proportional to the square of the distance
-    - Bodies bounce off the simulation boundaries
+      (softened at short range so close encounters stay finite)
+    - Bodies bounce off the simulation boundaries (set restitution to 1 for elastic walls)
+    - Leapfrog and Yoshida integrators are symplectic, so energy errors stay bounded instead
+      of growing like explicit Euler; block time steps give bodies in close encounters
+      power-of-two smaller steps without shrinking everyone else's
     - Larger/darker points represent bodies with more mass
+    - The integration runs in a background worker; the view shows its newest snapshot and
+      the export encodes the buffered frames in memory
+    - The Barnes-Hut backend groups distant bodies into quadtree cells, trading a small,
+      θ-controlled force error for O(N log N) cost
     """)
 
 if __name__ == "__main__":
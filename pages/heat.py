@@ -2,46 +2,61 @@ import streamlit as st
 import numpy as np
 import matplotlib.pyplot as plt
 import time
+from simulations.heat import PlateSolver
 
 st.title("Heat Diffusion Simulation")
 
 # Simulation parameters
-nx, ny = 50, 50  # Grid size
+size = st.sidebar.select_slider("Grid Size", options=[50, 128, 256, 512, 1024], value=50)
+nx, ny = size, size
 alpha = st.slider("Thermal Diffusivity (α)", min_value=0.1, max_value=1.0, value=0.2, step=0.1)
-dt = st.slider("Time Step (dt)", min_value=0.001, max_value=0.1, value=0.01, step=0.005)
+
+methods = {"Explicit (FTCS)": "explicit", "ADI (implicit)": "adi", "Spectral (exact in time)": "spectral"}
+method = methods[st.sidebar.selectbox("Solver", list(methods))]
+boundaries = {"Fixed edges (T = 0)": "dirichlet", "Insulated edges": "neumann"}
+boundary = boundaries[st.sidebar.selectbox("Boundary", list(boundaries))]
+
+if method == "explicit":
+    dt = st.slider("Time Step (dt)", min_value=0.001, max_value=0.1, value=0.01, step=0.005)
+else:
+    dt = st.slider("Time Step (dt)", min_value=0.01, max_value=50.0, value=1.0, step=0.01)
 steps = st.number_input("Number of Simulation Steps", min_value=10, max_value=1000, value=100, step=10)
 
 # Initialize temperature field: all zeros with a hot spot in the center
 T = np.zeros((nx, ny))
-T[nx//2, ny//2] = 100.0
+radius = nx // 100
+T[nx//2 - radius:nx//2 + radius + 1, ny//2 - radius:ny//2 + radius + 1] = 100.0
+
+# The grid spacing is one cell, so the explicit update is T += α dt ∇²T
+solver = PlateSolver(T, alpha, dt, method=method, boundary=boundary)
+if not solver.stable:
+    st.warning(f"α·dt = {alpha * dt:.3f} exceeds the explicit stability limit of 0.25; "
+               "the solution will blow up. Reduce dt or switch to the ADI or spectral solver.")
 
 # Placeholder for plotting
 plot_placeholder = st.empty()
 
-def update_temperature(T, alpha, dt):
-    """
-    Update temperature using a simple finite difference scheme for the 2D heat equation.
-    The update formula for interior grid points is:
-    T_new[i, j] = T[i, j] + α * dt * (T[i+1, j] + T[i-1, j] + T[i, j+1] + T[i, j-1] - 4*T[i, j])
-    """
-    T_new = T.copy()
-    T_new[1:-1, 1:-1] = T[1:-1, 1:-1] + alpha * dt * (
-        T[2:, 1:-1] + T[:-2, 1:-1] + T[1:-1, 2:] + T[1:-1, :-2] - 4 * T[1:-1, 1:-1]
-    )
-    return T_new
+# Build the figure once and only swap the image data each frame
+fig, ax = plt.subplots()
+heatmap = ax.imshow(solver.T, cmap='hot', interpolation='nearest', vmin=0.0, vmax=100.0)
+ax.axis('off')
 
 # Run the simulation loop
 for i in range(int(steps)):
-    T = update_temperature(T, alpha, dt)
-    
-    # Create the plot
-    fig, ax = plt.subplots()
-    heatmap = ax.imshow(T, cmap='hot', interpolation='nearest')
-    ax.set_title(f"Step {i+1}")
-    ax.axis('off')
-    
+    if method == "spectral":
+        T = solver.advance_to((i + 1) * dt)
+    else:
+        T = solver.step()
+
+    # Rescale the colours as the hot spot spreads out
+    heatmap.set_data(T)
+    heatmap.set_clim(0.0, max(T.max(), 1e-12))
+    ax.set_title(f"Step {i+1} (t = {(i + 1) * dt:.2f})")
+
     # Display the plot in the Streamlit placeholder
     plot_placeholder.pyplot(fig)
-    
+
     # Pause to simulate time evolution (adjust the sleep time as needed)
     time.sleep(0.1)
+
+plt.close(fig)
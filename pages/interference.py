@@ -1,6 +1,8 @@
 import streamlit as st
 import numpy as np
 import matplotlib.pyplot as plt
+import time
+from simulations.interference import linear_array, steering_phases, array_intensity, beam_pattern
 
 def interference_pattern(lambda_, d, grid_size=200, x_range=5):
     """
@@ -19,26 +21,48 @@ def interference_pattern(lambda_, d, grid_size=200, x_range=5):
     - S1: Position of the first source (list).
     - S2: Position of the second source (list).
     """
-    # Create a 2D grid
+    # Create the grid axes
     x = np.linspace(-x_range, x_range, grid_size)
     y = np.linspace(-x_range, x_range, grid_size)
-    X, Y = np.meshgrid(x, y)
 
     # Define source positions
     S1 = [-d/2, 0]  # First source at (-d/2, 0)
     S2 = [d/2, 0]   # Second source at (d/2, 0)
 
-    # Calculate distances from each source to every point on the grid
-    r1 = np.sqrt((X - S1[0])**2 + (Y - S1[1])**2)
-    r2 = np.sqrt((X - S2[0])**2 + (Y - S2[1])**2)
+    # |e^{ikr1} + e^{ikr2}|^2 / 4 = cos^2(π Δ / λ) with path difference Δ = r2 - r1
+    I = array_intensity([S1, S2], lambda_, x, y) / 4
 
-    # Compute path difference
-    delta = r2 - r1
+    return I, x, y, S1, S2
 
-    # Calculate intensity (proportional to cos^2(π * Δ / λ))
-    I = np.cos(np.pi * delta / lambda_)**2
+@st.cache_data(max_entries=2)
+def phased_array_pattern(num_elements, spacing, lambda_, steer_deg, taper, falloff, resolution, x_range):
+    """
+    Intensity of a steered linear phased array on a square screen in front of it.
 
-    return I, x, y, S1, S2
+    Parameters:
+    - num_elements: Number of sources in the array
+    - spacing: Element spacing in wavelengths
+    - lambda_: Wavelength
+    - steer_deg: Steering angle from the array normal (+y) in degrees
+    - taper: "Uniform" or "Hann" amplitude weighting
+    - falloff: Amplitude decay exponent (0 none, 0.5 cylindrical)
+    - resolution: Screen points per side
+    - x_range: Half-width of the screen
+
+    Returns:
+    - I: (resolution, resolution) float32 intensity
+    - x, y: 1D screen coordinates
+    - positions: (N, 2) element positions
+    - elapsed: Evaluation time in seconds of the run that filled the cache
+    """
+    positions = linear_array(num_elements, spacing * lambda_, center=(0.0, -x_range))
+    amplitudes = np.hanning(num_elements + 2)[1:-1] if taper == "Hann" else 1.0
+    phases = steering_phases(positions, lambda_, np.radians(steer_deg))[0]
+    x = np.linspace(-x_range, x_range, resolution)
+    y = np.linspace(-x_range, x_range, resolution)
+    start = time.perf_counter()
+    I = array_intensity(positions, lambda_, x, y, amplitudes, phases, falloff)
+    return I, x, y, positions, time.perf_counter() - start
 
 # Streamlit app setup
 st.title("Interference Pattern Simulation")
@@ -51,18 +75,84 @@ This simulation visualizes the interference pattern created by two point sources
 Use the sliders below to adjust the **wavelength (λ)** and **source separation (d)** to see how the pattern changes.
 """)
 
+mode = st.radio("Sources", ["Two sources", "Phased array"], horizontal=True)
+
 # Interactive sliders
 lambda_ = st.slider("Wavelength λ", min_value=0.1, max_value=2.0, value=1.0, step=0.1)
-d = st.slider("Source Separation d", min_value=0.5, max_value=5.0, value=2.0, step=0.1)
-
-# Compute the interference pattern
-I, x, y, S1, S2 = interference_pattern(lambda_, d)
-
-# Create and display the plot
-fig, ax = plt.subplots()
-ax.imshow(I, cmap='hot', extent=[x.min(), x.max(), y.min(), y.max()], origin='lower')
-ax.plot([S1[0], S2[0]], [S1[1], S2[1]], 'wo', markersize=5)  # Mark sources with white dots
-ax.set_xlabel("x")
-ax.set_ylabel("y")
-ax.set_title("Interference Pattern")
-st.pyplot(fig)
\ No newline at end of file
+
+if mode == "Two sources":
+    d = st.slider("Source Separation d", min_value=0.5, max_value=5.0, value=2.0, step=0.1)
+
+    # Compute the interference pattern
+    I, x, y, S1, S2 = interference_pattern(lambda_, d)
+
+    # Create and display the plot
+    fig, ax = plt.subplots()
+    ax.imshow(I, cmap='hot', extent=[x.min(), x.max(), y.min(), y.max()], origin='lower')
+    ax.plot([S1[0], S2[0]], [S1[1], S2[1]], 'wo', markersize=5)  # Mark sources with white dots
+    ax.set_xlabel("x")
+    ax.set_ylabel("y")
+    ax.set_title("Interference Pattern")
+    st.pyplot(fig)
+
+else:
+    st.write("""
+    A line of coherent sources along the bottom edge, each with its own amplitude and phase.
+    Giving the elements a linear phase gradient steers the main beam, the way phased-array
+    radars and ultrasound probes point without moving. Spacings above λ/2 let grating lobes appear.
+    """)
+    num_elements = st.select_slider("Number of Elements", options=[2, 4, 8, 16, 32, 64, 128, 256], value=16)
+    spacing = st.slider("Element Spacing (wavelengths)", 0.1, 2.0, 0.5, step=0.05)
+    steer_deg = st.slider("Steering Angle (degrees)", -60, 60, 0)
+    taper = st.selectbox("Amplitude Taper", ["Uniform", "Hann"])
+    spreading = st.selectbox("Amplitude Spreading", ["None", "Cylindrical (1/√r)"])
+    resolution = st.select_slider("Screen Resolution (points per side)", options=[256, 512, 1024, 2048, 4096],
+                                  value=512)
+    x_range = st.slider("Screen Half-Width", 5.0, 100.0, 20.0, step=5.0)
+    falloff = 0.5 if spreading.startswith("Cylindrical") else 0.0
+    if num_elements * resolution**2 > 2**30:
+        st.warning("Large configuration: this may take tens of seconds to evaluate.")
+
+    start = time.perf_counter()
+    I, x, y, positions, elapsed = phased_array_pattern(num_elements, spacing, lambda_, steer_deg, taper, falloff,
+                                                       resolution, x_range)
+    # A cache hit returns the first run's timing, so report this run's time as well
+    lookup = time.perf_counter() - start
+
+    # Draw at most ~1024 pixels per side
+    stride = max(1, resolution // 1024)
+    fig, ax = plt.subplots()
+    ax.imshow(I[::stride, ::stride], cmap='hot', extent=[x.min(), x.max(), y.min(), y.max()], origin='lower',
+              vmax=np.percentile(I, 99.5))
+    ax.plot(positions[:, 0], positions[:, 1], 'wo', markersize=2)
+    ax.set_xlabel("x")
+    ax.set_ylabel("y")
+    ax.set_title(f"{num_elements}-Element Array Steered to {steer_deg}°")
+    st.pyplot(fig)
+    plt.close(fig)
+    if lookup < 0.5 * elapsed:
+        st.caption(f"{resolution}² screen points × {num_elements} sources taken from the cache in "
+                   f"{lookup:.3f} s (evaluated in {elapsed:.2f} s when first computed)")
+    else:
+        st.caption(f"{resolution}² screen points × {num_elements} sources evaluated in {elapsed:.2f} s")
+
+    # Far-field beam patterns for a sweep of steering angles, all in one batched call;
+    # angles are measured from the array centre, not from the screen's origin
+    angles = np.radians(np.linspace(-90, 90, 1441))
+    sweep = np.array(sorted({-60, -30, 0, 30, 60, steer_deg}))
+    amplitudes = np.hanning(num_elements + 2)[1:-1] if taper == "Hann" else 1.0
+    centred = positions - positions.mean(axis=0)
+    patterns = beam_pattern(centred, lambda_, angles, amplitudes,
+                            steering_phases(centred, lambda_, np.radians(sweep)))
+    fig, ax = plt.subplots(subplot_kw={'projection': 'polar'})
+    for angle, pattern in zip(sweep, patterns):
+        db = 10 * np.log10(np.maximum(pattern / pattern.max(), 1e-4))
+        ax.plot(angles, db, linewidth=2 if angle == steer_deg else 0.8, label=f"{angle}°")
+    ax.set_theta_zero_location('N')
+    ax.set_theta_direction(-1)
+    ax.set_thetalim(-np.pi / 2, np.pi / 2)
+    ax.set_rlim(-40, 0)
+    ax.set_title("Far-Field Beam Pattern (dB)")
+    ax.legend(loc='lower left', fontsize='small')
+    st.pyplot(fig)
+    plt.close(fig)
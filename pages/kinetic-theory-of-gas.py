@@ -2,6 +2,8 @@ import streamlit as st
 import numpy as np
 import plotly.graph_objects as go
 import time
+from simulations.gas import reflect_walls, collide_hard_disks, jittered_lattice, EventDrivenGas
+from simulations.runloop import RunLoop
 
 # Streamlit app title and description
 st.title("Kinetic Theory of Gases Simulation")
@@ -9,52 +11,62 @@ st.write("This simulation visualizes gas molecules as particles moving in a 2D c
 
 # Simulation parameters
 L = 1.0          # Container side length
-N = 50           # Number of particles
+engine = st.sidebar.radio("Engine", ["Time-Stepping (Cell List)", "Event-Driven (Exact)"])
+event_driven = engine == "Event-Driven (Exact)"
+N = st.sidebar.slider("Number of Particles", 10, 100000, 50)
+radius = st.sidebar.slider("Particle Radius", 0.0, 0.02, 0.005, step=0.0005, format="%.4f")
+collisions_enabled = st.sidebar.checkbox("Molecule–Molecule Collisions", value=True, disabled=event_driven)
+steps_per_frame = st.sidebar.slider("Steps per Frame", 1, 50, 1)
+max_steps = st.sidebar.slider("Run Length (steps)", 1000, 100000, 10000, step=1000)
+
+# Keep the disk packing fraction N π r² / L² physically sensible
+max_radius = np.sqrt(0.3 * L**2 / (np.pi * N))
+if radius > max_radius:
+    st.sidebar.warning(f"Radius reduced to {max_radius:.4f} to keep the packing fraction below 0.3.")
+    radius = max_radius
+
 sigma = 0.05     # Standard deviation of velocities (related to temperature)
 dt = 0.01        # Time step for simulation
 
-# Initialize particle positions and velocities
-x = np.random.uniform(0, L, N)
-y = np.random.uniform(0, L, N)
-vx = np.random.normal(0, sigma, N)
-vy = np.random.normal(0, sigma, N)
+# Initialize particle positions (N, 2) without overlaps, and velocities (N, 2)
+positions = jittered_lattice(N, radius, L)
+velocities = np.random.normal(0, sigma, (N, 2))
+
+# The event-driven engine jumps between predicted collisions instead of stepping
+if event_driven:
+    gas = EventDrivenGas(positions, velocities, radius, L)
+    velocities = gas.vel
 
 # Initialize momentum transfer for pressure calculation
 total_momentum_transfer = 0
+total_collisions = 0
 
 # Create placeholders for plot and metrics
 plot_placeholder = st.empty()
 metrics_placeholder = st.empty()
 
-# Simulation loop
+# Simulation loop (bounded; stops on disconnect, rerun or when the step budget is used)
+loop = RunLoop("kinetic-gas", max_steps=max_steps, interval=0.0)
 step = 0
-while True:
-    # Update particle positions
-    x_new = x + vx * dt
-    y_new = y + vy * dt
-    
-    # Handle collisions with walls and accumulate momentum transfer
-    for i in range(N):
-        if x_new[i] < 0:
-            x_new[i] = -x_new[i]              # Reflect position
-            vx[i] = -vx[i]                    # Reverse velocity
-            total_momentum_transfer += 2 * abs(vx[i])
-        elif x_new[i] > L:
-            x_new[i] = 2 * L - x_new[i]       # Reflect position
-            vx[i] = -vx[i]                    # Reverse velocity
-            total_momentum_transfer += 2 * abs(vx[i])
-        if y_new[i] < 0:
-            y_new[i] = -y_new[i]              # Reflect position
-            vy[i] = -vy[i]                    # Reverse velocity
-            total_momentum_transfer += 2 * abs(vy[i])
-        elif y_new[i] > L:
-            y_new[i] = 2 * L - y_new[i]       # Reflect position
-            vy[i] = -vy[i]                    # Reverse velocity
-            total_momentum_transfer += 2 * abs(vy[i])
-    
-    # Update positions
-    x = x_new
-    y = y_new
+for _ in loop:
+    if event_driven:
+        # Process every wall/pair event in the next dt; wall impulses are exact per event
+        momentum_before, collisions_before = gas.wall_momentum, gas.collisions
+        gas.advance(gas.time + dt)
+        positions = gas.positions()
+        total_momentum_transfer += gas.wall_momentum - momentum_before
+        total_collisions += gas.collisions - collisions_before
+    else:
+        # Update particle positions
+        positions += velocities * dt
+        
+        # Handle collisions with walls and accumulate momentum transfer
+        momentum, _ = reflect_walls(positions, velocities, L, radius)
+        total_momentum_transfer += momentum
+        
+        # Hard-disk collisions between molecules (cell list, O(N) per step)
+        if collisions_enabled:
+            total_collisions += collide_hard_disks(positions, velocities, radius, L)
     
     # Increment step counter
     step += 1
@@ -62,22 +74,38 @@ while True:
     # Calculate and display temperature and pressure every 100 steps
     if step % 100 == 0:
         # Temperature: T = (1/2) * <v^2> in 2D (with k=1, m=1)
-        v_squared = vx**2 + vy**2
+        v_squared = np.einsum("ij,ij->i", velocities, velocities)
         T = (1 / (2 * N)) * np.sum(v_squared)
         
         # Pressure: P = momentum_transfer / (perimeter * time)
         time_elapsed = 100 * dt
         P = total_momentum_transfer / (4 * L * time_elapsed)
         
+        # Mean free path: distance travelled per collision, vs. 2D theory 1 / (√2 n d)
+        mean_speed = np.mean(np.sqrt(v_squared))
+        if total_collisions > 0:
+            mfp = mean_speed * time_elapsed * N / (2 * total_collisions)
+            mfp_text = f"{mfp:.4f}"
+        else:
+            mfp_text = "∞"
+        mfp_theory = L**2 / (np.sqrt(2) * N * 2 * radius) if radius > 0 else np.inf
+        
         # Update metrics display
-        metrics_placeholder.write(f"Temperature: {T:.4f} | Pressure: {P:.4f}")
+        metrics_placeholder.write(f"Temperature: {T:.4f} | Pressure: {P:.4f} | "
+                                  f"Mean free path: {mfp_text} (theory {mfp_theory:.4f})")
         
-        # Reset momentum transfer
+        # Reset momentum transfer and collision count
         total_momentum_transfer = 0
+        total_collisions = 0
     
-    # Create and update the Plotly scatter plot
+    if step % steps_per_frame:
+        continue
+    
+    # Create and update the Plotly scatter plot (WebGL for large N)
     fig = go.Figure()
-    fig.add_trace(go.Scatter(x=x, y=y, mode='markers', marker=dict(size=5)))
+    scatter = go.Scattergl if N > 1000 else go.Scatter
+    fig.add_trace(scatter(x=positions[:, 0], y=positions[:, 1], mode='markers',
+                          marker=dict(size=5 if N <= 1000 else 2)))
     fig.update_layout(
         xaxis_range=[0, L],
         yaxis_range=[0, L],
@@ -88,4 +116,6 @@ while True:
     plot_placeholder.plotly_chart(fig)
     
     # Control animation speed
-    time.sleep(0.05)
\ No newline at end of file
+    time.sleep(0.05)
+
+loop.show_status()
@@ -1,128 +1,116 @@
 import streamlit as st
 import numpy as np
+import time
 import matplotlib.pyplot as plt
 from matplotlib.patches import Circle
+from simulations.magnetic import (BiotSavart, helix, magnetic_field_of_wire, magnetic_field_of_loop,
+                                  magnetic_field_of_solenoid, magnetic_field_of_bar_magnet, normalize)
+from simulations.fieldlines import flux_seeds, trace_both_ways
+from simulations.integrators import boris_trajectories
 
-def magnetic_field_of_wire(x, y, z, current, wire_pos):
-    """Calculate magnetic field due to infinite straight wire at position wire_pos"""
-    r_vec = np.array([x - wire_pos[0], y - wire_pos[1], 0])
-    r = np.sqrt(r_vec[0]**2 + r_vec[1]**2)
-    
-    # Prevent division by zero
-    if r < 1e-10:
-        return np.array([0, 0, 0])
-    
-    # Direction: cross product of z unit vector with r_vec
-    direction = np.array([-r_vec[1], r_vec[0], 0]) / r
-    
-    # Magnitude: μ0 * I / (2π * r)
-    mu0 = 4 * np.pi * 1e-7  # magnetic permeability
-    magnitude = mu0 * current / (2 * np.pi * r)
-    
-    return magnitude * direction
+@st.cache_resource(max_entries=4)
+def wire_path_engine(kind, values, closed):
+    """
+    Biot–Savart engine for one wire geometry, kept across reruns.
 
-def magnetic_field_of_loop(x, y, z, current, loop_center, radius):
-    """Calculate magnetic field due to a circular current loop in the xy-plane"""
-    # Distance from the point to loop center
-    r_vec = np.array([x - loop_center[0], y - loop_center[1], z - loop_center[2]])
-    r = np.sqrt(r_vec[0]**2 + r_vec[1]**2 + r_vec[2]**2)
-    
-    # Prevent division by zero
-    if r < 1e-10:
-        return np.array([0, 0, 0])
-    
-    # On-axis field calculation (simplified)
-    mu0 = 4 * np.pi * 1e-7  # magnetic permeability
-    
-    if abs(r_vec[0]) < 1e-10 and abs(r_vec[1]) < 1e-10:
-        # On the z-axis
-        magnitude = mu0 * current * radius**2 / (2 * (radius**2 + r_vec[2]**2)**(3/2))
-        return np.array([0, 0, magnitude if r_vec[2] >= 0 else -magnitude])
-    
-    # For off-axis points, return a more approximate field (full calculation is complex)
-    # This is a simplification that gives reasonable visualization
-    z_component = mu0 * current * radius**2 / (2 * (radius**2 + r**2)**(3/2))
-    r_component = mu0 * current * radius**2 * r_vec[2] / (4 * r * (radius**2 + r**2)**(3/2))
-    
-    return np.array([
-        r_component * r_vec[0]/r,
-        r_component * r_vec[1]/r,
-        z_component
-    ])
+    The engine caches its unit-current field on the plotting grid, so
+    changing only the current rescales that field instead of recomputing it.
+    """
+    if kind == "Helix":
+        radius, length, turns = values
+        path = helix(radius, length, turns)
+    elif kind == "Rectangular coil":
+        width, height, turns, length = values
+        # Rectangular turns stacked along z, joined into one continuous wire
+        corners = np.array([[-1, -1], [1, -1], [1, 1], [-1, 1]]) * [width / 2, height / 2]
+        z = np.linspace(-length / 2, length / 2, 4 * turns + 1)
+        path = np.column_stack([np.tile(corners, (turns + 1, 1))[:len(z)], z])
+    else:
+        path = np.array(values, dtype=float)
+    return BiotSavart([path], closed=closed), path
 
-def magnetic_field_of_bar_magnet(x, y, z, magnet_center, magnet_length, magnet_strength):
-    """Calculate magnetic field due to a simple bar magnet (dipole approximation)"""
-    r_vec = np.array([x - magnet_center[0], y - magnet_center[1], z - magnet_center[2]])
-    r = np.sqrt(r_vec[0]**2 + r_vec[1]**2 + r_vec[2]**2)
-    
-    # Prevent division by zero
-    if r < 1e-10:
-        return np.array([0, 0, 0])
-    
-    # Dipole moment in the z-direction
-    m_vec = np.array([0, 0, magnet_strength * magnet_length])
-    
-    # Dipole field formula
-    mu0 = 4 * np.pi * 1e-7  # magnetic permeability
-    constant = mu0 / (4 * np.pi * r**5)
-    dot_product = np.dot(m_vec, r_vec)
-    
-    field = constant * (3 * r_vec * dot_product - r**2 * m_vec)
-    
-    return field
+def source_field(field_type, parameters, X, Y, Z):
+    """Magnetic field of the selected source at any arrays of points, in one call"""
+    if field_type == "Wire":
+        return magnetic_field_of_wire(X, Y, Z, parameters["current"], parameters["position"])
+    elif field_type == "Loop":
+        return magnetic_field_of_loop(X, Y, Z, parameters["current"], parameters["center"],
+                                      parameters["radius"], tabulated=parameters["tabulated"])
+    elif field_type == "Solenoid":
+        return magnetic_field_of_solenoid(X, Y, Z, parameters["current"], parameters["center"],
+                                          parameters["radius"], parameters["length"], parameters["turns"],
+                                          tabulated=parameters["tabulated"])
+    elif field_type == "Wire Path":
+        return parameters["engine"].field(np.stack(np.broadcast_arrays(X, Y, Z), axis=-1), parameters["current"])
+    elif field_type == "Bar Magnet":
+        return magnetic_field_of_bar_magnet(X, Y, Z, parameters["center"], parameters["length"],
+                                            parameters["strength"])
 
-def plot_magnetic_field(field_type, parameters):
-    """Generate the magnetic field plot"""
+def plot_magnetic_field(field_type, parameters, n=20, rendering="Traced field lines", num_lines=24):
+    """Generate the magnetic field plot, traced from seed points or streamed on an n × n grid"""
     fig, ax = plt.subplots(figsize=(10, 8))
     
-    # Create grid of points
-    n = 20
-    x = np.linspace(-5, 5, n)
-    y = np.linspace(-5, 5, n)
-    X, Y = np.meshgrid(x, y)
-    Z = np.zeros_like(X)  # Z=0 plane
-    
-    # Calculate field at each point
-    U = np.zeros_like(X)
-    V = np.zeros_like(Y)
-    W = np.zeros_like(Z)
-    
-    for i in range(n):
-        for j in range(n):
-            if field_type == "Wire":
-                field = magnetic_field_of_wire(
-                    X[i, j], Y[i, j], Z[i, j], 
-                    parameters["current"], 
-                    parameters["position"]
-                )
-            elif field_type == "Loop":
-                field = magnetic_field_of_loop(
-                    X[i, j], Y[i, j], Z[i, j], 
-                    parameters["current"], 
-                    parameters["center"], 
-                    parameters["radius"]
-                )
-            elif field_type == "Bar Magnet":
-                field = magnetic_field_of_bar_magnet(
-                    X[i, j], Y[i, j], Z[i, j], 
-                    parameters["center"], 
-                    parameters["length"], 
-                    parameters["strength"]
-                )
-            
-            # Normalize the field for better visualization
-            field_magnitude = np.sqrt(field[0]**2 + field[1]**2 + field[2]**2)
-            if field_magnitude > 0:
-                normalized_field = field / field_magnitude
-            else:
-                normalized_field = field
-            
-            U[i, j] = normalized_field[0]
-            V[i, j] = normalized_field[1]
-            W[i, j] = normalized_field[2]
+    # Plot either the Z=0 plane or the XZ plane through the source
+    side_view = parameters.get("plane") == "xz"
     
-    # Plot the magnetic field
-    ax.streamplot(X, Y, U, V, density=2, color='b', linewidth=1, arrowsize=1)
+    if rendering == "Streamplot (grid)":
+        # Create grid of points
+        x = np.linspace(-5, 5, n)
+        y = np.linspace(-5, 5, n)
+        X, Y = np.meshgrid(x, y)
+        if side_view:
+            field = source_field(field_type, parameters, X, parameters["center"][1], Y)
+        else:
+            field = source_field(field_type, parameters, X, Y, 0.0)  # Z=0 plane
+        
+        # Normalize the field for better visualization
+        normalized_field = normalize(field)
+        U = normalized_field[..., 0]
+        V = normalized_field[..., 2 if side_view else 1]
+        
+        # Plot the magnetic field
+        ax.streamplot(x, y, U, V, density=2, color='b', linewidth=1, arrowsize=1)
+    else:
+        def in_plane(points):
+            # In-plane field components at (N, 2) plot coordinates
+            if side_view:
+                field = source_field(field_type, parameters, points[:, 0], parameters["center"][1], points[:, 1])
+                return field[:, [0, 2]]
+            return source_field(field_type, parameters, points[:, 0], points[:, 1], 0.0)[:, :2]
+        
+        # Seed curves that every field line crosses, seeded by flux so line density follows |B|
+        cx, cy, cz = (parameters["position"] + [0.0]) if field_type == "Wire" else parameters["center"]
+        sinks = None
+        if field_type == "Wire":
+            seed_path = [[cx + 0.05, cy], [5.0, cy]]
+        elif side_view and field_type in ("Loop", "Solenoid"):
+            seed_path = [[cx - 0.9 * parameters["radius"], cz], [cx + 0.9 * parameters["radius"], cz]]
+        elif side_view and field_type == "Wire Path":
+            reach = np.abs(parameters["path"][:, 0]).max()
+            seed_path = [[-0.9 * reach, 0.0], [0.9 * reach, 0.0]]
+        else:
+            # A circle around the source catches fields that spread out from it
+            radius = {"Loop": 0.5 * parameters.get("radius", 1.0),
+                      "Solenoid": 0.5 * parameters.get("radius", 1.0),
+                      "Bar Magnet": max(0.5, parameters.get("length", 1.0) / 2)}.get(field_type, 1.0)
+            angle = np.linspace(0, 2 * np.pi, 129)
+            centre = (cx, cz) if side_view else (cx, cy)
+            seed_path = np.column_stack([centre[0] + radius * np.cos(angle), centre[1] + radius * np.sin(angle)])
+            # Lines end where they run into the source itself
+            sinks = [centre]
+        seeds = flux_seeds(in_plane, seed_path, num_lines)
+        lines, _ = trace_both_ways(in_plane, seeds, bounds=([-5, -5], [5, 5]), close_loops=True,
+                                   max_length=60.0, max_step=0.25, sinks=sinks)
+        
+        for line in lines:
+            ax.plot(line[:, 0], line[:, 1], 'b-', linewidth=1)
+            # One arrow in the middle of each line shows the field direction
+            if len(line) > 2:
+                m = len(line) // 2
+                ax.annotate('', xy=line[m + 1], xytext=line[m],
+                            arrowprops=dict(arrowstyle='->', color='b', lw=1))
+        if not lines:
+            ax.text(0, 0, 'The field has no component in this plane', ha='center')
     
     # Draw the source of the field
     if field_type == "Wire":
@@ -130,10 +118,31 @@ def plot_magnetic_field(field_type, parameters):
         ax.annotate('Current into page' if parameters["current"] > 0 else 'Current out of page', 
                   xy=(parameters["position"][0], parameters["position"][1]), 
                   xytext=(parameters["position"][0] + 0.5, parameters["position"][1] + 0.5))
-    elif field_type == "Loop":
+    elif field_type == "Wire Path":
+        path = parameters["path"]
+        ax.plot(path[:, 0], path[:, 2 if side_view else 1], 'r-', linewidth=1, alpha=0.6)
+    elif field_type == "Bar Magnet" and side_view:
+        # The dipole points along +z: north pole on top
+        half_length = parameters["length"] / 2
+        cx, _, cz = parameters["center"]
+        ax.plot([cx, cx], [cz - half_length, cz + half_length], 'r-', linewidth=4)
+        ax.text(cx + 0.15, cz - half_length - 0.2, 'S')
+        ax.text(cx + 0.15, cz + half_length + 0.1, 'N')
+    elif side_view:
+        # Cross-sections of the windings: current out of the page on one side, into it on the other
+        cx, _, cz = parameters["center"]
+        r = parameters["radius"]
+        turns = parameters.get("turns", 1)
+        length = parameters.get("length", 0.0)
+        zs = np.linspace(cz - length / 2, cz + length / 2, turns) if turns > 1 else [cz]
+        out_side, in_side = (cx - r, cx + r) if parameters["current"] > 0 else (cx + r, cx - r)
+        ax.plot(np.full(len(zs), out_side), zs, 'ro', markersize=max(2, 8 - turns // 10))
+        ax.plot(np.full(len(zs), in_side), zs, 'rx', markersize=max(2, 8 - turns // 10))
+        ax.annotate(f'{field_type} (side view)', xy=(cx, cz), xytext=(cx + r + 0.3, cz + 0.3))
+    elif field_type in ("Loop", "Solenoid"):
         circle = Circle(parameters["center"][:2], parameters["radius"], fill=False, color='r')
         ax.add_patch(circle)
-        ax.annotate('Current loop', 
+        ax.annotate('Current loop' if field_type == "Loop" else 'Solenoid', 
                   xy=(parameters["center"][0], parameters["center"][1]), 
                   xytext=(parameters["center"][0] + 0.5, parameters["center"][1] + 0.5))
     elif field_type == "Bar Magnet":
@@ -146,13 +155,83 @@ def plot_magnetic_field(field_type, parameters):
     ax.set_xlim(-5, 5)
     ax.set_ylim(-5, 5)
     ax.set_xlabel('X')
-    ax.set_ylabel('Y')
+    ax.set_ylabel('Z' if side_view else 'Y')
     ax.set_title(f'Magnetic Field of {field_type}')
     ax.grid(True)
     ax.set_aspect('equal')
     
     return fig
 
+# Charge-to-mass ratios (C/kg)
+PARTICLES = {"Proton": 9.578833e7, "Electron": -1.758820e11}
+
+def push_particles(field_type, parameters, settings):
+    """
+    Launch a bunch of charged particles near the source and push them with the Boris scheme.
+
+    Times and speeds are scaled to the field B₀ at the launch point: one step is 1/24 of a
+    gyration period there, and the speed is set by the requested gyroradius.
+    """
+    rng = np.random.default_rng(0)
+    n = settings["count"]
+    q_over_m = PARTICLES[settings["particle"]]
+    launch = np.array(settings["launch"], dtype=float)
+    
+    def magnetic(points):
+        return source_field(field_type, parameters, points[:, 0], points[:, 1], points[:, 2])
+    
+    B_launch = magnetic(launch[None])[0]
+    B0 = np.linalg.norm(B_launch)
+    if B0 == 0:
+        return None
+    omega = abs(q_over_m) * B0
+    speed = settings["gyroradius"] * omega
+    dt = 2 * np.pi / omega / 24
+    
+    # Small cloud around the launch point, with pitch angles to the local field in the chosen range
+    positions = launch + rng.normal(0.0, 0.02, (n, 3))
+    b = B_launch / B0
+    e1 = np.cross(b, [0.0, 0.0, 1.0] if abs(b[2]) < 0.9 else [1.0, 0.0, 0.0])
+    e1 /= np.linalg.norm(e1)
+    e2 = np.cross(b, e1)
+    pitch = np.radians(rng.uniform(*settings["pitch"], n))
+    phase = rng.uniform(0, 2 * np.pi, n)
+    velocities = speed * (np.cos(pitch)[:, None] * b + np.sin(pitch)[:, None]
+                          * (np.cos(phase)[:, None] * e1 + np.sin(phase)[:, None] * e2))
+    speeds = np.linalg.norm(velocities, axis=1)
+    
+    # Uniform electric field along y, in units of v B₀ (the E×B drift speed is E / B)
+    E = np.array([0.0, settings["E"] * speed * B0, 0.0])
+    field_fn = lambda points: (E, magnetic(points))
+    
+    steps = 24 * settings["periods"]
+    paths, alive = boris_trajectories(positions, velocities, field_fn, q_over_m, dt, steps,
+                                      record_every=4, num_recorded=min(n, 100),
+                                      bounds=([-5, -5, -5], [5, 5, 5]), max_field=50 * B0)
+    energy_change = np.abs(np.linalg.norm(velocities[alive], axis=1) / speeds[alive] - 1)
+    return {"paths": paths, "alive": alive, "speed": speed, "time": steps * dt, "steps": steps,
+            "drift": (positions[alive] - launch).mean(axis=0) / (steps * dt * speed) if alive.any() else None,
+            "energy_change": energy_change.max() if alive.any() else 0.0}
+
+def plot_particles(result, parameters, field_type):
+    """Side and top projections of the recorded particle paths"""
+    fig, axes = plt.subplots(1, 2, figsize=(12, 6))
+    paths = result["paths"]
+    for ax, (i, j, title) in zip(axes, [(0, 2, "Side view (XZ)"), (0, 1, "Top view (XY)")]):
+        ax.plot(paths[:, :, i], paths[:, :, j], linewidth=0.6, alpha=0.7)
+        ax.plot(paths[0, :, i], paths[0, :, j], 'k.', markersize=3)
+        centre = parameters.get("center", parameters.get("position", [0.0, 0.0]) + [0.0])
+        ax.plot(centre[i], centre[j], 'r*', markersize=12)
+        ax.set_xlim(-5, 5)
+        ax.set_ylim(-5, 5)
+        ax.set_aspect('equal')
+        ax.set_xlabel('XYZ'[i])
+        ax.set_ylabel('XYZ'[j])
+        ax.set_title(title)
+        ax.grid(True)
+    fig.suptitle(f'Charged particles in the field of the {field_type.lower()}')
+    return fig
+
 def main():
     st.title("Magnetic Field Visualization")
     st.write("""
@@ -166,7 +245,7 @@ def main():
     # Select field type
     field_type = st.sidebar.selectbox(
         "Select a magnetic field source:",
-        ["Wire", "Loop", "Bar Magnet"]
+        ["Wire", "Loop", "Solenoid", "Wire Path", "Bar Magnet"]
     )
     
     # Parameters based on field type
@@ -210,7 +289,81 @@ def main():
         - Near the center of the loop, the field lines are nearly parallel
         - Far from the loop, the field approximates that of a dipole
         
-        This is the basic principle behind electromagnets and solenoids.
+        This is the basic principle behind electromagnets and solenoids. The field is computed exactly
+        with complete elliptic integrals; the side view shows the plane through the loop's axis.
+        """)
+        
+    elif field_type == "Solenoid":
+        current = st.sidebar.slider("Current (A)", -10.0, 10.0, 5.0)
+        coil_x = st.sidebar.slider("Coil Center X", -3.0, 3.0, 0.0)
+        coil_y = st.sidebar.slider("Coil Center Y", -3.0, 3.0, 0.0)
+        coil_z = st.sidebar.slider("Coil Center Z", -3.0, 3.0, 0.0)
+        radius = st.sidebar.slider("Coil Radius", 0.5, 3.0, 1.0)
+        length = st.sidebar.slider("Coil Length", 0.5, 8.0, 4.0)
+        turns = st.sidebar.slider("Number of Turns", 2, 500, 200)
+        
+        parameters = {
+            "current": current,
+            "center": [coil_x, coil_y, coil_z],
+            "radius": radius,
+            "length": length,
+            "turns": turns
+        }
+        
+        st.write("""
+        ### Solenoid
+        
+        A solenoid is a coil of many current loops stacked along an axis.
+        - Inside a long solenoid the field is nearly uniform: B ≈ μ₀ × (N / L) × I
+        - Outside, the field is weak and resembles that of a bar magnet
+        
+        The field is the sum of the exact fields of every turn.
+        """)
+        
+    elif field_type == "Wire Path":
+        current = st.sidebar.slider("Current (A)", -10.0, 10.0, 5.0)
+        kind = st.sidebar.selectbox("Path", ["Helix", "Rectangular coil", "Uploaded path"])
+        closed = False
+        if kind == "Helix":
+            values = (st.sidebar.slider("Helix Radius", 0.5, 3.0, 1.0),
+                      st.sidebar.slider("Helix Length", 0.5, 8.0, 4.0),
+                      st.sidebar.slider("Number of Turns", 1, 100, 10))
+        elif kind == "Rectangular coil":
+            values = (st.sidebar.slider("Coil Width", 0.5, 6.0, 2.0),
+                      st.sidebar.slider("Coil Height", 0.5, 6.0, 1.0),
+                      st.sidebar.slider("Number of Turns", 1, 100, 5),
+                      st.sidebar.slider("Coil Length", 0.1, 8.0, 2.0))
+        else:
+            uploaded = st.sidebar.file_uploader("Vertices (CSV rows: x, y, z)", type=["csv", "txt"])
+            closed = st.sidebar.checkbox("Closed path", value=True)
+            if uploaded is None:
+                st.info("Upload a CSV file with one `x, y, z` vertex per row to compute its field.")
+                st.stop()
+            try:
+                vertices = np.loadtxt(uploaded, delimiter=",", ndmin=2)
+                if vertices.shape[1] != 3 or len(vertices) < 2:
+                    raise ValueError
+            except ValueError:
+                st.error("The path must have at least two rows of three comma-separated numbers.")
+                st.stop()
+            values = tuple(map(tuple, vertices))
+        
+        engine, path = wire_path_engine(kind, values, closed)
+        parameters = {
+            "current": current,
+            "center": [0.0, 0.0, 0.0],
+            "engine": engine,
+            "path": path
+        }
+        
+        st.write(f"""
+        ### Arbitrary Wire Path
+        
+        Any conductor can be approximated by a chain of straight segments. The field of each
+        straight segment is known exactly, so the Biot–Savart law becomes a sum over segments
+        (here {engine.num_segments} of them).
+        - The field is linear in the current: changing only the current rescales the stored field
+        - Far from the wire, a closed coil again looks like a magnetic dipole
         """)
         
     elif field_type == "Bar Magnet":
@@ -236,9 +389,82 @@ def main():
         This simulation uses a simplified dipole approximation.
         """)
     
+    if field_type in ("Loop", "Solenoid", "Wire Path", "Bar Magnet"):
+        views = ["Side view (XZ plane)", "Top view (Z=0 plane)"]
+        parameters["plane"] = "xz" if st.sidebar.radio("View", views) == views[0] else "xy"
+    if field_type in ("Loop", "Solenoid"):
+        # The table is built once per coil shape and then reused for every render
+        parameters["tabulated"] = st.sidebar.checkbox("Use cached lookup table", value=field_type == "Solenoid",
+                                                      help="Interpolate a precomputed (ρ/a, z/a) table "
+                                                           "instead of evaluating every turn at every point")
+    
+    # Field lines are traced against the field itself; the streamplot samples it on a grid
+    rendering = st.sidebar.radio("Rendering", ["Traced field lines", "Streamplot (grid)"])
+    resolution = num_lines = None
+    if rendering == "Traced field lines":
+        num_lines = st.sidebar.slider("Number of Field Lines", 4, 100, 24)
+    else:
+        resolution = st.sidebar.select_slider("Grid Resolution", options=[20, 50, 100, 200, 500], value=100)
+        if field_type == "Solenoid" and not parameters["tabulated"] and parameters["turns"] * resolution**2 > 10**7:
+            st.warning("Evaluating every turn at every grid point is slow at this resolution; "
+                       "try the cached lookup table.")
+    
     # Generate and display plot
-    fig = plot_magnetic_field(field_type, parameters)
+    fig = plot_magnetic_field(field_type, parameters, n=resolution, rendering=rendering, num_lines=num_lines)
     st.pyplot(fig)
+    plt.close(fig)
+    
+    # Charged particles pushed through the same field
+    st.sidebar.header("Charged Particles")
+    if st.sidebar.checkbox("Launch charged particles"):
+        particle_parameters = dict(parameters)
+        if field_type in ("Loop", "Solenoid"):
+            # Every step evaluates the field at every particle, so always use the lookup table
+            particle_parameters["tabulated"] = True
+        # A wire path sums every segment for every particle at every step, so keep its bunch small
+        counts = [10, 100] if field_type == "Wire Path" else [100, 1000, 10000, 100000]
+        origin = parameters["position"] + [0.0] if field_type == "Wire" else parameters["center"]
+        default_offset = 1.5 if field_type == "Wire" else 2.0
+        settings = {
+            "particle": st.sidebar.selectbox("Particle", list(PARTICLES)),
+            "count": st.sidebar.select_slider("Number of Particles", options=counts, value=min(counts[-1], 1000)),
+            "launch": [origin[0] + st.sidebar.slider("Launch Offset X", -4.0, 4.0, default_offset),
+                       origin[1],
+                       origin[2] + st.sidebar.slider("Launch Offset Z", -4.0, 4.0, 0.0)],
+            "gyroradius": st.sidebar.slider("Gyroradius at Launch", 0.01, 0.5, 0.05),
+            "pitch": st.sidebar.slider("Pitch Angle Range (°)", 0.0, 90.0, (30.0, 90.0)),
+            "E": st.sidebar.slider("Uniform Eᵧ (units of v·B₀)", -1.0, 1.0, 0.0),
+            "periods": st.sidebar.slider("Gyration Periods", 5, 200, 40),
+        }
+        
+        start = time.perf_counter()
+        result = push_particles(field_type, particle_parameters, settings)
+        elapsed = time.perf_counter() - start
+        if result is None:
+            st.warning("The field vanishes at the launch point; move it away from the source.")
+        else:
+            st.subheader("Charged Particle Motion")
+            fig = plot_particles(result, parameters, field_type)
+            st.pyplot(fig)
+            plt.close(fig)
+            
+            alive = result["alive"]
+            st.write(f"Pushed {len(alive)} particles for {result['steps']} Boris steps in {elapsed:.2f} s "
+                     f"({result['time']:.3g} s of motion). {alive.mean():.0%} are still moving; the rest left "
+                     f"the box or hit the source.")
+            if result["drift"] is not None:
+                drift = result["drift"]
+                st.write(f"Mean drift velocity: ({drift[0]:+.3f}, {drift[1]:+.3f}, {drift[2]:+.3f}) × v.")
+            if settings["E"] == 0:
+                st.write(f"Largest change in particle speed: {result['energy_change']:.1e} "
+                         "(the Boris rotation conserves kinetic energy in a pure magnetic field).")
+            st.write("""
+            - **Gyration**: particles circle the field lines with the gyroradius r = m v⊥ / (|q| B).
+            - **Magnetic mirror**: in the dipole, particles with large pitch angles bounce between regions of
+              strong field near the poles, as in Earth's radiation belts; small pitch angles escape (the loss cone).
+            - **Drifts**: around a wire the field gradient and curvature make particles drift along the wire;
+              a uniform electric field adds the E×B drift, E / B, perpendicular to both fields.
+            """)
     
     # Additional explanations
     st.write("""
@@ -251,7 +477,7 @@ def main():
     - The density of field lines indicates the strength of the field
     - The direction of the field is determined by the right-hand rule
     
-    The visualization shows a 2D slice (Z=0 plane) of the magnetic field, with arrows indicating the field direction.
+    The visualization shows a 2D slice (the Z=0 plane, or optionally the XZ plane through the source) of the magnetic field, with arrows indicating the field direction. Traced lines start on a curve crossing the field, spaced so that each carries the same flux, so their density follows the field strength within the slice.
     """)
 
 if __name__ == "__main__":
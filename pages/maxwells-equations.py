@@ -2,6 +2,7 @@ import streamlit as st
 import numpy as np
 import matplotlib.pyplot as plt
 import time
+from simulations.fdtd import YeeGrid2D, continuous_wave, gaussian_pulse
 
 st.title("Visualizing Maxwell's Equations")
 st.write("An illustrative visualization of fundamental concepts related to Maxwell's Equations.")
@@ -9,79 +10,180 @@ st.write("An illustrative visualization of fundamental concepts related to Maxwe
 equation_choice = st.selectbox("Choose a Maxwell's Equation Concept to Visualize:",
                                  ["Electric Field of a Point Charge (Gauss's Law for Electricity)",
                                   "Magnetic Field of a Current-Carrying Wire (Ampere's Law)",
-                                  "Electromagnetic Plane Wave (Faraday's & Ampere-Maxwell - Simplified)"])
+                                  "Electromagnetic Waves (Faraday's & Ampere-Maxwell - FDTD)"])
 
 # --- Visualization Functions ---
 
-def electric_field_point_charge(charge_pos_x, charge_pos_y, charge_magnitude, grid_size):
-    """Visualizes the electric field of a point charge."""
-    x = np.linspace(-grid_size, grid_size, 30)
-    y = np.linspace(-grid_size, grid_size, 30)
+def electric_field_point_charge(charges, grid_size, resolution=30):
+    """
+    Electric field of any number of point charges, evaluated over the whole grid at once.
+
+    Parameters:
+    - charges: Iterable of (x, y, q) tuples
+    - grid_size: Half-width of the square grid
+    - resolution: Number of grid points per side
+
+    Returns:
+    - X, Y: Grid coordinates
+    - Ex, Ey: Field components (constants ignored for visualization)
+    """
+    x = np.linspace(-grid_size, grid_size, resolution)
+    y = np.linspace(-grid_size, grid_size, resolution)
     X, Y = np.meshgrid(x, y)
 
     Ex = np.zeros_like(X)
     Ey = np.zeros_like(Y)
+    scale = np.empty_like(X)
 
-    for i in range(X.shape[0]):
-        for j in range(X.shape[1]):
-            r_vec = np.array([X[i, j] - charge_pos_x, Y[i, j] - charge_pos_y])
-            r_mag = np.linalg.norm(r_vec)
-            if r_mag > 0.1:  # Avoid singularity at charge location
-                E_direction = r_vec / r_mag
-                E_magnitude = charge_magnitude / (r_mag**2) #Simplified formula, ignoring constants for visualization
-                Ex[i, j] = E_magnitude * E_direction[0]
-                Ey[i, j] = E_magnitude * E_direction[1]
+    # One broadcast pass per charge keeps memory at a few grid-sized arrays
+    for charge_x, charge_y, charge_magnitude in charges:
+        dx = X - charge_x
+        dy = Y - charge_y
+        r2 = dx**2 + dy**2
+        # E = q r / |r|^3, left at 0 within 0.1 of the charge to avoid the singularity
+        scale.fill(0.0)
+        np.divide(charge_magnitude, r2 * np.sqrt(r2), out=scale, where=r2 > 0.01)
+        Ex += scale * dx
+        Ey += scale * dy
 
     return X, Y, Ex, Ey
 
-def magnetic_field_wire(wire_pos_x, wire_pos_y, current_magnitude, grid_size):
-    """Visualizes the magnetic field around a long straight wire."""
-    x = np.linspace(-grid_size, grid_size, 30)
-    y = np.linspace(-grid_size, grid_size, 30)
+def magnetic_field_wire(wires, grid_size, resolution=30):
+    """
+    Magnetic field of any number of long straight wires along z, evaluated over the whole grid at once.
+
+    Parameters:
+    - wires: Iterable of (x, y, current) tuples, positive current out of the plane
+    - grid_size: Half-width of the square grid
+    - resolution: Number of grid points per side
+
+    Returns:
+    - X, Y: Grid coordinates
+    - Bx, By, Bz: Field components (Bz is 0 in the plane; constants ignored)
+    """
+    x = np.linspace(-grid_size, grid_size, resolution)
+    y = np.linspace(-grid_size, grid_size, resolution)
     X, Y = np.meshgrid(x, y)
 
     Bx = np.zeros_like(X)
     By = np.zeros_like(Y)
-    Bz = np.zeros_like(X) # Magnetic field in the Z direction (out of plane)
-
-    for i in range(X.shape[0]):
-        for j in range(X.shape[1]):
-            r_vec = np.array([X[i, j] - wire_pos_x, Y[i, j] - wire_pos_y])
-            r_mag = np.linalg.norm(r_vec)
-            if r_mag > 0.1: # Avoid singularity at wire location
-                B_direction = np.array([-r_vec[1], r_vec[0]]) / r_mag # Tangential direction (right-hand rule)
-                B_magnitude = current_magnitude / r_mag # Simplified, ignoring constants
-                Bx[i, j] = B_magnitude * B_direction[0]
-                By[i, j] = B_magnitude * B_direction[1]
-                Bz[i,j] = 0 # for 2D visualization, assume B is in xy plane
+    Bz = np.zeros_like(X)
+    scale = np.empty_like(X)
+
+    for wire_x, wire_y, current_magnitude in wires:
+        dx = X - wire_x
+        dy = Y - wire_y
+        r2 = dx**2 + dy**2
+        # B = I (-dy, dx) / |r|^2, tangential by the right-hand rule
+        scale.fill(0.0)
+        np.divide(current_magnitude, r2, out=scale, where=r2 > 0.01)
+        Bx -= scale * dy
+        By += scale * dx
 
     return X, Y, Bx, By, Bz
 
-def electromagnetic_plane_wave(time_step, grid_size, wave_direction):
-    """Illustrative plane EM wave propagation (simplified)."""
-    x = np.linspace(-grid_size, grid_size, 30)
-    y = np.linspace(-grid_size, grid_size, 30)
-    X, Y = np.meshgrid(x, y)
-    t = time_step
+def plot_source_field(X, Y, U, V, sources, color, marker, title, field_label, source_label):
+    """
+    Draws a source field as arrows, over a log-magnitude map on fine grids.
+
+    At most ~30 arrows per side are drawn, so the figure stays readable
+    (and fast) however many points the field was evaluated on.
+
+    Returns:
+    - fig: Matplotlib figure
+    """
+    stride = max(1, X.shape[0] // 30)
+    fig, ax = plt.subplots()
+    if X.shape[0] > 30:
+        magnitude = np.hypot(U, V)
+        image = ax.imshow(np.log10(np.maximum(magnitude, 1e-6)), origin='lower', cmap='Greys',
+                          extent=(X.min(), X.max(), Y.min(), Y.max()))
+        fig.colorbar(image, ax=ax, label=f"log10 |{field_label}|")
+    ax.quiver(X[::stride, ::stride], Y[::stride, ::stride], U[::stride, ::stride], V[::stride, ::stride],
+              color=color, label=f"{title.split(' of ')[0]} ({field_label})")
+    for k, (sx, sy, _) in enumerate(sources):
+        ax.plot(sx, sy, marker, markersize=10, label=source_label if k == 0 else None)
+    ax.set_title(title)
+    ax.set_xlabel("x")
+    ax.set_ylabel("y")
+    ax.axis('equal')
+    ax.legend()
+    return fig
+
+def benchmark_render(field_fn, sources, grid_size, resolutions=(30, 300, 3000)):
+    """
+    Times field evaluation and figure rendering at several grid resolutions.
+
+    Parameters:
+    - field_fn: electric_field_point_charge or magnetic_field_wire
+    - sources: Charges or wires passed to field_fn
+    - grid_size: Half-width of the grid
+    - resolutions: Grid points per side to time
 
-    # Simplified Plane Wave along x-axis for illustration
-    if wave_direction == "x":
-        Ex = np.sin(X - t)
-        Ey = np.zeros_like(X)
-        Ez = np.zeros_like(X)
-        Bx = np.zeros_like(X)
-        By = np.zeros_like(X)
-        Bz = np.sin(X - t) # B field perpendicular to E and propagation direction (along z)
-    elif wave_direction == "y":
-        Ex = np.zeros_like(X)
-        Ey = np.sin(Y - t)
-        Ez = np.zeros_like(X)
-        Bx = np.sin(Y - t) # B perpendicular to E and prop. direction (along x)
-        By = np.zeros_like(X)
-        Bz = np.zeros_like(X)
+    Returns:
+    - rows: List of dicts with the timings in milliseconds
+    """
+    rows = []
+    for resolution in resolutions:
+        start = time.perf_counter()
+        X, Y, U, V = field_fn(sources, grid_size, resolution)[:4]
+        evaluated = time.perf_counter()
+        fig = plot_source_field(X, Y, U, V, sources, 'r', 'ko', "Benchmark", "F", "Source")
+        fig.canvas.draw()
+        plt.close(fig)
+        rendered = time.perf_counter()
+        rows.append({"Grid points": f"{resolution}²", "Field (ms)": 1e3 * (evaluated - start),
+                     "Render (ms)": 1e3 * (rendered - evaluated), "Total (ms)": 1e3 * (rendered - start)})
+    return rows
 
+def source_table(label, value_name, key):
+    """Editable table of sources; returns a list of (x, y, value) tuples."""
+    table = st.data_editor([{"x": 0.0, "y": 0.0, value_name: 1.0}], num_rows="dynamic", key=key,
+                           column_config={"x": st.column_config.NumberColumn("x", min_value=-15.0, max_value=15.0),
+                                          "y": st.column_config.NumberColumn("y", min_value=-15.0, max_value=15.0)})
+    st.caption(f"Add a row per {label}.")
+    return [(row["x"], row["y"], row[value_name]) for row in table
+            if all(row.get(k) is not None for k in ("x", "y", value_name))]
 
-    return X, Y, Ex, Ey, Ez, Bx, By, Bz
+def build_wave_solver(size, polarization, source, waveform, wavelength, dielectric, eps_r, pml):
+    """
+    Sets up a Yee-grid FDTD solver with sources and a dielectric region.
+
+    Parameters:
+    - size: Number of grid nodes per side
+    - polarization: "TM" (Ez, Hx, Hy) or "TE" (Hz, Ex, Ey)
+    - source: "Line source (plane wave)", "Point source" or "Two point sources"
+    - waveform: "Continuous" or "Gaussian pulse"
+    - wavelength: Vacuum wavelength in cells (also sets the pulse duration)
+    - dielectric: "None", "Slab", "Disk (lens)" or "Half-space"
+    - eps_r: Relative permittivity of the dielectric
+    - pml: Thickness of the absorbing layers in cells
+
+    Returns:
+    - solver: YeeGrid2D ready to step
+    """
+    y, x = np.mgrid[0:size, 0:size]
+    if dielectric == "Slab":
+        inside = (x > 0.55 * size) & (x < 0.7 * size)
+    elif dielectric == "Disk (lens)":
+        inside = (x - 0.6 * size)**2 + (y - 0.5 * size)**2 < (0.15 * size)**2
+    elif dielectric == "Half-space":
+        inside = x > 0.6 * size
+    else:
+        inside = np.zeros((size, size), dtype=bool)
+    solver = YeeGrid2D((size, size), mode=polarization, eps_r=np.where(inside, eps_r, 1.0), pml=pml)
+
+    wave = continuous_wave(wavelength) if waveform == "Continuous" else gaussian_pulse(wavelength / 4)
+    x0 = pml + 10
+    if source == "Line source (plane wave)":
+        solver.add_source((slice(1, size - 1), x0), wave)
+    elif source == "Point source":
+        solver.add_source((size // 2, x0 + size // 10), wave)
+    else:
+        # Two in-phase sources three wavelengths apart
+        for offset in (-1.5 * wavelength, 1.5 * wavelength):
+            solver.add_source((int(size // 2 + offset), x0 + size // 10), wave)
+    return solver
 
 
 # --- Streamlit UI based on equation choice ---
@@ -89,57 +191,106 @@ def electromagnetic_plane_wave(time_step, grid_size, wave_direction):
 st.subheader("Visualization Parameters")
 
 if equation_choice == "Electric Field of a Point Charge (Gauss's Law for Electricity)":
-    charge_pos_x = st.slider("Charge Position X", -5.0, 5.0, 0.0)
-    charge_pos_y = st.slider("Charge Position Y", -5.0, 5.0, 0.0)
-    charge_magnitude = st.slider("Charge Magnitude", -5.0, 5.0, 1.0)
+    charges = source_table("charge", "q", "charges")
     grid_size = st.slider("Grid Size", 5, 15, 10)
+    resolution = st.select_slider("Grid Points per Side", options=[30, 100, 300, 1000, 3000], value=30)
 
-    X, Y, Ex, Ey = electric_field_point_charge(charge_pos_x, charge_pos_y, charge_magnitude, grid_size)
+    start = time.perf_counter()
+    X, Y, Ex, Ey = electric_field_point_charge(charges, grid_size, resolution)
+    elapsed = time.perf_counter() - start
 
-    fig, ax = plt.subplots()
-    q = ax.quiver(X, Y, Ex, Ey, color='r', label='Electric Field (E)')
-    ax.plot(charge_pos_x, charge_pos_y, 'ro', markersize=10, label='Point Charge')
-    ax.set_title("Electric Field of a Point Charge")
-    ax.set_xlabel("x")
-    ax.set_ylabel("y")
-    ax.axis('equal')
-    ax.legend()
+    fig = plot_source_field(X, Y, Ex, Ey, charges, 'r', 'ro', "Electric Field of Point Charges", "E", "Point Charge")
     st.pyplot(fig)
+    plt.close(fig)
+    st.caption(f"Field evaluated on {resolution}² points for {len(charges)} charge(s) in {1e3 * elapsed:.1f} ms")
+
+    if st.button("Benchmark 30², 300² and 3000²"):
+        st.table(benchmark_render(electric_field_point_charge, charges, grid_size))
 
 elif equation_choice == "Magnetic Field of a Current-Carrying Wire (Ampere's Law)":
-    wire_pos_x = st.slider("Wire Position X", -5.0, 5.0, 0.0)
-    wire_pos_y = st.slider("Wire Position Y", -5.0, 5.0, 0.0)
-    current_magnitude = st.slider("Current Magnitude (out of plane)", -5.0, 5.0, 1.0)
+    wires = source_table("wire (positive current out of the plane)", "current", "wires")
     grid_size = st.slider("Grid Size", 5, 15, 10)
+    resolution = st.select_slider("Grid Points per Side", options=[30, 100, 300, 1000, 3000], value=30)
 
-    X, Y, Bx, By, Bz = magnetic_field_wire(wire_pos_x, wire_pos_y, current_magnitude, grid_size)
+    start = time.perf_counter()
+    X, Y, Bx, By, Bz = magnetic_field_wire(wires, grid_size, resolution)
+    elapsed = time.perf_counter() - start
 
-    fig, ax = plt.subplots()
-    q = ax.quiver(X, Y, Bx, By, color='b', label='Magnetic Field (B)')
-    ax.plot(wire_pos_x, wire_pos_y, 'ko', markersize=10, label='Wire (Current out of plane)')
-    ax.set_title("Magnetic Field of a Current-Carrying Wire")
-    ax.set_xlabel("x")
-    ax.set_ylabel("y")
-    ax.axis('equal')
-    ax.legend()
+    fig = plot_source_field(X, Y, Bx, By, wires, 'b', 'ko', "Magnetic Field of Current-Carrying Wires", "B",
+                            "Wire (Current out of plane)")
     st.pyplot(fig)
+    plt.close(fig)
+    st.caption(f"Field evaluated on {resolution}² points for {len(wires)} wire(s) in {1e3 * elapsed:.1f} ms")
 
-elif equation_choice == "Electromagnetic Plane Wave (Faraday's & Ampere-Maxwell - Simplified)":
-    wave_direction = st.selectbox("Wave Propagation Direction", ["x", "y"])
-    grid_size = st.slider("Grid Size", 5, 15, 10)
+    if st.button("Benchmark 30², 300² and 3000²"):
+        st.table(benchmark_render(magnetic_field_wire, wires, grid_size))
+
+elif equation_choice == "Electromagnetic Waves (Faraday's & Ampere-Maxwell - FDTD)":
+    st.markdown(r"""
+    Maxwell's curl equations are stepped in time on a staggered Yee grid (finite-difference
+    time-domain, units with $c = 1$ and a cell size of 1):
+
+    $$\frac{\partial \mathbf{H}}{\partial t} = -\nabla \times \mathbf{E}, \qquad
+    \varepsilon_r \frac{\partial \mathbf{E}}{\partial t} = \nabla \times \mathbf{H}$$
+
+    In TM polarization the field out of the plane is $E_z$; in TE it is $H_z$. Absorbing
+    (PML) layers around the edges let the waves leave the domain without reflecting.
+    """)
+    polarization = st.radio("Polarization", ["TM", "TE"], horizontal=True)
+    size = st.select_slider("Grid Size (cells per side)", options=[200, 300, 500, 1000, 2000], value=300)
+    source = st.selectbox("Source", ["Line source (plane wave)", "Point source", "Two point sources"])
+    waveform = st.selectbox("Waveform", ["Continuous", "Gaussian pulse"])
+    wavelength = st.slider("Wavelength (cells)", 10, 60, 25)
+    dielectric = st.selectbox("Dielectric Region", ["None", "Slab", "Disk (lens)", "Half-space"])
+    eps_r = st.slider("Relative Permittivity (εr)", 1.0, 12.0, 4.0, step=0.5)
+    pml = st.slider("PML Thickness (cells)", 8, 40, 20)
+    steps_per_frame = st.slider("Steps per Frame", 1, 50, 10)
+    frames = st.slider("Frames per Run", 1, 200, 30)
+
+    # Keep the solver across reruns until the setup changes, so runs continue
+    params = (size, polarization, source, waveform, wavelength, dielectric, eps_r, pml)
+    reset = st.button("Reset")
+    if st.session_state.get("fdtd_params") != params or reset:
+        st.session_state.fdtd_solver = build_wave_solver(*params)
+        st.session_state.fdtd_params = params
+    solver = st.session_state.fdtd_solver
+
+    run = st.button("Run")
+    plot_placeholder = st.empty()
+    metrics_placeholder = st.empty()
+
+    # Draw at most ~500 pixels per side; the solver still runs on the full grid
+    stride = max(1, size // 500)
+    label = "E_z" if polarization == "TM" else "H_z"
+    fig, ax = plt.subplots()
+    image = ax.imshow(solver.field[::stride, ::stride], cmap='RdBu_r', origin='lower',
+                      extent=(0, size, 0, size), vmin=-1.0, vmax=1.0)
+    if dielectric != "None":
+        ax.contour(solver.eps_r, levels=[(1 + eps_r) / 2], colors='k', linewidths=1,
+                   extent=(0, size, 0, size))
+    ax.add_patch(plt.Rectangle((pml, pml), size - 2 * pml, size - 2 * pml, fill=False,
+                               linestyle='--', color='gray'))
+    ax.set_xlabel("x (cells)")
+    ax.set_ylabel("y (cells)")
+    fig.colorbar(image, ax=ax, label=f"${label}$")
+
+    def show(rate=None):
+        field = solver.field[::stride, ::stride]
+        scale = max(float(np.percentile(np.abs(field), 99.5)), 1e-6)
+        image.set_data(field)
+        image.set_clim(-scale, scale)
+        ax.set_title(f"${label}$ at t = {solver.time:.1f} ({solver.steps} steps)")
+        plot_placeholder.pyplot(fig)
+        text = f"dt = {solver.dt:.3f} (Courant limit) · energy {solver.energy():.4g}"
+        if rate is not None:
+            text += f" · {rate:.0f} updates/s on {size}×{size}"
+        metrics_placeholder.write(text)
+
+    show()
+    if run:
+        for frame in range(frames):
+            start = time.perf_counter()
+            solver.step(steps_per_frame)
+            show(steps_per_frame / (time.perf_counter() - start))
 
-    placeholder = st.empty() # For animation
-
-    for t in range(0, 100): # Animation loop
-        X, Y, Ex, Ey, Ez, Bx, By, Bz = electromagnetic_plane_wave(t * 0.1, grid_size, wave_direction) # Time step
-        fig, ax = plt.subplots()
-        q_e = ax.quiver(X[::2, ::2], Y[::2, ::2], Ex[::2, ::2], Ey[::2, ::2], color='r', label='Electric Field (E)', scale=50) # Subsample for clarity
-        q_b = ax.quiver(X[::2, ::2], Y[::2, ::2], Bx[::2, ::2], By[::2, ::2], color='b', label='Magnetic Field (B)', scale=50) # Subsample
-        ax.set_title("Electromagnetic Plane Wave Propagation")
-        ax.set_xlabel("x")
-        ax.set_ylabel("y")
-        ax.axis('equal')
-        ax.legend()
-        placeholder.pyplot(fig) # Update plot in placeholder
-        time.sleep(0.1) # Control animation speed
-        plt.close(fig) # Clear figure for next frame
\ No newline at end of file
+    plt.close(fig)
@@ -2,33 +2,117 @@ import streamlit as st
 import numpy as np
 import matplotlib.pyplot as plt
 import time
+from simulations.gas import fold_1d
+from simulations.histogram import HistogramAccumulator
 
 # Streamlit app title
 st.title("1D Ideal Gas Simulation for Statistical Mechanics")
 
 # Sidebar for parameters
 st.sidebar.header("Simulation Parameters")
-N = st.sidebar.slider("Number of particles", 10, 500, 100, step=10)
+mode = st.sidebar.radio("Mode", ["Animate step by step", "Jump to time t"])
+if mode == "Jump to time t":
+    N = st.sidebar.select_slider("Number of particles", [10**3, 10**4, 10**5, 10**6, 10**7], value=10**5)
+else:
+    N = st.sidebar.slider("Number of particles", 10, 500, 100, step=10)
 L = st.sidebar.slider("Box length", 1.0, 10.0, 5.0, step=0.5)
 v0 = st.sidebar.slider("Initial velocity scale", 0.1, 5.0, 1.0, step=0.1)
+histogram_view = st.sidebar.radio("Histogram view", ["Instantaneous", "Time-averaged"])
 
 # Constants
 m = 1.0  # Particle mass (arbitrary units)
 k = 1.0  # Boltzmann constant (simplified units)
 dt = 0.01  # Time step
 
-# Initialize simulation state
-if 'positions' not in st.session_state:
-    st.session_state.positions = np.random.uniform(0, L, N)
-    st.session_state.velocities = np.random.normal(0, v0, N)
-    st.session_state.total_momentum_transfer = 0.0
+# Initialize simulation state (only the initial conditions and elapsed time are stored;
+# the state at any time follows from them in closed form)
+if st.session_state.get('gas_params') != (N, L, v0):
+    st.session_state.gas_params = (N, L, v0)
+    st.session_state.initial_positions = np.random.uniform(0, L, N)
+    st.session_state.initial_velocities = np.random.normal(0, v0, N)
     st.session_state.total_time = 0.0
+    # Fixed-bin histograms: each frame costs one bincount, and the time average
+    # builds up over every run and jump until the parameters change
+    st.session_state.position_hist = HistogramAccumulator(0, L, 20)
+    st.session_state.velocity_hist = HistogramAccumulator(-5 * v0, 5 * v0, 40)
+if st.sidebar.button("Reset time average"):
+    st.session_state.position_hist.reset()
+    st.session_state.velocity_hist.reset()
+position_hist = st.session_state.position_hist
+velocity_hist = st.session_state.velocity_hist
+
+def gas_state(t):
+    """
+    Exact positions, velocities, temperature and wall force at time t
+    """
+    positions, velocities, hits = fold_1d(st.session_state.initial_positions,
+                                          st.session_state.initial_velocities, t, L)
+
+    # Calculate temperature from average kinetic energy
+    # In 1D: <(1/2) m v^2> = (1/2) k T
+    average_ke = (0.5 * m * np.sum(velocities**2)) / N
+    T = (2 * average_ke) / k
+
+    # Force as momentum transfer per unit time: each hit transfers 2 m |v|,
+    # shared between the two walls
+    total_momentum_transfer = 2 * m * np.dot(np.abs(velocities), hits)
+    F = total_momentum_transfer / (2 * t) if t > 0 else 0
+    return positions, velocities, T, F
+
+# The figure is built once so a frame only updates bar heights
+fig, (ax1, ax2) = plt.subplots(1, 2, figsize=(12, 4))
+
+# Position histogram
+position_bars = ax1.bar(position_hist.centers, position_hist.instant, width=position_hist.width,
+                        color='blue', alpha=0.7)
+ax1.set_title("Particle Positions")
+ax1.set_xlabel("Position")
+ax1.set_ylabel("Count")
+
+# Velocity histogram with the Maxwell-Boltzmann expectation per bin
+velocity_bars = ax2.bar(velocity_hist.centers, velocity_hist.instant, width=velocity_hist.width,
+                        color='red', alpha=0.7)
+v_grid = np.linspace(velocity_hist.lo, velocity_hist.hi, 400)
+mb_line, = ax2.plot(v_grid, np.zeros_like(v_grid), 'k--', label="Maxwell-Boltzmann")
+ax2.set_title("Particle Velocities")
+ax2.set_xlabel("Velocity")
+ax2.set_ylabel("Count")
+ax2.legend()
+
+plt.tight_layout()
+
+def show_state(positions, velocities, T, F):
+    F_theory = (N * k * T) / L  # Theoretical force from 1D ideal gas law
+
+    position_hist.add(positions)
+    velocity_hist.add(velocities)
+
+    for hist, bars, ax in ((position_hist, position_bars, ax1), (velocity_hist, velocity_bars, ax2)):
+        heights = hist.instant if histogram_view == "Instantaneous" else hist.time_average
+        for bar, height in zip(bars, heights):
+            bar.set_height(height)
+        ax.set_ylim(0, 1.15 * max(heights.max(), 1))
+
+    # 1D Maxwell-Boltzmann: f(v) = sqrt(m / (2π k T)) exp(-m v² / (2 k T)), scaled to counts per bin
+    mb = N * velocity_hist.width * np.sqrt(m / (2 * np.pi * k * T)) * np.exp(-m * v_grid**2 / (2 * k * T))
+    mb_line.set_ydata(mb)
+
+    st.pyplot(fig)
+    st.write(f"**Temperature (T):** {T:.2f} units")
+    st.write(f"**Simulated Force (F):** {F:.2f} units")
+    st.write(f"**Theoretical Force (F_theory):** {F_theory:.2f} units")
+
+if mode == "Jump to time t":
+    t_jump = st.number_input("Time t", min_value=0.0, value=100.0, step=10.0)
+    if st.button("Jump"):
+        start = time.perf_counter()
+        state = gas_state(t_jump)
+        elapsed = time.perf_counter() - start
+        show_state(*state)
+        st.write(f"Computed the state of {N:,} particles at t = {t_jump:g} in {elapsed * 1000:.0f} ms.")
 
 # Start button
-if st.button("Start Simulation"):
-    positions = st.session_state.positions
-    velocities = st.session_state.velocities
-    total_momentum_transfer = st.session_state.total_momentum_transfer
+elif st.button("Start Simulation"):
     total_time = st.session_state.total_time
 
     # Placeholder for dynamic updates
@@ -36,64 +120,20 @@ if st.button("Start Simulation"):
 
     # Simulation loop
     for step in range(500):  # Run for 500 steps
-        # Update positions
-        positions += velocities * dt
-
-        # Handle collisions with walls
-        for i in range(N):
-            if positions[i] < 0:
-                positions[i] = -positions[i]  # Reflect off left wall
-                velocities[i] = -velocities[i]
-                total_momentum_transfer += 2 * m * abs(velocities[i])
-            elif positions[i] > L:
-                positions[i] = 2 * L - positions[i]  # Reflect off right wall
-                velocities[i] = -velocities[i]
-                total_momentum_transfer += 2 * m * abs(velocities[i])
-
         total_time += dt
 
-        # Calculate temperature from average kinetic energy
-        # In 1D: <(1/2) m v^2> = (1/2) k T
-        average_ke = (0.5 * m * np.sum(velocities**2)) / N
-        T = (2 * average_ke) / k
-
-        # Calculate force as momentum transfer per unit time
-        F = total_momentum_transfer / total_time if total_time > 0 else 0
-        F_theory = (N * k * T) / L  # Theoretical force from 1D ideal gas law
-
-        # Create plots
-        fig, (ax1, ax2) = plt.subplots(1, 2, figsize=(12, 4))
-        
-        # Position histogram
-        ax1.hist(positions, bins=20, range=(0, L), color='blue', alpha=0.7)
-        ax1.set_title("Particle Positions")
-        ax1.set_xlabel("Position")
-        ax1.set_ylabel("Count")
-        
-        # Velocity histogram
-        ax2.hist(velocities, bins=20, color='red', alpha=0.7)
-        ax2.set_title("Particle Velocities")
-        ax2.set_xlabel("Velocity")
-        ax2.set_ylabel("Count")
-        
-        plt.tight_layout()
-
         # Update placeholder with plot and metrics
         with placeholder.container():
-            st.pyplot(fig)
-            st.write(f"**Temperature (T):** {T:.2f} units")
-            st.write(f"**Simulated Force (F):** {F:.2f} units")
-            st.write(f"**Theoretical Force (F_theory):** {F_theory:.2f} units")
+            show_state(*gas_state(total_time))
 
         # Small delay for visualization
         time.sleep(0.05)
 
     # Update session state
-    st.session_state.positions = positions
-    st.session_state.velocities = velocities
-    st.session_state.total_momentum_transfer = total_momentum_transfer
     st.session_state.total_time = total_time
 
+plt.close(fig)
+
 # Instructions
 st.write("""
 ### How to Use
@@ -102,5 +142,11 @@ st.write("""
    - **Box length (L)**: Length of the 1D box.
    - **Initial velocity scale (v0)**: Controls the spread of initial velocities.
 2. Click "Start Simulation" to run the simulation for 500 steps.
-3. Observe the histograms and calculated values updating in real-time.
+3. Observe the histograms and calculated values updating in real-time. The *Time-averaged*
+   view accumulates every frame and jump since the parameters last changed (or since
+   **Reset time average**); the dashed curve is the Maxwell-Boltzmann
+   distribution at the current temperature.
+4. Or choose **Jump to time t** to evaluate up to 10⁷ particles at any time in one pass:
+   with no collisions between particles, each position follows exactly from folding
+   x₀ + v t back into the box, and the wall-hit counts from how many box lengths it spans.
 """)
\ No newline at end of file
@@ -2,6 +2,7 @@ import streamlit as st
 import numpy as np
 import matplotlib.pyplot as plt
 import time
+from simulations.heat import RodSolver
 
 st.title("Temperature Distribution Simulation")
 
@@ -12,7 +13,9 @@ This simulation visualizes the evolution of temperature along a 1D rod using the
 \frac{\partial u}{\partial t} = \alpha \frac{\partial^2 u}{\partial x^2}
 \]
 
-We discretize space and time and update the temperature profile using the explicit finite difference method.
+We discretize space and time and update the temperature profile with finite differences: either the
+explicit method, or the implicit backward Euler / Crank–Nicolson schemes, which stay stable for any
+time step and cost one tridiagonal solve per step.
 """)
 
 # Simulation parameters from user inputs
@@ -20,19 +23,38 @@ length = st.sidebar.slider("Rod Length", min_value=10, max_value=100, value=50)
 N = st.sidebar.slider("Number of Spatial Points", min_value=50, max_value=500, value=100)
 alpha = st.sidebar.slider("Thermal Diffusivity (α)", min_value=0.01, max_value=1.0, value=0.1, step=0.01)
 time_steps = st.sidebar.slider("Number of Time Steps", min_value=100, max_value=1000, value=500)
-dt = st.sidebar.slider("Time Step Size (dt)", min_value=0.001, max_value=0.1, value=0.01, step=0.001)
+
+schemes = {"Explicit (FTCS)": "explicit", "Crank–Nicolson": "crank-nicolson", "Backward Euler": "backward-euler"}
+scheme = schemes[st.sidebar.selectbox("Time Integration", list(schemes))]
+if scheme == "explicit":
+    dt = st.sidebar.slider("Time Step Size (dt)", min_value=0.001, max_value=0.1, value=0.01, step=0.001)
+else:
+    dt = st.sidebar.slider("Time Step Size (dt)", min_value=0.01, max_value=10.0, value=0.5, step=0.01)
+
+# Boundary conditions at each end of the rod
+base_temp = 20  # base temperature in °C
+boundaries = {}
+for side in ("Left", "Right"):
+    kind = st.sidebar.selectbox(f"{side} Boundary", ["Fixed temperature (Dirichlet)", "Fixed gradient (Neumann)"])
+    if kind.startswith("Fixed temperature"):
+        value = st.sidebar.number_input(f"{side} Temperature (°C)", value=float(base_temp))
+        boundaries[side] = ("dirichlet", value)
+    else:
+        value = st.sidebar.number_input(f"{side} Gradient du/dx (°C per unit length, 0 = insulated)", value=0.0)
+        boundaries[side] = ("neumann", value)
 
 dx = length / (N - 1)
+solver = RodSolver(N, dx, alpha, dt, scheme=scheme, left=boundaries["Left"], right=boundaries["Right"])
 
 # Stability check for the explicit finite difference method (CFL condition)
-if dt > dx**2 / (2 * alpha):
-    st.warning("The chosen time step may be too large for stability. Consider reducing dt.")
+if not solver.stable:
+    st.warning("The chosen time step may be too large for stability. Consider reducing dt "
+               "or switching to an implicit scheme.")
 
 # Define the spatial domain
 x = np.linspace(0, length, N)
 
 # Initial condition: base temperature with a Gaussian peak in the center
-base_temp = 20  # base temperature in °C
 u = np.ones(N) * base_temp
 u += 80 * np.exp(-((x - length/2)**2) / (2 * (length/10)**2))
 
@@ -43,25 +65,21 @@ st.markdown("### Simulation Running...")
 
 # Simulation loop
 for t in range(time_steps):
-    # Create a new temperature array
-    u_new = u.copy()
-    
-    # Update interior points using the finite difference method
-    for i in range(1, N - 1):
-        u_new[i] = u[i] + dt * alpha * (u[i + 1] - 2 * u[i] + u[i - 1]) / dx**2
-    u = u_new
+    # Advance the temperature profile by one step
+    u = solver.step(u)
     
     # Plot the temperature distribution
     fig, ax = plt.subplots()
     ax.plot(x, u, color='r', lw=2, label="Temperature")
     ax.set_xlabel("Position along the rod")
     ax.set_ylabel("Temperature (°C)")
-    ax.set_title(f"Time step {t+1}/{time_steps}")
+    ax.set_title(f"Time step {t+1}/{time_steps} (t = {(t + 1) * dt:.2f})")
     ax.legend()
     ax.set_ylim(0, base_temp + 90)
     
     # Update the plot in the Streamlit app
     plot_placeholder.pyplot(fig)
+    plt.close(fig)
     
     # A short delay for animation effect
     time.sleep(0.05)
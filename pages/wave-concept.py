@@ -1,7 +1,7 @@
 import streamlit as st
 import numpy as np
 import matplotlib.pyplot as plt
-import time
+from simulations.runloop import RunLoop
 
 st.title("Wave Simulation")
 
@@ -20,9 +20,10 @@ plot_placeholder = st.empty()
 x = np.linspace(0, 4 * np.pi, 400)
 t = 0
 
-# Infinite loop to update the plot continuously.
-# Adjust time.sleep() to control the speed of animation.
-while True:
+# Bounded loop to update the plot continuously; it stops on disconnect, rerun
+# or after its step budget. Adjust interval to control the speed of animation.
+loop = RunLoop("wave-concept", max_steps=600, interval=0.1)
+for _ in loop:
     # Compute the wave at time t
     y = amplitude * np.sin(frequency * (x - speed * t) + phase)
     
@@ -41,6 +42,7 @@ while True:
     # Close the figure to avoid resource warnings
     plt.close(fig)
     
-    # Increment time and sleep briefly to animate
+    # Increment time to animate
     t += 0.1
-    time.sleep(0.1)
+
+loop.show_status()
@@ -2,6 +2,7 @@ import streamlit as st
 import numpy as np
 import matplotlib.pyplot as plt
 import time
+from simulations.runloop import RunLoop
 
 st.title("Wave Speed Visualization")
 
@@ -20,8 +21,9 @@ placeholder = st.empty()
 # Record the starting time
 start_time = time.time()
 
-# Animation loop
-while True:
+# Animation loop (bounded; stops on disconnect, rerun or after a minute)
+loop = RunLoop("wave-speed", max_steps=1200, interval=0.05)
+for _ in loop:
     # Calculate elapsed time
     t = time.time() - start_time
 
@@ -40,5 +42,7 @@ while True:
     # Update the plot in the Streamlit app
     placeholder.pyplot(fig)
     
-    # Small delay to control animation speed
-    time.sleep(0.05)
+    # Close the figure to avoid accumulating open figures
+    plt.close(fig)
+
+loop.show_status()
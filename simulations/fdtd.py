@@ -0,0 +1,275 @@
+import numpy as np
+
+def continuous_wave(wavelength, amplitude=1.0, ramp_periods=3.0):
+    """
+    Sinusoidal source waveform of the given wavelength (in cells, c = 1).
+
+    The amplitude ramps up smoothly over the first few periods so that
+    switching the source on does not launch a broadband transient.
+
+    Returns:
+    - waveform: Callable t -> amplitude
+    """
+    omega = 2 * np.pi / wavelength
+    ramp = ramp_periods * wavelength
+
+    def waveform(t):
+        envelope = 1.0 if t >= ramp else 0.5 * (1 - np.cos(np.pi * t / ramp))
+        return amplitude * envelope * np.sin(omega * t)
+    return waveform
+
+def gaussian_pulse(width, delay=None, amplitude=1.0):
+    """
+    Gaussian pulse waveform of the given duration (in time steps of c = 1).
+
+    Returns:
+    - waveform: Callable t -> amplitude
+    """
+    delay = 4 * width if delay is None else delay
+    return lambda t: amplitude * np.exp(-((t - delay) / width) ** 2)
+
+def _pml_profile(n, thickness, positions, dt, order=3, alpha_max=0.05):
+    """
+    CPML update coefficients (b, a) at the given grid positions along one axis.
+
+    The conductivity grows as depth**order into the layer, with the
+    maximum σ = 0.8 (order + 1) for unit impedance and cell size; the
+    complex-frequency shift α falls off into the layer to absorb
+    evanescent and low-frequency content near the interface.
+    """
+    depth = np.maximum.reduce([thickness - positions, positions - (n - 1 - thickness),
+                               np.zeros_like(positions)]) / max(thickness, 1)
+    depth = np.minimum(depth, 1.0)
+    sigma = 0.8 * (order + 1) * depth ** order
+    alpha = np.where(depth > 0, alpha_max * (1 - depth), 0.0)
+    b = np.exp(-(sigma + alpha) * dt)
+    a = np.divide(sigma * (b - 1), sigma + alpha, out=np.zeros_like(sigma), where=sigma > 0)
+    return b, a
+
+class _PMLTerm:
+    """
+    Convolutional PML correction for one spatial derivative.
+
+    The auxiliary field ψ only exists in the two absorbing strips at the
+    ends of the derivative's axis, so the interior costs nothing extra.
+    apply() turns a plain difference into the stretched-coordinate one,
+    ∂̃ = ∂ + ψ, in place.
+    """
+
+    def __init__(self, b, a, axis, shape, dtype):
+        active = np.flatnonzero(a != 0)
+        n = len(a)
+        left = int(active[active < n // 2].max() + 1) if np.any(active < n // 2) else 0
+        right = int(n - active[active >= n // 2].min()) if np.any(active >= n // 2) else 0
+        self.strips = []
+        for sl in (slice(0, left), slice(n - right, n)):
+            if sl.stop - sl.start <= 0:
+                continue
+            index = [slice(None)] * 2
+            index[axis] = sl
+            view = [1, 1]
+            view[axis] = -1
+            strip_shape = list(shape)
+            strip_shape[axis] = sl.stop - sl.start
+            self.strips.append((tuple(index), b[sl].reshape(view).astype(dtype), a[sl].reshape(view).astype(dtype),
+                                np.zeros(strip_shape, dtype=dtype)))
+
+    def apply(self, D):
+        for index, b, a, psi in self.strips:
+            psi *= b
+            psi += a * D[index]
+            D[index] += psi
+
+class YeeGrid2D:
+    """
+    2D finite-difference time-domain Maxwell solver on a staggered Yee grid.
+
+    Units are normalized: c = ε0 = μ0 = 1 and the cell size is 1, so
+    lengths are in cells and the time step is courant / √2. Two
+    polarizations are supported:
+
+    - "TM": Ez on the nodes, Hx and Hy on the edges between them
+    - "TE": Hz at the cell centres, Ex and Ey on the edges
+
+    Every update is a handful of in-place array operations on float32
+    slices with preallocated difference buffers. Convolutional PML layers
+    on all four sides absorb outgoing waves, backed by a perfect
+    conductor at the outer edge. Materials enter through a relative
+    permittivity map; sources are soft (added to the field), so waves
+    pass through them.
+    """
+
+    def __init__(self, shape, mode="TM", eps_r=None, pml=20, courant=0.99, dtype=np.float32):
+        """
+        Parameters:
+        - shape: (ny, nx) number of nodes
+        - mode: "TM" (Ez, Hx, Hy) or "TE" (Hz, Ex, Ey)
+        - eps_r: Relative permittivity at the nodes, (ny, nx) array or scalar (default 1)
+        - pml: Thickness of the absorbing layers in cells
+        - courant: Courant number c dt √2 / dx (below 1 for stability)
+        - dtype: Floating-point type of the fields
+        """
+        if mode not in ("TM", "TE"):
+            raise ValueError(f"Unknown mode {mode!r}; use 'TM' or 'TE'.")
+        if not 0 < courant < 1:
+            raise ValueError("The Courant number must be between 0 and 1.")
+        self.shape = ny, nx = tuple(int(n) for n in shape)
+        self.mode = mode
+        self.pml = int(pml)
+        self.dtype = np.dtype(dtype)
+        self.dt = courant / np.sqrt(2)
+        self.time = 0.0
+        self.steps = 0
+        self.sources = []
+        dt, f = self.dt, self.dtype
+
+        eps = np.broadcast_to(np.asarray(1.0 if eps_r is None else eps_r, dtype=float), self.shape)
+        if np.any(eps < 1):
+            raise ValueError("Relative permittivity must be at least 1.")
+        self.eps_r = np.array(eps)
+
+        # Coefficients at integer (e) and half-integer (h) positions along each axis
+        y_e, y_h = _pml_profile(ny, self.pml, np.arange(ny, dtype=float), dt), \
+            _pml_profile(ny, self.pml, np.arange(ny - 1) + 0.5, dt)
+        x_e, x_h = _pml_profile(nx, self.pml, np.arange(nx, dtype=float), dt), \
+            _pml_profile(nx, self.pml, np.arange(nx - 1) + 0.5, dt)
+        interior_y = tuple(c[1:-1] for c in y_e)
+        interior_x = tuple(c[1:-1] for c in x_e)
+
+        if mode == "TM":
+            self.Ez = np.zeros((ny, nx), dtype=f)
+            self.Hx = np.zeros((ny - 1, nx), dtype=f)
+            self.Hy = np.zeros((ny, nx - 1), dtype=f)
+            self._dEz_dy = np.empty((ny - 1, nx), dtype=f)
+            self._dEz_dx = np.empty((ny, nx - 1), dtype=f)
+            self._dHy_dx = np.empty((ny - 2, nx - 2), dtype=f)
+            self._dHx_dy = np.empty((ny - 2, nx - 2), dtype=f)
+            self._pml = [_PMLTerm(*y_h, 0, self._dEz_dy.shape, f), _PMLTerm(*x_h, 1, self._dEz_dx.shape, f),
+                         _PMLTerm(*interior_x, 1, self._dHy_dx.shape, f),
+                         _PMLTerm(*interior_y, 0, self._dHx_dy.shape, f)]
+            self._ce = (dt / self.eps_r[1:-1, 1:-1]).astype(f)
+        else:
+            self.Hz = np.zeros((ny - 1, nx - 1), dtype=f)
+            self.Ex = np.zeros((ny, nx - 1), dtype=f)
+            self.Ey = np.zeros((ny - 1, nx), dtype=f)
+            self._dHz_dy = np.empty((ny - 2, nx - 1), dtype=f)
+            self._dHz_dx = np.empty((ny - 1, nx - 2), dtype=f)
+            self._dEx_dy = np.empty((ny - 1, nx - 1), dtype=f)
+            self._dEy_dx = np.empty((ny - 1, nx - 1), dtype=f)
+            self._pml = [_PMLTerm(*interior_y, 0, self._dHz_dy.shape, f),
+                         _PMLTerm(*interior_x, 1, self._dHz_dx.shape, f),
+                         _PMLTerm(*y_h, 0, self._dEx_dy.shape, f), _PMLTerm(*x_h, 1, self._dEy_dx.shape, f)]
+            # Permittivity on the edges: mean of the two nodes each edge joins
+            self._eps_x = eps_x = 0.5 * (self.eps_r[:, 1:] + self.eps_r[:, :-1])
+            self._eps_y = eps_y = 0.5 * (self.eps_r[1:, :] + self.eps_r[:-1, :])
+            self._ce_x = (dt / eps_x[1:-1, :]).astype(f)
+            self._ce_y = (dt / eps_y[:, 1:-1]).astype(f)
+
+    @property
+    def field(self):
+        """The out-of-plane field: Ez for TM, Hz for TE."""
+        return self.Ez if self.mode == "TM" else self.Hz
+
+    def add_source(self, index, waveform):
+        """
+        Add a soft source to the out-of-plane field.
+
+        Parameters:
+        - index: Index into the (ny, nx) node grid, e.g. (j, i) for a point source
+          or (slice(a, b), i) for a line source
+        - waveform: Callable t -> amplitude added every step
+        """
+        if self.mode == "TE":
+            # Hz has one fewer node per axis; clip the index onto its grid
+            index = tuple(self._clip(k, n) for k, n in zip(index, self.Hz.shape))
+        self.sources.append((index, waveform))
+
+    @staticmethod
+    def _clip(k, n):
+        if isinstance(k, slice):
+            start, stop, step = k.indices(n + 1)
+            return slice(min(start, n - 1), min(stop, n), step)
+        return min(int(k), n - 1)
+
+    def step(self, count=1):
+        """Advance all fields by `count` time steps."""
+        for _ in range(count):
+            if self.mode == "TM":
+                self._step_tm()
+            else:
+                self._step_te()
+            self.time += self.dt
+            self.steps += 1
+
+    def _step_tm(self):
+        dt = self.dt
+        Ez, Hx, Hy = self.Ez, self.Hx, self.Hy
+        pml_y_h, pml_x_h, pml_x_e, pml_y_e = self._pml
+
+        # Faraday: ∂Hx/∂t = -∂Ez/∂y, ∂Hy/∂t = ∂Ez/∂x
+        d = self._dEz_dy
+        np.subtract(Ez[1:, :], Ez[:-1, :], out=d)
+        pml_y_h.apply(d)
+        d *= dt
+        Hx -= d
+        d = self._dEz_dx
+        np.subtract(Ez[:, 1:], Ez[:, :-1], out=d)
+        pml_x_h.apply(d)
+        d *= dt
+        Hy += d
+
+        # Ampère–Maxwell: ∂Ez/∂t = (∂Hy/∂x - ∂Hx/∂y) / ε; the outer ring stays 0 (conductor)
+        curl = self._dHy_dx
+        np.subtract(Hy[1:-1, 1:], Hy[1:-1, :-1], out=curl)
+        pml_x_e.apply(curl)
+        d = self._dHx_dy
+        np.subtract(Hx[1:, 1:-1], Hx[:-1, 1:-1], out=d)
+        pml_y_e.apply(d)
+        curl -= d
+        curl *= self._ce
+        Ez[1:-1, 1:-1] += curl
+
+        t = self.time + dt
+        for index, waveform in self.sources:
+            Ez[index] += waveform(t)
+
+    def _step_te(self):
+        dt = self.dt
+        Hz, Ex, Ey = self.Hz, self.Ex, self.Ey
+        pml_y_e, pml_x_e, pml_y_h, pml_x_h = self._pml
+
+        # Ampère–Maxwell: ∂Ex/∂t = ∂Hz/∂y / ε, ∂Ey/∂t = -∂Hz/∂x / ε
+        d = self._dHz_dy
+        np.subtract(Hz[1:, :], Hz[:-1, :], out=d)
+        pml_y_e.apply(d)
+        d *= self._ce_x
+        Ex[1:-1, :] += d
+        d = self._dHz_dx
+        np.subtract(Hz[:, 1:], Hz[:, :-1], out=d)
+        pml_x_e.apply(d)
+        d *= self._ce_y
+        Ey[:, 1:-1] -= d
+
+        # Faraday: ∂Hz/∂t = ∂Ex/∂y - ∂Ey/∂x
+        curl = self._dEx_dy
+        np.subtract(Ex[1:, :], Ex[:-1, :], out=curl)
+        pml_y_h.apply(curl)
+        d = self._dEy_dx
+        np.subtract(Ey[:, 1:], Ey[:, :-1], out=d)
+        pml_x_h.apply(d)
+        curl -= d
+        curl *= dt
+        Hz += curl
+
+        t = self.time + dt
+        for index, waveform in self.sources:
+            Hz[index] += waveform(t)
+
+    def energy(self):
+        """Total electromagnetic energy ½ Σ (ε E² + H²) on the grid (cell area 1)."""
+        if self.mode == "TM":
+            return 0.5 * float(np.sum(self.eps_r * self.Ez.astype(float)**2)
+                               + np.sum(self.Hx.astype(float)**2) + np.sum(self.Hy.astype(float)**2))
+        # Ex and Ey sit on edges, so they see the permittivity averaged onto those edges
+        return 0.5 * float(np.sum(self.Hz.astype(float)**2) + np.sum(self._eps_x * self.Ex.astype(float)**2)
+                           + np.sum(self._eps_y * self.Ey.astype(float)**2))
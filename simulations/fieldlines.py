@@ -0,0 +1,269 @@
+import numpy as np
+from scipy.spatial import cKDTree
+
+# Dormand–Prince 5(4) tableau (the field does not depend on s, so no nodes are
+# needed); the last stage is the first stage of the next step
+_DP_A = (
+    (),
+    (1 / 5,),
+    (3 / 40, 9 / 40),
+    (44 / 45, -56 / 15, 32 / 9),
+    (19372 / 6561, -25360 / 2187, 64448 / 6561, -212 / 729),
+    (9017 / 3168, -355 / 33, 46732 / 5247, 49 / 176, -5103 / 18656),
+    (35 / 384, 0.0, 500 / 1113, 125 / 192, -2187 / 6784, 11 / 84),
+)
+# Fifth-order weights minus the embedded fourth-order ones
+_DP_E = (71 / 57600, 0.0, -71 / 16695, 71 / 1920, -17253 / 339200, 22 / 525, -1 / 40)
+
+# Why a line stopped, as returned by trace_field_lines
+STOP_REASONS = ("length", "bounds", "weak", "sink", "closed")
+STOP_LENGTH, STOP_BOUNDS, STOP_WEAK, STOP_SINK, STOP_CLOSED = range(5)
+
+# Largest change of the unit tangent per step; the error estimate alone lets
+# steps jump across lines that curl tightly around a source
+_MAX_TURN = 0.3
+
+# Consecutive steps forced through at min_step after which a line counts as
+# stuck at a null point (its direction flips back and forth there)
+_MAX_STALLED = 3
+
+def trace_field_lines(field_fn, seeds, directions=1.0, bounds=None, step=0.05, min_step=1e-4, max_step=0.5,
+                      tol=1e-4, max_length=50.0, max_steps=2000, sinks=None, sink_radius=0.05,
+                      weak_field=1e-12, close_loops=False):
+    """
+    Trace field lines from many seeds at once with adaptive RK45 steps.
+
+    Lines follow dr/ds = s F(r) / |F(r)| in arc length s, where F is
+    evaluated directly (analytic, treecode, ...) rather than sampled on a
+    grid. All live lines advance together: every stage is one call to
+    field_fn with the positions of all lines still running, so the cost
+    grows with the number of lines and their lengths, not with any grid.
+    Each line has its own step size, controlled by the embedded error
+    estimate of the Dormand–Prince pair.
+
+    A line stops when it leaves the bounds, reaches a sink (e.g. a charge
+    it flows into), meets a point where the field vanishes (the field
+    drops below weak_field, or the step stays stuck at min_step, as it
+    does around a null), closes on itself (if close_loops), or exceeds
+    max_length.
+
+    Parameters:
+    - field_fn: Callable mapping (N, D) positions to (N, D) field vectors
+    - seeds: (N, D) starting points
+    - directions: +1 to follow the field, -1 to trace against it (scalar or per seed)
+    - bounds: (lo, hi) arrays of length D; lines stop outside the box
+    - step: Initial step length
+    - min_step, max_step: Limits on the adaptive step length
+    - tol: Allowed local position error per step
+    - max_length: Maximum arc length of a line
+    - max_steps: Maximum number of step attempts
+    - sinks: (K, D) points where lines end (sources of the opposite sign)
+    - sink_radius: Distance from a sink at which a line ends on it
+    - weak_field: Field magnitude below which a line stops
+    - close_loops: Stop a line (and close it) when it returns to its seed
+
+    Returns:
+    - lines: List of (n_i, D) arrays of points, one per seed
+    - stops: (N,) array of STOP_* codes
+    """
+    seeds = np.array(seeds, dtype=float)
+    n, dim = seeds.shape
+    signs = np.broadcast_to(np.asarray(directions, dtype=float), (n,)).copy()
+    lo, hi = (np.full(dim, -np.inf), np.full(dim, np.inf)) if bounds is None else map(np.asarray, bounds)
+    sink_tree = cKDTree(sinks) if sinks is not None and len(sinks) else None
+
+    def direction(points, signs):
+        F = field_fn(points)
+        magnitude = np.linalg.norm(F, axis=1)
+        weak = ~(magnitude > weak_field)
+        return np.where(weak[:, None], 0.0, F * (signs / np.where(weak, 1.0, magnitude))[:, None]), weak
+
+    position = seeds.copy()
+    h = np.full(n, float(step))
+    length = np.zeros(n)
+    left_seed = np.zeros(n, dtype=bool)
+    stalled = np.zeros(n, dtype=int)
+    stops = np.full(n, STOP_LENGTH)
+    active = np.arange(n)
+    k1, weak = direction(position, signs)
+    stops[weak] = STOP_WEAK
+    active = active[~weak]
+    k1 = k1[~weak]
+    # Accepted points are logged as (line index, position) batches and sorted out at the end
+    log_index = [np.arange(n)]
+    log_points = [seeds.copy()]
+
+    for _ in range(max_steps):
+        if len(active) == 0:
+            break
+        y = position[active]
+        s = signs[active]
+        hh = h[active][:, None]
+        k = [k1]
+        weak = np.zeros(len(active), dtype=bool)
+        for stage in range(1, 7):
+            y_stage = y + hh * sum(a * ki for a, ki in zip(_DP_A[stage], k) if a)
+            ks, weak_stage = direction(y_stage, s)
+            k.append(ks)
+            weak |= weak_stage
+        y_new = y_stage  # the seventh stage is evaluated at the fifth-order solution
+        error = np.linalg.norm(hh * sum(e * ki for e, ki in zip(_DP_E, k) if e), axis=1)
+
+        # Accept steps within tolerance (or already at the smallest step) and resize every step
+        turn = np.linalg.norm(k[6] - k[0], axis=1)
+        within = (error <= tol) & (turn <= _MAX_TURN)
+        accept = within | (h[active] <= min_step * (1 + 1e-9))
+        stalled[active] = np.where(within, 0, stalled[active] + accept)
+        factor = np.minimum(0.9 * (tol / np.maximum(error, 1e-300)) ** 0.2,
+                            0.9 * _MAX_TURN / np.maximum(turn, 1e-300))
+        factor = np.clip(factor, 0.2, 5.0)
+        h[active] = np.clip(h[active] * factor, min_step, max_step)
+
+        moved = active[accept]
+        y_new = y_new[accept]
+        taken = np.linalg.norm(y_new - position[moved], axis=1)
+        length[moved] += taken
+        position[moved] = y_new
+        log_index.append(moved)
+        log_points.append(y_new)
+        k1 = np.where(accept[:, None], k[6], k1)
+
+        # Termination tests on the lines that moved
+        done = np.zeros(len(active), dtype=bool)
+        reason = np.full(len(active), STOP_LENGTH)
+        where = np.flatnonzero(accept)
+        outside = np.any((y_new < lo) | (y_new > hi), axis=1)
+        reason[where[outside]] = STOP_BOUNDS
+        done[where[outside]] = True
+        if sink_tree is not None:
+            distance, _ = sink_tree.query(y_new, distance_upper_bound=sink_radius)
+            at_sink = np.isfinite(distance) & (length[moved] > sink_radius)
+            reason[where[at_sink]] = STOP_SINK
+            done[where[at_sink]] = True
+        if close_loops:
+            # Back within one step of the seed after getting more than two steps away from it
+            gap = np.linalg.norm(y_new - seeds[moved], axis=1)
+            closed = left_seed[moved] & (gap < taken)
+            left_seed[moved] |= gap > 2 * taken
+            if np.any(closed):
+                log_index.append(moved[closed])
+                log_points.append(seeds[moved[closed]])
+            reason[where[closed]] = STOP_CLOSED
+            done[where[closed]] = True
+        too_long = length[moved] >= max_length
+        done[where[too_long]] = True
+        # A stage met a vanishing field, or the step is stuck at min_step
+        weak_now = weak[accept] | (stalled[moved] >= _MAX_STALLED)
+        reason[where[weak_now]] = STOP_WEAK
+        done[where[weak_now]] = True
+
+        stops[active[done]] = reason[done]
+        active = active[~done]
+        k1 = k1[~done]
+
+    index = np.concatenate(log_index)
+    points = np.concatenate(log_points)
+    order = np.argsort(index, kind="stable")
+    index, points = index[order], points[order]
+    counts = np.bincount(index, minlength=n)
+    return np.split(points, np.cumsum(counts)[:-1]), stops
+
+def trace_both_ways(field_fn, seeds, **options):
+    """
+    Trace each seed forwards and backwards and join the halves into one line.
+
+    Takes the same options as trace_field_lines.
+
+    Returns:
+    - lines: List of (n_i, D) arrays running in the field direction
+    - stops: (N, 2) STOP_* codes of the backward and forward halves
+    """
+    seeds = np.asarray(seeds, dtype=float)
+    n = len(seeds)
+    lines, stops = trace_field_lines(field_fn, np.vstack([seeds, seeds]),
+                                     np.repeat([-1.0, 1.0], n), **options)
+    joined = []
+    for i in range(n):
+        backward, forward = lines[i], lines[n + i]
+        # A closed loop is complete after one direction
+        if stops[n + i] == STOP_CLOSED:
+            joined.append(forward)
+        else:
+            joined.append(np.vstack([backward[::-1], forward[1:]]))
+    return joined, np.column_stack([stops[:n], stops[n:]])
+
+def flux_seeds(field_fn, path, num_lines, samples=256):
+    """
+    Seeds along a curve spaced so that each line carries equal flux.
+
+    The flux |F · n̂| crossing the curve is integrated over `samples`
+    points spread evenly along it, and the seeds sit at equal steps of
+    the cumulative flux, so lines crowd together where the field is
+    strong. Use a segment for fields that cross a line (a coil's plane),
+    a circle for fields that spread radially from a point.
+
+    Parameters:
+    - field_fn: Callable mapping (N, 2) positions to (N, 2) field vectors
+    - path: (P, 2) vertices of the seeding curve (a segment is two vertices)
+    - num_lines: Number of seeds
+    - samples: Number of points used to integrate the flux
+
+    Returns:
+    - seeds: (num_lines, 2) array (none if no flux crosses the curve)
+    """
+    path = np.asarray(path, dtype=float)
+    edges = np.diff(path, axis=0)
+    edge_length = np.linalg.norm(edges, axis=1)
+    arc = np.concatenate([[0.0], np.cumsum(edge_length)])
+    s = np.linspace(0.0, arc[-1], samples)
+    points = np.column_stack([np.interp(s, arc, path[:, 0]), np.interp(s, arc, path[:, 1])])
+    edge = np.clip(np.searchsorted(arc, s, side="right") - 1, 0, len(edges) - 1)
+    normals = np.column_stack([-edges[edge, 1], edges[edge, 0]]) / edge_length[edge, None]
+
+    flux = np.abs(np.sum(field_fn(points) * normals, axis=1))
+    flux[~np.isfinite(flux)] = 0.0
+    cumulative = np.concatenate([[0.0], np.cumsum(0.5 * (flux[1:] + flux[:-1]) * np.diff(s))])
+    if not cumulative[-1] > 0 or num_lines < 1:
+        return np.empty((0, 2))
+    targets = (np.arange(num_lines) + 0.5) / num_lines * cumulative[-1]
+    at = np.interp(targets, cumulative, s)
+    return np.column_stack([np.interp(at, arc, path[:, 0]), np.interp(at, arc, path[:, 1])])
+
+def charge_seeds(positions, charges, num_lines, radius=0.1):
+    """
+    Seeds on small circles around point charges, in proportion to |q|.
+
+    By Gauss's law the number of lines leaving a charge is proportional
+    to its magnitude, so `num_lines` lines are shared out by |q| with the
+    largest-remainder method: the counts always add up to num_lines, and
+    in a cloud of more charges than lines the lines go to the charges
+    with the largest shares (the first ones among equals).
+
+    Parameters:
+    - positions: (N, 2) charge positions
+    - charges: (N,) charges
+    - num_lines: Total number of lines over all charges
+    - radius: Radius of the seed circles
+
+    Returns:
+    - seeds: (M, 2) seed points
+    - directions: (M,) +1 for lines leaving positive charges, -1 for negative
+    - owners: (M,) index of the charge each seed belongs to
+    """
+    positions = np.asarray(positions, dtype=float)
+    charges = np.asarray(charges, dtype=float)
+    weights = np.abs(charges)
+    if weights.sum() == 0 or num_lines < 1:
+        return np.empty((0, 2)), np.empty(0), np.empty(0, dtype=int)
+    quotas = num_lines * weights / weights.sum()
+    counts = np.floor(quotas).astype(int)
+    # Hand the lines lost to rounding down to the largest remainders
+    leftover = int(num_lines - counts.sum())
+    counts[np.argsort(counts - quotas, kind="stable")[:leftover]] += 1
+    owners = np.repeat(np.arange(len(charges)), counts)
+    # Angles 0, 1/n, 2/n, ... of a turn for each charge's own n
+    first = np.cumsum(counts) - counts
+    rank = np.arange(len(owners)) - first[owners]
+    angle = 2 * np.pi * (rank + 0.5) / counts[owners]
+    seeds = positions[owners] + radius * np.column_stack([np.cos(angle), np.sin(angle)])
+    return seeds, np.sign(charges[owners]), owners
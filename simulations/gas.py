@@ -0,0 +1,359 @@
+import heapq
+import itertools
+
+import numpy as np
+from simulations.quadtree import group_ramp
+
+# Forward half of the 3x3 neighbour stencil (the cell itself is handled separately)
+_HALF_STENCIL = ((1, 0), (-1, 1), (0, 1), (1, 1))
+
+def reflect_walls(positions, velocities, L, radius=0.0):
+    """
+    Reflect particles off the walls of the square box [0, L]² in place.
+
+    Parameters:
+    - positions: (N, 2) array of positions
+    - velocities: (N, 2) array of velocities
+    - L: Box side length
+    - radius: Particle radius (walls act at radius and L - radius)
+
+    Returns:
+    - momentum_transfer: Total momentum given to the walls (unit mass)
+    - hits: Number of wall collisions
+    """
+    lo, hi = radius, L - radius
+    below = positions < lo
+    above = positions > hi
+
+    positions[below] = 2 * lo - positions[below]
+    positions[above] = 2 * hi - positions[above]
+    hit = below | above
+    velocities[hit] = -velocities[hit]
+
+    return 2.0 * np.abs(velocities[hit]).sum(), int(hit.sum())
+
+def fold_1d(x0, v, t, L):
+    """
+    Propagate non-interacting particles in the reflective box [0, L] exactly.
+
+    Unfolding the reflections, a particle moves freely to u = x0 + v t;
+    folding u modulo 2L gives its position, the parity of floor(u / L)
+    its direction, and |floor(u / L)| the number of wall hits, so any time
+    t costs one vectorized pass regardless of how many bounces occurred.
+
+    Parameters:
+    - x0: (N,) array of initial positions in [0, L)
+    - v: (N,) array of initial velocities
+    - t: Elapsed time
+    - L: Box length
+
+    Returns:
+    - x: (N,) array of positions at time t
+    - velocities: (N,) array of velocities at time t
+    - hits: (N,) integer array of wall collisions during [0, t]
+    """
+    u = x0 + v * t
+    crossings = np.floor(u / L)
+    w = np.mod(u, 2 * L)
+    forward = w < L
+    x = np.where(forward, w, 2 * L - w)
+    velocities = np.where(forward, v, -v)
+    hits = np.abs(crossings).astype(np.int64)
+    return x, velocities, hits
+
+def jittered_lattice(N, radius, L):
+    """
+    Place N non-overlapping disks on a randomly jittered square lattice.
+
+    Parameters:
+    - N: Number of particles
+    - radius: Disk radius
+    - L: Box side length
+
+    Returns:
+    - positions: (N, 2) array of positions inside [radius, L - radius]²
+    """
+    g = int(np.ceil(np.sqrt(N)))
+    spacing = (L - 2 * radius) / g
+    if spacing < 2 * radius:
+        raise ValueError("Particles are too large to fit in the box without overlapping.")
+    centres = radius + spacing * (np.arange(g) + 0.5)
+    grid = np.stack(np.meshgrid(centres, centres), axis=-1).reshape(-1, 2)
+    grid = grid[np.random.choice(len(grid), N, replace=False)]
+    jitter = np.random.uniform(-1, 1, (N, 2)) * (spacing / 2 - radius)
+    return grid + jitter
+
+class CellList:
+    """
+    Uniform-grid cell list over the box [0, L]².
+
+    Particles are sorted by cell key; cell_start[c]:cell_start[c + 1] is
+    the slice of the sorted order that falls in cell c. Building it is one
+    argsort plus a bincount.
+    """
+
+    def __init__(self, positions, L, cell_size):
+        """
+        Parameters:
+        - positions: (N, 2) array of positions
+        - L: Box side length
+        - cell_size: Minimum cell edge (use at least the interaction range)
+        """
+        self.n_cells = max(1, int(L // cell_size))
+        self.cell_edge = L / self.n_cells
+        ij = np.floor(positions / self.cell_edge).astype(np.int64)
+        np.clip(ij, 0, self.n_cells - 1, out=ij)
+        keys = ij[:, 0] * self.n_cells + ij[:, 1]
+
+        self.order = np.argsort(keys, kind="stable")
+        self.keys = keys[self.order]
+        self.cell_ij = ij[self.order]
+        counts = np.bincount(self.keys, minlength=self.n_cells ** 2)
+        self.cell_start = np.concatenate([[0], np.cumsum(counts)])
+
+    def candidate_pairs(self):
+        """
+        Return each unordered pair of particles in the same or adjacent cells once.
+
+        Returns:
+        - i, j: Arrays of particle indices (into the original order)
+        """
+        n = len(self.keys)
+        a = np.arange(n)
+        firsts, seconds = [], []
+
+        # Same cell: later members of the particle's own cell
+        end = self.cell_start[self.keys + 1]
+        counts = end - a - 1
+        firsts.append(np.repeat(a, counts))
+        seconds.append(np.repeat(a + 1, counts) + group_ramp(counts))
+
+        # Forward neighbour cells
+        for di, dj in _HALF_STENCIL:
+            ni = self.cell_ij[:, 0] + di
+            nj = self.cell_ij[:, 1] + dj
+            valid = (ni >= 0) & (ni < self.n_cells) & (nj >= 0) & (nj < self.n_cells)
+            src = a[valid]
+            cell = ni[valid] * self.n_cells + nj[valid]
+            start = self.cell_start[cell]
+            counts = self.cell_start[cell + 1] - start
+            firsts.append(np.repeat(src, counts))
+            seconds.append(np.repeat(start, counts) + group_ramp(counts))
+
+        i = np.concatenate(firsts)
+        j = np.concatenate(seconds)
+        return self.order[i], self.order[j]
+
+def _independent_pairs(i, j):
+    """Keep pairs in which neither particle appears in an earlier pair."""
+    flat = np.stack([i, j], axis=1).ravel()
+    _, first = np.unique(flat, return_index=True)
+    claimed = np.zeros(len(flat), dtype=bool)
+    claimed[first] = True
+    claimed = claimed.reshape(-1, 2)
+    # A pair is independent when both of its entries are first occurrences
+    return claimed[:, 0] & claimed[:, 1]
+
+def collide_hard_disks(positions, velocities, radius, L, cell_size=None):
+    """
+    Resolve elastic collisions between equal-mass hard disks in place.
+
+    Overlapping, approaching pairs are found with a CellList (O(N) for a
+    fixed density) and their velocities are exchanged along the line of
+    centres. A particle takes part in at most one collision per call;
+    any further overlaps are resolved on following steps.
+
+    Parameters:
+    - positions: (N, 2) array of positions
+    - velocities: (N, 2) array of velocities, updated in place
+    - radius: Disk radius
+    - L: Box side length
+    - cell_size: Cell edge (default: the disk diameter, widened at low
+      density so cells hold about one particle)
+
+    Returns:
+    - collisions: Number of collisions resolved
+    """
+    if radius <= 0 or len(positions) < 2:
+        return 0
+    cells = CellList(positions, L, cell_size or max(2 * radius, L / np.sqrt(len(positions))))
+    i, j = cells.candidate_pairs()
+
+    dr = positions[i] - positions[j]
+    r2 = np.einsum("ij,ij->i", dr, dr)
+    dv = velocities[i] - velocities[j]
+    approach = np.einsum("ij,ij->i", dv, dr)
+    hit = (r2 < (2 * radius) ** 2) & (approach < 0) & (r2 > 0)
+    i, j, dr, r2, approach = i[hit], j[hit], dr[hit], r2[hit], approach[hit]
+
+    keep = _independent_pairs(i, j)
+    i, j = i[keep], j[keep]
+    impulse = (approach[keep] / r2[keep])[:, None] * dr[keep]
+    velocities[i] -= impulse
+    velocities[j] += impulse
+    return len(i)
+
+class EventDrivenGas:
+    """
+    Event-driven molecular dynamics for equal-mass hard disks in a box.
+
+    Particles fly freely between events; the engine keeps a priority queue
+    of predicted wall, pair and cell-crossing events and jumps straight
+    from one to the next, so collisions are never missed and no work is
+    spent on steps where nothing happens. Each particle carries an event
+    counter that is bumped whenever its trajectory changes; queued events
+    that were predicted with an older counter are discarded when popped
+    (lazy invalidation). Pair predictions only look at the 3x3 block of
+    neighbouring cells, which stays correct because crossing into a new
+    cell is itself an event that triggers fresh predictions.
+
+    Wall impulses are accumulated per event in wall_momentum (unit mass),
+    which gives the exact time-averaged pressure over any window.
+    """
+
+    WALL, PAIR, CELL = 0, 1, 2
+
+    def __init__(self, positions, velocities, radius, L):
+        """
+        Parameters:
+        - positions: (N, 2) array of non-overlapping positions
+        - velocities: (N, 2) array of velocities
+        - radius: Disk radius (0 gives an ideal gas with wall events only)
+        - L: Box side length
+        """
+        self.pos = np.array(positions, dtype=float)
+        self.vel = np.array(velocities, dtype=float)
+        self.n = len(self.pos)
+        self.radius = radius
+        self.L = L
+        self.time = 0.0
+        self.t_last = np.zeros(self.n)
+        self.counts = np.zeros(self.n, dtype=np.int64)
+
+        # Statistics
+        self.wall_momentum = 0.0
+        self.wall_hits = 0
+        self.collisions = 0
+        self.cell_crossings = 0
+        self.events_processed = 0
+
+        # Cells hold about one particle, and are never narrower than a diameter
+        if radius > 0:
+            cell_size = max(2 * radius, L / np.sqrt(max(self.n, 1)))
+            self.n_cells = max(1, int(L // cell_size))
+        else:
+            self.n_cells = 1
+        self.cell_edge = L / self.n_cells
+        self.cell_of = np.clip(np.floor(self.pos / self.cell_edge).astype(np.int64), 0, self.n_cells - 1)
+        self.cells = [set() for _ in range(self.n_cells ** 2)]
+        for i, (ci, cj) in enumerate(self.cell_of.tolist()):
+            self.cells[ci * self.n_cells + cj].add(i)
+
+        self.queue = []
+        self._seq = itertools.count()
+        for i in range(self.n):
+            self._predict(i, only_higher=True)
+
+    def positions(self):
+        """Positions of all particles at the current time."""
+        return self.pos + self.vel * (self.time - self.t_last)[:, None]
+
+    def _sync(self, i, t):
+        self.pos[i] += self.vel[i] * (t - self.t_last[i])
+        self.t_last[i] = t
+
+    def _push(self, t, kind, i, other):
+        cj = int(self.counts[other]) if kind == self.PAIR else -1
+        heapq.heappush(self.queue, (t, next(self._seq), kind, i, other, int(self.counts[i]), cj))
+
+    def _neighbours(self, i):
+        ci, cj = self.cell_of[i].tolist()
+        found = []
+        for a in range(max(ci - 1, 0), min(ci + 2, self.n_cells)):
+            for b in range(max(cj - 1, 0), min(cj + 2, self.n_cells)):
+                found.extend(self.cells[a * self.n_cells + b])
+        return np.array(found, dtype=np.int64)
+
+    def _predict(self, i, only_higher=False):
+        t = self.time
+        x, v = self.pos[i], self.vel[i]
+        r, L = self.radius, self.L
+
+        # Wall and cell-crossing times (plain floats: this runs once per event)
+        for axis, (xa, va, cell) in enumerate(zip(x.tolist(), v.tolist(), self.cell_of[i].tolist())):
+            if va > 0:
+                self._push(t + (L - r - xa) / va, self.WALL, i, axis)
+                if cell < self.n_cells - 1:
+                    self._push(t + ((cell + 1) * self.cell_edge - xa) / va, self.CELL, i, 2 * axis + 1)
+            elif va < 0:
+                self._push(t + (r - xa) / va, self.WALL, i, axis)
+                if cell > 0:
+                    self._push(t + (cell * self.cell_edge - xa) / va, self.CELL, i, 2 * axis)
+
+        if r <= 0:
+            return
+        others = self._neighbours(i)
+        others = others[others > i] if only_higher else others[others != i]
+        if len(others) == 0:
+            return
+
+        # Closest approach of i with each neighbour (vectorized over neighbours)
+        lag = (t - self.t_last[others])[:, None]
+        dr = self.pos[others] + self.vel[others] * lag - x
+        dv = self.vel[others] - v
+        drx, dry = dr.T
+        dvx, dvy = dv.T
+        b = drx * dvx + dry * dvy
+        gap = drx * drx + dry * dry - 4 * r * r
+        disc = b * b - (dvx * dvx + dvy * dvy) * gap
+        hit = np.flatnonzero((b < 0) & (disc > 0))
+        if len(hit) == 0:
+            return
+        dt_hit = np.maximum(gap[hit], 0.0) / (np.sqrt(disc[hit]) - b[hit])
+        for j, dt in zip(others[hit].tolist(), dt_hit.tolist()):
+            self._push(t + dt, self.PAIR, i, j)
+
+    def advance(self, t_end):
+        """
+        Process every event up to t_end and move all particles to t_end.
+
+        Parameters:
+        - t_end: Target time (must not be earlier than the current time)
+        """
+        while self.queue and self.queue[0][0] <= t_end:
+            t, _, kind, i, other, ci, cj = heapq.heappop(self.queue)
+            if self.counts[i] != ci or (kind == self.PAIR and self.counts[other] != cj):
+                continue  # Stale prediction
+            self.events_processed += 1
+            self.time = t
+            self._sync(i, t)
+
+            if kind == self.WALL:
+                self.vel[i, other] = -self.vel[i, other]
+                self.wall_momentum += 2 * abs(self.vel[i, other])
+                self.wall_hits += 1
+                self.counts[i] += 1
+                self._predict(i)
+            elif kind == self.PAIR:
+                j = other
+                self._sync(j, t)
+                dr = self.pos[i] - self.pos[j]
+                impulse = (np.dot(self.vel[i] - self.vel[j], dr) / np.dot(dr, dr)) * dr
+                self.vel[i] -= impulse
+                self.vel[j] += impulse
+                self.collisions += 1
+                self.counts[i] += 1
+                self.counts[j] += 1
+                self._predict(i)
+                self._predict(j)
+            else:
+                axis, step = divmod(other, 2)
+                old = self.cell_of[i, 0] * self.n_cells + self.cell_of[i, 1]
+                self.cell_of[i, axis] += 1 if step else -1
+                self.cells[old].discard(i)
+                self.cells[self.cell_of[i, 0] * self.n_cells + self.cell_of[i, 1]].add(i)
+                self.cell_crossings += 1
+                self.counts[i] += 1
+                self._predict(i)
+
+        self.time = t_end
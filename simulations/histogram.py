@@ -0,0 +1,54 @@
+import numpy as np
+
+class HistogramAccumulator:
+    """
+    Fixed-bin histogram that accumulates samples frame by frame.
+
+    Each add() costs one bincount over the new samples; the bin edges never
+    change, so memory stays constant however long a run lasts and plots
+    only need their bar heights updated.
+    """
+
+    def __init__(self, lo, hi, bins):
+        """
+        Parameters:
+        - lo: Lower edge of the first bin
+        - hi: Upper edge of the last bin
+        - bins: Number of equal-width bins
+        """
+        self.lo = float(lo)
+        self.hi = float(hi)
+        self.bins = int(bins)
+        self.edges = np.linspace(self.lo, self.hi, self.bins + 1)
+        self.width = (self.hi - self.lo) / self.bins
+        self.centers = 0.5 * (self.edges[:-1] + self.edges[1:])
+        self.reset()
+
+    def reset(self):
+        self.total = np.zeros(self.bins)
+        self.instant = np.zeros(self.bins)
+        self.frames = 0
+        self.outside = 0
+
+    def add(self, values):
+        """
+        Bin one frame of samples (values outside [lo, hi] are only counted).
+
+        Parameters:
+        - values: Array of samples for this frame
+        """
+        values = np.asarray(values)
+        idx = np.floor((values - self.lo) / self.width).astype(np.int64)
+        # Samples exactly on the upper edge belong to the last bin
+        idx[values == self.hi] = self.bins - 1
+        inside = (idx >= 0) & (idx < self.bins)
+
+        self.instant = np.bincount(idx[inside], minlength=self.bins).astype(float)
+        self.total += self.instant
+        self.frames += 1
+        self.outside += int(values.size - np.count_nonzero(inside))
+
+    @property
+    def time_average(self):
+        """Counts per bin averaged over all frames added so far."""
+        return self.total / max(self.frames, 1)
@@ -0,0 +1,233 @@
+import numpy as np
+
+# Fourth-order Yoshida coefficients (drift weights C, kick weights D)
+_W1 = 1.0 / (2.0 - 2.0 ** (1.0 / 3.0))
+_W0 = -(2.0 ** (1.0 / 3.0)) * _W1
+YOSHIDA_C = (_W1 / 2.0, (_W0 + _W1) / 2.0, (_W0 + _W1) / 2.0, _W1 / 2.0)
+YOSHIDA_D = (_W1, _W0, _W1)
+
+def euler_step(positions, velocities, accel_fn, dt):
+    """
+    Advance one explicit Euler step in place (first order, not symplectic).
+
+    Parameters:
+    - positions: (N, D) array of positions, updated in place
+    - velocities: (N, D) array of velocities, updated in place
+    - accel_fn: Callable returning accelerations for given positions
+    - dt: Time step
+    """
+    velocities += accel_fn(positions) * dt
+    positions += velocities * dt
+
+def leapfrog_step(positions, velocities, accelerations, accel_fn, dt):
+    """
+    Advance one kick-drift-kick leapfrog (velocity Verlet) step in place.
+
+    Parameters:
+    - positions: (N, D) array of positions, updated in place
+    - velocities: (N, D) array of velocities, updated in place
+    - accelerations: Accelerations at the current positions
+    - accel_fn: Callable returning accelerations for given positions
+    - dt: Time step
+
+    Returns:
+    - accelerations: Accelerations at the new positions (reuse them as the
+      next step's input so each step costs one force evaluation)
+    """
+    velocities += 0.5 * dt * accelerations
+    positions += dt * velocities
+    accelerations = accel_fn(positions)
+    velocities += 0.5 * dt * accelerations
+    return accelerations
+
+def yoshida4_step(positions, velocities, accel_fn, dt):
+    """
+    Advance one fourth-order Yoshida (triple-jump leapfrog) step in place.
+
+    Costs three force evaluations per step.
+
+    Parameters:
+    - positions: (N, D) array of positions, updated in place
+    - velocities: (N, D) array of velocities, updated in place
+    - accel_fn: Callable returning accelerations for given positions
+    - dt: Time step
+    """
+    for c, d in zip(YOSHIDA_C[:3], YOSHIDA_D):
+        positions += c * dt * velocities
+        velocities += d * dt * accel_fn(positions)
+    positions += YOSHIDA_C[3] * dt * velocities
+
+def block_levels(accelerations, dt_max, eta, length_scale, max_level):
+    """
+    Assign power-of-two time-step levels from an acceleration criterion.
+
+    A body on level k steps with dt_max / 2**k; the level is the coarsest
+    one satisfying dt <= eta * sqrt(length_scale / |a|).
+
+    Parameters:
+    - accelerations: (N, D) array of accelerations
+    - dt_max: Largest (level 0) time step
+    - eta: Accuracy parameter of the time-step criterion
+    - length_scale: Length used in the criterion (e.g. the softening length)
+    - max_level: Finest allowed level
+
+    Returns:
+    - levels: (N,) integer array of levels in [0, max_level]
+    """
+    amag = np.linalg.norm(accelerations, axis=1)
+    with np.errstate(divide="ignore"):
+        dt_wanted = eta * np.sqrt(length_scale / amag)
+        levels = np.ceil(np.log2(dt_max / dt_wanted))
+    return np.clip(np.nan_to_num(levels, nan=0.0, neginf=0.0), 0, max_level).astype(np.int64)
+
+def block_leapfrog_step(positions, velocities, accelerations, levels, accel_fn, dt_max,
+                        level_fn, max_level):
+    """
+    Advance one hierarchical block time step of length dt_max in place.
+
+    The step is split into 2**max_level substeps. Every body is drifted on
+    each substep, but a body on level k is only kicked (and only has its
+    force recomputed) at the boundaries of its own step dt_max / 2**k, so
+    bodies in close encounters take small steps without forcing them on
+    the rest of the system. Levels may become finer at any of a body's
+    step boundaries and coarser only where the coarser grid is aligned.
+
+    Parameters:
+    - positions: (N, D) array of positions, updated in place
+    - velocities: (N, D) array of velocities, updated in place
+    - accelerations: (N, D) array of current accelerations, updated in place
+    - levels: (N,) integer array of current levels, updated in place
+    - accel_fn: Callable (positions, indices) returning accelerations of
+      the indexed bodies due to all bodies
+    - dt_max: Level-0 time step
+    - level_fn: Callable mapping accelerations to desired levels
+    - max_level: Finest allowed level
+
+    Returns:
+    - force_evaluations: Number of single-body force evaluations performed
+    """
+    n_sub = 1 << max_level
+    h = dt_max / n_sub
+    force_evaluations = 0
+
+    for s in range(n_sub):
+        period = np.left_shift(1, max_level - levels)
+        step = dt_max / np.left_shift(1, levels)
+
+        # Opening half kick for bodies whose step starts now
+        starting = (s % period) == 0
+        velocities[starting] += 0.5 * step[starting, None] * accelerations[starting]
+
+        positions += h * velocities
+
+        # Closing half kick with fresh forces for bodies whose step ends now
+        idx = np.flatnonzero(((s + 1) % period) == 0)
+        if len(idx) == 0:
+            continue
+        accelerations[idx] = accel_fn(positions, idx)
+        velocities[idx] += 0.5 * step[idx, None] * accelerations[idx]
+        force_evaluations += len(idx)
+
+        # Coarsest level whose step boundary coincides with substep s + 1
+        aligned = s + 1
+        trailing_zeros = (aligned & -aligned).bit_length() - 1
+        coarsest = max(0, max_level - trailing_zeros)
+        levels[idx] = np.maximum(level_fn(accelerations[idx]), coarsest)
+
+    return force_evaluations
+
+def boris_step(positions, velocities, E, B, q_over_m, dt):
+    """
+    Advance charged particles one Boris step in place.
+
+    Half an electric kick, a rotation about B, another half kick, then a
+    drift. The rotation preserves |v| exactly, so in a pure magnetic
+    field the kinetic energy is conserved to round-off however long the
+    run, and gyration, mirroring and drifts keep their correct phase
+    space structure.
+
+    Parameters:
+    - positions: (N, 3) array of positions, updated in place
+    - velocities: (N, 3) array of velocities, updated in place
+    - E: (N, 3) electric field at the positions (or broadcastable)
+    - B: (N, 3) magnetic field at the positions
+    - q_over_m: Charge-to-mass ratio (scalar or (N,) array)
+    - dt: Time step
+    """
+    h = 0.5 * dt * np.reshape(q_over_m, (-1, 1) if np.ndim(q_over_m) else ())
+    velocities += h * E
+    t = h * B
+    s = t * (2.0 / (1.0 + np.sum(t * t, axis=-1, keepdims=True)))
+    v_prime = velocities + _cross(velocities, t)
+    velocities += _cross(v_prime, s)
+    velocities += h * E
+    positions += dt * velocities
+
+def _cross(a, b):
+    """Row-wise cross product of (N, 3) arrays (np.cross is slow for many short vectors)."""
+    out = np.empty(np.broadcast_shapes(a.shape, b.shape))
+    out[..., 0] = a[..., 1] * b[..., 2] - a[..., 2] * b[..., 1]
+    out[..., 1] = a[..., 2] * b[..., 0] - a[..., 0] * b[..., 2]
+    out[..., 2] = a[..., 0] * b[..., 1] - a[..., 1] * b[..., 0]
+    return out
+
+def boris_trajectories(positions, velocities, field_fn, q_over_m, dt, steps, record_every=10,
+                       num_recorded=100, bounds=None, max_field=np.inf):
+    """
+    Push many charged particles with the Boris scheme and record a few paths.
+
+    All particles advance together, one field evaluation per step. The
+    paths of the first num_recorded particles are written every
+    record_every steps into a buffer allocated once up front, so memory
+    does not grow with the run length or the number of particles pushed.
+    Particles that leave the bounds, or reach a field stronger than
+    max_field (i.e. hit a wire or dipole), are stopped where they are.
+
+    Parameters:
+    - positions: (N, 3) array of positions, updated in place
+    - velocities: (N, 3) array of velocities, updated in place
+    - field_fn: Callable mapping (M, 3) positions to (E, B), each (M, 3)
+    - q_over_m: Charge-to-mass ratio (scalar or (N,) array)
+    - dt: Time step
+    - steps: Number of steps
+    - record_every: Steps between recorded points
+    - num_recorded: Number of particles whose paths are recorded
+    - bounds: (lo, hi) box; particles outside it are stopped
+    - max_field: Field magnitude at which particles are stopped
+
+    Returns:
+    - paths: (steps // record_every + 1, num_recorded, 3) float32 array
+    - alive: (N,) boolean array of particles still moving at the end
+    """
+    n = len(positions)
+    num_recorded = min(num_recorded, n)
+    paths = np.empty((steps // record_every + 1, num_recorded, 3), dtype=np.float32)
+    paths[0] = positions[:num_recorded]
+    alive = np.ones(n, dtype=bool)
+    per_particle = np.ndim(q_over_m) > 0
+
+    idx = np.arange(n)
+    x, v = positions.copy(), velocities.copy()
+    for step in range(1, steps + 1):
+        E, B = field_fn(x)
+        stopped = ~(np.linalg.norm(B, axis=-1) <= max_field)
+        boris_step(x, v, E, B, q_over_m[idx] if per_particle else q_over_m, dt)
+        if bounds is not None:
+            stopped |= np.any((x < bounds[0]) | (x > bounds[1]), axis=-1)
+
+        # Only the live particles are pushed; they are compacted when some stop
+        if np.any(stopped):
+            keep = ~stopped
+            alive[idx[stopped]] = False
+            positions[idx] = x
+            velocities[idx] = v
+            idx, x, v = idx[keep], x[keep], v[keep]
+        if step % record_every == 0:
+            positions[idx] = x
+            paths[step // record_every] = positions[:num_recorded]
+        if len(idx) == 0:
+            paths[step // record_every + 1:] = positions[:num_recorded]
+            break
+    positions[idx] = x
+    velocities[idx] = v
+    return paths, alive
@@ -0,0 +1,160 @@
+import numpy as np
+
+def linear_array(num_elements, spacing, center=(0.0, 0.0)):
+    """
+    Positions of a uniform linear array along the x axis.
+
+    Parameters:
+    - num_elements: Number of sources
+    - spacing: Distance between neighbouring sources
+    - center: (x, y) centre of the array
+
+    Returns:
+    - positions: (N, 2) array
+    """
+    offsets = (np.arange(num_elements) - (num_elements - 1) / 2) * spacing
+    return np.column_stack([offsets + center[0], np.full(num_elements, float(center[1]))])
+
+def steering_phases(positions, wavelength, angles):
+    """
+    Element phases that point the main beam at the given angles.
+
+    Angles are measured from the +y axis towards +x; each element is
+    delayed so all waves arrive in phase along that direction.
+
+    Parameters:
+    - positions: (N, 2) source positions
+    - wavelength: Wavelength
+    - angles: Steering angles in radians, scalar or (S,)
+
+    Returns:
+    - phases: (S, N) array (S = 1 for a scalar angle)
+    """
+    angles = np.atleast_1d(np.asarray(angles, dtype=float))
+    directions = np.column_stack([np.sin(angles), np.cos(angles)])
+    return 2 * np.pi / wavelength * directions @ np.asarray(positions, dtype=float).T
+
+def _weights(num_sources, amplitudes, phases):
+    """Complex (S, N) source weights a e^{iφ}; phases may hold S steering sets."""
+    phases = np.asarray(phases, dtype=float)
+    batched = phases.ndim == 2
+    phases = np.broadcast_to(phases, (len(phases) if batched else 1, num_sources))
+    amplitudes = np.broadcast_to(np.asarray(amplitudes, dtype=float), (num_sources,))
+    return (amplitudes * np.exp(1j * phases)).astype(np.complex64), batched
+
+def _tiles(positions, wavelength, points_x, points_y, weights, falloff, max_bytes):
+    """
+    Yields (start, stop, field) over the flattened points, tile by tile.
+
+    Each tile builds the (T, N) matrix of propagators e^{ikr} / r^falloff
+    in float32 once and multiplies it by the (N, S) weights, so every
+    steering set costs one complex matrix product on top of the shared
+    trigonometry. T is chosen so the tile's temporaries stay near
+    max_bytes however large the grid or array.
+    """
+    px = positions[:, 0].astype(np.float32)
+    py = positions[:, 1].astype(np.float32)
+    k = np.float32(2 * np.pi / wavelength)
+    n = len(px)
+    total = len(points_x)
+    # Two float32 (T, N) buffers plus the complex64 propagators, reused by every tile
+    tile = max(1, min(total, int(max_bytes // (16 * n))))
+    r = np.empty((tile, n), dtype=np.float32)
+    work = np.empty((tile, n), dtype=np.float32)
+    propagator = np.empty((tile, n), dtype=np.complex64)
+    weights_t = np.ascontiguousarray(weights.T)
+    for start in range(0, total, tile):
+        stop = min(start + tile, total)
+        m = stop - start
+        r_t, work_t, propagator_t = r[:m], work[:m], propagator[:m]
+        np.subtract(points_x[start:stop, None], px, out=r_t)
+        r_t *= r_t
+        np.subtract(points_y[start:stop, None], py, out=work_t)
+        work_t *= work_t
+        r_t += work_t
+        np.sqrt(r_t, out=r_t)
+        np.multiply(r_t, k, out=work_t)
+        np.cos(work_t, out=propagator_t.real)
+        np.sin(work_t, out=propagator_t.imag)
+        if falloff:
+            # Amplitude spreading 1 / r^falloff (0.5 for cylindrical, 1 for spherical waves)
+            np.maximum(r_t, np.float32(1e-3 * wavelength), out=r_t)
+            np.power(r_t, np.float32(-falloff), out=r_t)
+            propagator_t *= r_t
+        yield start, stop, propagator_t @ weights_t
+
+def _grid_points(x, y):
+    x = np.asarray(x, dtype=np.float32)
+    y = np.asarray(y, dtype=np.float32)
+    return np.tile(x, len(y)), np.repeat(y, len(x)), (len(y), len(x))
+
+def array_field(positions, wavelength, x, y, amplitudes=1.0, phases=0.0, falloff=0.0, max_bytes=2**22):
+    """
+    Complex field of N coherent point sources on a grid, in float32 tiles.
+
+    Parameters:
+    - positions: (N, 2) source positions
+    - wavelength: Wavelength of all sources
+    - x, y: 1D grid coordinates
+    - amplitudes: Scalar or (N,) source amplitudes
+    - phases: Scalar, (N,) phases, or (S, N) for S steering sets evaluated together
+    - falloff: Amplitude decays as 1 / r^falloff (0 = plane-wave-like, as in the two-source sketch)
+    - max_bytes: Approximate memory used for temporaries per tile
+
+    Returns:
+    - field: complex64 array, (ny, nx) or (S, ny, nx) for batched phases
+    """
+    positions = np.asarray(positions, dtype=float).reshape(-1, 2)
+    weights, batched = _weights(len(positions), amplitudes, phases)
+    points_x, points_y, shape = _grid_points(x, y)
+    field = np.empty((len(weights), len(points_x)), dtype=np.complex64)
+    for start, stop, tile in _tiles(positions, wavelength, points_x, points_y, weights, falloff, max_bytes):
+        field[:, start:stop] = tile.T
+    field = field.reshape((len(weights),) + shape)
+    return field if batched else field[0]
+
+def array_intensity(positions, wavelength, x, y, amplitudes=1.0, phases=0.0, falloff=0.0, max_bytes=2**22):
+    """
+    Intensity |E|² of N coherent point sources on a grid.
+
+    Same as array_field, but only the float32 intensity of each tile is
+    kept, which halves the output for large screens and batched steering.
+
+    Returns:
+    - intensity: float32 array, (ny, nx) or (S, ny, nx) for batched phases
+    """
+    positions = np.asarray(positions, dtype=float).reshape(-1, 2)
+    weights, batched = _weights(len(positions), amplitudes, phases)
+    points_x, points_y, shape = _grid_points(x, y)
+    intensity = np.empty((len(weights), len(points_x)), dtype=np.float32)
+    for start, stop, tile in _tiles(positions, wavelength, points_x, points_y, weights, falloff, max_bytes):
+        intensity[:, start:stop] = (tile.real**2 + tile.imag**2).T
+    intensity = intensity.reshape((len(weights),) + shape)
+    return intensity if batched else intensity[0]
+
+def beam_pattern(positions, wavelength, angles, amplitudes=1.0, phases=0.0):
+    """
+    Far-field (r → ∞) intensity versus direction, for one or many steering sets.
+
+    This is the array factor |Σ a e^{i(φ - k û·p)}|²: each source's path
+    to a distant point is shorter by û·p. It does not depend on where the
+    array sits, unlike sampling the field on a finite arc, which only
+    approaches it beyond about 2 D² / λ for an array of length D.
+
+    Parameters:
+    - positions: (N, 2) source positions
+    - wavelength: Wavelength
+    - angles: (A,) directions from +y towards +x, in radians
+    - amplitudes, phases: As for array_field
+
+    Returns:
+    - intensity: (A,) or (S, A) float32 array
+    """
+    positions = np.asarray(positions, dtype=float).reshape(-1, 2)
+    weights, batched = _weights(len(positions), amplitudes, phases)
+    angles = np.asarray(angles, dtype=float)
+    directions = np.column_stack([np.sin(angles), np.cos(angles)])
+    propagators = np.exp(-2j * np.pi / wavelength * directions @ positions.T)
+    field = weights.astype(np.complex128) @ propagators.T
+    intensity = (field.real**2 + field.imag**2).astype(np.float32)
+    return intensity if batched else intensity[0]
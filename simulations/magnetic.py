@@ -0,0 +1,383 @@
+import functools
+import threading
+
+import numpy as np
+from scipy.special import ellipe, ellipk
+
+MU0 = 4 * np.pi * 1e-7  # magnetic permeability of free space
+
+def _coordinates(x, y, z, origin):
+    """Broadcast x, y, z to one shape and return them relative to origin."""
+    x, y, z = np.broadcast_arrays(np.asarray(x, dtype=float), np.asarray(y, dtype=float),
+                                  np.asarray(z, dtype=float))
+    origin = list(origin) + [0.0] * (3 - len(origin))
+    return x - origin[0], y - origin[1], z - origin[2]
+
+def magnetic_field_of_wire(x, y, z, current, wire_pos):
+    """
+    Magnetic field of an infinite straight wire along z through wire_pos.
+
+    x, y, z may be scalars or arrays of any (broadcastable) shape, e.g. 2D
+    meshgrids or 3D volumes.
+
+    Returns:
+    - B: array of shape broadcast(x, y, z).shape + (3,)
+    """
+    dx, dy, _ = _coordinates(x, y, z, wire_pos[:2])
+    r2 = dx**2 + dy**2
+
+    # Magnitude μ0 I / (2π r) along the direction ẑ × r̂, zero on the wire itself
+    with np.errstate(divide="ignore", invalid="ignore"):
+        scale = np.where(r2 < 1e-20, 0.0, MU0 * current / (2 * np.pi * r2))
+    return np.stack([-dy * scale, dx * scale, np.zeros_like(dx)], axis=-1)
+
+def loop_field_exact(rho, z):
+    """
+    Exact field of a unit circular loop, in units of μ0 I / a.
+
+    The loop has radius a = 1 and lies in the plane z = 0 around the z-axis.
+    Uses the complete elliptic integrals K(m) and E(m) with
+    m = 1 - α² / β², α² = 1 + ρ² + z² - 2ρ and β² = 1 + ρ² + z² + 2ρ.
+
+    Parameters:
+    - rho: Cylindrical radius ρ / a (array)
+    - z: Axial coordinate z / a (array, same shape)
+
+    Returns:
+    - b_rho, b_z: Radial and axial field components (0 on the wire itself)
+    """
+    rho = np.asarray(rho, dtype=float)
+    z = np.asarray(z, dtype=float)
+    s = 1.0 + rho**2 + z**2
+    alpha2 = s - 2 * rho
+    beta2 = s + 2 * rho
+    on_wire = alpha2 < 1e-20
+    alpha2 = np.where(on_wire, 1.0, alpha2)
+    beta = np.sqrt(beta2)
+    m = 1.0 - alpha2 / beta2
+    K = ellipk(m)
+    E = ellipe(m)
+
+    b_z = ((1.0 - rho**2 - z**2) * E + alpha2 * K) / (2 * np.pi * alpha2 * beta)
+    # The radial formula is 0/0 on the axis; use its leading term (3/4) z ρ / (1 + z²)^(5/2) there
+    near_axis = rho < 1e-6
+    safe_rho = np.where(near_axis, 1.0, rho)
+    b_rho = np.where(near_axis, 0.75 * z * rho / (1.0 + z**2)**2.5,
+                     z * ((1.0 + rho**2 + z**2) * E - alpha2 * K) / (2 * np.pi * alpha2 * beta * safe_rho))
+    b_rho = np.where(on_wire, 0.0, b_rho)
+    b_z = np.where(on_wire, 0.0, b_z)
+    return b_rho, b_z
+
+def coil_field_exact(rho, z, length=0.0, turns=1):
+    """
+    Exact field of `turns` coaxial unit loops spread evenly over `length`.
+
+    Same units as loop_field_exact (lengths in loop radii, field in
+    μ0 I / a); a single loop is length 0, turns 1.
+
+    Returns:
+    - b_rho, b_z: Radial and axial field components
+    """
+    rho, z = np.broadcast_arrays(np.asarray(rho, dtype=float), np.asarray(z, dtype=float))
+    offsets = np.linspace(-length / 2, length / 2, turns) if turns > 1 else np.zeros(1)
+    b_rho = np.zeros(rho.shape)
+    b_z = np.zeros(rho.shape)
+    # The loops share ρ, so only the axial offset changes from turn to turn; several
+    # turns are evaluated per pass so that small batches of points stay vectorized
+    chunk = max(1, 2**16 // max(rho.size, 1))
+    for start in range(0, len(offsets), chunk):
+        shift = offsets[start:start + chunk].reshape((-1,) + (1,) * rho.ndim)
+        br, bz = loop_field_exact(rho, z - shift)
+        b_rho += br.sum(axis=0)
+        b_z += bz.sum(axis=0)
+    return b_rho, b_z
+
+class LoopFieldTable:
+    """
+    Precomputed field of a loop or coil on a (ρ/a, |z|/a) grid with bilinear lookup.
+
+    The field of a coil of radius a scales as μ0 I / a times a function of
+    ρ/a and z/a only, so one table serves every radius, position and
+    current of a coil with the same shape (length / a and number of turns).
+    A solenoid of hundreds of turns then costs one interpolation per point
+    instead of one elliptic-integral evaluation per point and turn.
+
+    Points outside the table, or within two cells of the winding where the
+    field varies too fast to interpolate, fall back to coil_field_exact.
+    """
+
+    def __init__(self, extent=4.0, resolution=257, length=0.0, turns=1):
+        """
+        Parameters:
+        - extent: Table covers 0 <= ρ/a, |z|/a <= extent
+        - resolution: Grid points per axis
+        - length: Coil length in loop radii (0 for a single loop)
+        - turns: Number of loops in the coil
+        """
+        self.extent = float(extent)
+        self.resolution = int(resolution)
+        self.length = float(length)
+        self.turns = int(turns)
+        self.step = self.extent / (self.resolution - 1)
+        grid = np.linspace(0.0, self.extent, self.resolution)
+        R, Z = np.meshgrid(grid, grid, indexing="ij")
+        b_rho, b_z = self.exact(R, Z)
+        self._tables = (b_rho.ravel(), b_z.ravel())
+
+    def exact(self, rho, z):
+        """Exact coil field at ρ/a = rho, z/a = z."""
+        return coil_field_exact(rho, z, self.length, self.turns)
+
+    def __call__(self, rho, z):
+        """Field (b_rho, b_z) in units of μ0 I / a at ρ/a = rho, z/a = z."""
+        rho, z = np.broadcast_arrays(np.asarray(rho, dtype=float), np.asarray(z, dtype=float))
+        az = np.abs(z)
+        n = self.resolution
+        u = rho * (1.0 / self.step)
+        v = az * (1.0 / self.step)
+        margin = 2 * self.step
+        exact = ((u >= n - 1) | (v >= n - 1)
+                 | ((np.abs(rho - 1.0) < margin) & (az < self.length / 2 + margin)))
+        u[exact] = 0.0
+        v[exact] = 0.0
+
+        i = u.astype(np.intp)
+        j = v.astype(np.intp)
+        fu = u - i
+        fv = v - j
+        k = i * n + j
+        b = []
+        for table in self._tables:
+            c00, c10 = table[k], table[k + n]
+            c01, c11 = table[k + 1], table[k + n + 1]
+            lo = c00 + (c10 - c00) * fu
+            hi = c01 + (c11 - c01) * fu
+            b.append(lo + (hi - lo) * fv)
+
+        # The coil is symmetric about z = 0: b_rho is odd in z, b_z even
+        b_rho, b_z = b
+        np.negative(b_rho, out=b_rho, where=z < 0)
+        if np.any(exact):
+            b_rho[exact], b_z[exact] = self.exact(rho[exact], z[exact])
+        return b_rho, b_z
+
+@functools.lru_cache(maxsize=8)
+def loop_field_table(extent=4.0, resolution=257, length=0.0, turns=1):
+    """Shared LoopFieldTable, built once per coil shape and table size."""
+    return LoopFieldTable(extent, resolution, length, turns)
+
+def _coil_field(x, y, z, current, center, radius, length, turns, tabulated):
+    """Cartesian field of a coil along z, exact or from a cached table."""
+    dx, dy, dz = _coordinates(x, y, z, center)
+    rho = np.sqrt(dx**2 + dy**2) / radius
+    zn = dz / radius
+    length = length / radius
+    if tabulated:
+        # Power-of-two extents so that nearby views share one table
+        reach = max(float(rho.max(initial=0.0)), float(np.abs(zn).max(initial=0.0)), 1.0)
+        extent = 2.0 ** np.ceil(np.log2(reach * 1.01))
+        b_rho, b_z = loop_field_table(extent, length=length, turns=turns)(rho, zn)
+    else:
+        b_rho, b_z = coil_field_exact(rho, zn, length, turns)
+
+    scale = MU0 * current / radius
+    b_rho = scale * np.divide(b_rho, rho * radius, out=np.zeros_like(b_rho), where=rho > 0)
+    return np.stack([b_rho * dx, b_rho * dy, scale * b_z], axis=-1)
+
+def magnetic_field_of_loop(x, y, z, current, loop_center, radius, tabulated=False):
+    """
+    Magnetic field of a circular current loop in the xy-plane.
+
+    Exact everywhere (complete elliptic integrals). x, y, z may be scalars
+    or arrays of any (broadcastable) shape.
+
+    Parameters:
+    - tabulated: Interpolate a cached LoopFieldTable instead of evaluating
+      K and E at every point
+
+    Returns:
+    - B: array of shape broadcast(x, y, z).shape + (3,)
+    """
+    return _coil_field(x, y, z, current, loop_center, radius, 0.0, 1, tabulated)
+
+def magnetic_field_of_solenoid(x, y, z, current, center, radius, length, turns, tabulated=False):
+    """
+    Magnetic field of a solenoid along z, modelled as `turns` coaxial loops.
+
+    Parameters:
+    - current: Current in each turn
+    - center: (x, y, z) centre of the coil
+    - radius: Coil radius
+    - length: Coil length along z
+    - turns: Number of loops, evenly spaced over the length
+    - tabulated: Interpolate a cached LoopFieldTable of the whole coil,
+      built once per (length / radius, turns)
+
+    Returns:
+    - B: array of shape broadcast(x, y, z).shape + (3,)
+    """
+    return _coil_field(x, y, z, current, center, radius, length, turns, tabulated)
+
+def segment_field(points, starts, ends):
+    """
+    Field per unit current of straight segments, summed over the segments.
+
+    Uses the closed form for a finite straight segment from A to B,
+    B = μ0 / (4π) (|a| + |b|) / (|a||b| (|a||b| + a·b)) (a × b),
+    with a = P - A and b = P - B. Points on a segment's line, within or
+    beyond its ends, get no contribution from that segment.
+
+    Parameters:
+    - points: (M, 3) target points
+    - starts, ends: (S, 3) segment endpoints
+
+    Returns:
+    - B: (M, 3) field for a current of 1 A
+    """
+    ax = points[:, 0, None] - starts[None, :, 0]
+    ay = points[:, 1, None] - starts[None, :, 1]
+    az = points[:, 2, None] - starts[None, :, 2]
+    bx = points[:, 0, None] - ends[None, :, 0]
+    by = points[:, 1, None] - ends[None, :, 1]
+    bz = points[:, 2, None] - ends[None, :, 2]
+    ra = np.sqrt(ax * ax + ay * ay + az * az)
+    rb = np.sqrt(bx * bx + by * by + bz * bz)
+    rab = ra * rb
+    denominator = rab * (rab + ax * bx + ay * by + az * bz)
+    # Relative cut-off: the denominator vanishes on the segment's line
+    scale = np.divide(ra + rb, denominator, out=np.zeros_like(ra),
+                      where=denominator > 1e-12 * rab * rab)
+    return MU0 / (4 * np.pi) * np.stack([((ay * bz - az * by) * scale).sum(axis=1),
+                                         ((az * bx - ax * bz) * scale).sum(axis=1),
+                                         ((ax * by - ay * bx) * scale).sum(axis=1)], axis=-1)
+
+class BiotSavart:
+    """
+    Field of arbitrary polyline conductors by segment-wise Biot–Savart sums.
+
+    Each path is a sequence of vertices joined by straight segments whose
+    fields are integrated exactly. Evaluation works through blocks of at
+    most `block_pairs` (point, segment) pairs, so memory stays bounded
+    however many points and segments there are: 10⁴ segments × 10⁶ points
+    runs in a few tens of MB.
+
+    The field scales linearly with each path's current, so the
+    unit-current field of every path is cached for the last set of target
+    points; calling field() again with new currents only rescales it. The
+    cache is safe to share between threads (e.g. one engine cached for all
+    sessions of an app).
+    """
+
+    def __init__(self, paths, closed=False, block_pairs=2**16):
+        """
+        Parameters:
+        - paths: List of (n, 3) vertex arrays, one per conductor
+        - closed: Whether each path returns to its first vertex (bool or one per path)
+        - block_pairs: Maximum (point, segment) pairs evaluated at once
+        """
+        if isinstance(closed, bool):
+            closed = [closed] * len(paths)
+        self.segments = []
+        for path, close in zip(paths, closed):
+            path = np.asarray(path, dtype=float).reshape(-1, 3)
+            if close:
+                path = np.vstack([path, path[:1]])
+            if len(path) < 2:
+                raise ValueError("Each wire path needs at least two vertices.")
+            self.segments.append((path[:-1].copy(), path[1:].copy()))
+        self.block_pairs = int(block_pairs)
+        # (key, read-only unit fields) of the last points, swapped as one tuple under the lock
+        self._cache = (None, None)
+        self._lock = threading.Lock()
+
+    @property
+    def num_segments(self):
+        return sum(len(starts) for starts, _ in self.segments)
+
+    def _path_field(self, points, starts, ends):
+        """Unit-current field of one path at (M, 3) points, block by block."""
+        B = np.zeros((len(points), 3))
+        segment_chunk = max(1, min(len(starts), self.block_pairs))
+        point_chunk = max(1, self.block_pairs // segment_chunk)
+        for p0 in range(0, len(points), point_chunk):
+            block = points[p0:p0 + point_chunk]
+            for s0 in range(0, len(starts), segment_chunk):
+                B[p0:p0 + point_chunk] += segment_field(block, starts[s0:s0 + segment_chunk],
+                                                        ends[s0:s0 + segment_chunk])
+        return B
+
+    def unit_fields(self, points):
+        """
+        Unit-current field of every path, cached for the last points given.
+
+        Parameters:
+        - points: (..., 3) target points
+
+        Returns:
+        - B: array of shape (num_paths,) + points.shape
+        """
+        points = np.asarray(points, dtype=float)
+        key = (points.shape, hash(points.tobytes()))
+        with self._lock:
+            cached_key, unit = self._cache
+        if cached_key == key:
+            return unit
+        # Evaluated outside the lock so other grids are not held up meanwhile
+        flat = points.reshape(-1, 3)
+        unit = np.stack([self._path_field(flat, starts, ends).reshape(points.shape)
+                         for starts, ends in self.segments])
+        unit.setflags(write=False)
+        with self._lock:
+            self._cache = (key, unit)
+        return unit
+
+    def field(self, points, currents=1.0):
+        """
+        Total field at the points for the given currents.
+
+        Parameters:
+        - points: (..., 3) target points
+        - currents: One current for all paths, or one per path
+
+        Returns:
+        - B: array of the same shape as points
+        """
+        currents = np.broadcast_to(np.asarray(currents, dtype=float), (len(self.segments),))
+        return np.tensordot(currents, self.unit_fields(points), axes=1)
+
+def helix(radius, length, turns, center=(0.0, 0.0, 0.0), points_per_turn=64):
+    """
+    Vertices of a helical coil along z.
+
+    Returns:
+    - path: (turns * points_per_turn + 1, 3) array
+    """
+    t = np.linspace(0.0, 2 * np.pi * turns, int(turns * points_per_turn) + 1)
+    z = np.linspace(-length / 2, length / 2, len(t))
+    return np.column_stack([radius * np.cos(t), radius * np.sin(t), z]) + np.asarray(center, dtype=float)
+
+def magnetic_field_of_bar_magnet(x, y, z, magnet_center, magnet_length, magnet_strength):
+    """
+    Magnetic field of a bar magnet along z, in the point-dipole approximation.
+
+    x, y, z may be scalars or arrays of any (broadcastable) shape.
+
+    Returns:
+    - B: array of shape broadcast(x, y, z).shape + (3,)
+    """
+    dx, dy, dz = _coordinates(x, y, z, magnet_center)
+    r2 = dx**2 + dy**2 + dz**2
+
+    # Dipole moment m ẑ: B = μ0 / (4π r⁵) (3 r (m·r) - r² m)
+    m = magnet_strength * magnet_length
+    with np.errstate(divide="ignore", invalid="ignore"):
+        constant = np.where(r2 < 1e-20, 0.0, MU0 / (4 * np.pi * r2**2.5))
+    m_dot_r = m * dz
+    return np.stack([constant * 3 * dx * m_dot_r,
+                     constant * 3 * dy * m_dot_r,
+                     constant * (3 * dz * m_dot_r - r2 * m)], axis=-1)
+
+def normalize(B):
+    """Unit vectors along the last axis of B (zero where B is zero)."""
+    magnitude = np.linalg.norm(B, axis=-1, keepdims=True)
+    return np.divide(B, magnitude, out=np.zeros_like(B), where=magnitude > 0)
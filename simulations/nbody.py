@@ -0,0 +1,280 @@
+import numpy as np
+import time
+from simulations.quadtree import QuadTree
+
+def direct_accelerations(positions, masses, G=1.0, softening=0.0, tile_size=512, targets=None):
+    """
+    Compute gravitational accelerations by direct pairwise summation.
+
+    The N x N interaction matrix is evaluated in row tiles so the
+    temporaries never exceed tile_size x N entries per component.
+
+    Parameters:
+    - positions: (N, 2) array of body positions
+    - masses: (N,) array of body masses
+    - G: Gravitational constant
+    - softening: Plummer softening length (0 disables softening)
+    - tile_size: Number of target bodies evaluated per block
+    - targets: Optional indices of the bodies to evaluate (default: all)
+
+    Returns:
+    - accelerations: (N, 2) array of accelerations, or (len(targets), 2)
+      when targets is given
+    """
+    positions = np.asarray(positions, dtype=float)
+    masses = np.asarray(masses, dtype=float)
+    tile_size = max(1, int(tile_size))
+    eps2 = softening ** 2
+
+    x = positions[:, 0]
+    y = positions[:, 1]
+    tx = x if targets is None else x[targets]
+    ty = y if targets is None else y[targets]
+    n = len(tx)
+    accelerations = np.zeros((n, 2))
+
+    for start in range(0, n, tile_size):
+        stop = min(start + tile_size, n)
+
+        # Separation vectors from each target body i to every source body j
+        dx = x[None, :] - tx[start:stop, None]
+        dy = y[None, :] - ty[start:stop, None]
+        r2 = dx * dx + dy * dy + eps2
+
+        # 1 / r^3 weights; coincident bodies (including i == j) contribute nothing
+        with np.errstate(divide="ignore"):
+            inv_r3 = r2 ** -1.5
+        inv_r3[r2 == 0] = 0.0
+        inv_r3 *= masses[None, :]
+
+        accelerations[start:stop, 0] = np.einsum("ij,ij->i", dx, inv_r3)
+        accelerations[start:stop, 1] = np.einsum("ij,ij->i", dy, inv_r3)
+
+    return G * accelerations
+
+def potential_energy(positions, masses, G=1.0, softening=0.0, tile_size=512, sample=None):
+    """
+    Compute the total (Plummer-softened) gravitational potential energy.
+
+    With sample, only the potentials of the sampled bodies (against all
+    bodies) are summed and scaled up by N / len(sample), an unbiased
+    estimate that costs O(len(sample) N) instead of O(N^2). Keeping the
+    same sample between calls makes the estimates comparable over time.
+
+    Parameters:
+    - positions: (N, 2) array of body positions
+    - masses: (N,) array of body masses
+    - G: Gravitational constant
+    - softening: Plummer softening length
+    - tile_size: Number of bodies evaluated per block
+    - sample: Optional indices of the bodies whose potentials are summed (default: all)
+
+    Returns:
+    - energy: Potential energy summed over distinct pairs
+    """
+    positions = np.asarray(positions, dtype=float)
+    masses = np.asarray(masses, dtype=float)
+    rows = np.arange(len(positions)) if sample is None else np.asarray(sample)
+    n = len(rows)
+    eps2 = softening ** 2
+    energy = 0.0
+
+    for start in range(0, n, tile_size):
+        stop = min(start + tile_size, n)
+        block = rows[start:stop]
+        dx = positions[None, :, 0] - positions[block, None, 0]
+        dy = positions[None, :, 1] - positions[block, None, 1]
+        r2 = dx * dx + dy * dy + eps2
+        with np.errstate(divide="ignore"):
+            inv_r = 1.0 / np.sqrt(r2)
+        # Drop the self-pairs i == j (r2 is eps2, not 0, when softened) and coincident bodies
+        inv_r[np.arange(stop - start), block] = 0.0
+        inv_r[r2 == 0] = 0.0
+        energy -= masses[block] @ inv_r @ masses
+
+    # Every pair was counted twice
+    return 0.5 * G * energy * len(positions) / max(n, 1)
+
+def conserved_quantities(positions, velocities, masses, G=1.0, softening=0.0, tile_size=512, sample=None):
+    """
+    Compute total energy and linear momentum of the system.
+
+    Parameters:
+    - positions: (N, 2) array of body positions
+    - velocities: (N, 2) array of body velocities
+    - masses: (N,) array of body masses
+    - G: Gravitational constant
+    - softening: Plummer softening length
+    - tile_size: Number of bodies per block in the potential sum
+    - sample: Optional indices of the bodies used to estimate the potential (see potential_energy)
+
+    Returns:
+    - energy: Kinetic plus potential energy
+    - momentum: (2,) total linear momentum
+    """
+    kinetic = 0.5 * np.sum(masses * np.einsum("ij,ij->i", velocities, velocities))
+    potential = potential_energy(positions, masses, G=G, softening=softening, tile_size=tile_size,
+                                 sample=sample)
+    momentum = masses @ velocities
+    return kinetic + potential, momentum
+
+def barnes_hut_accelerations(positions, masses, G=1.0, softening=0.0, theta=0.5,
+                             leaf_size=8, chunk_size=4096, targets=None):
+    """
+    Compute gravitational accelerations with a Barnes-Hut quadtree.
+
+    The tree is walked once per leaf (group) rather than once per body:
+    a node is replaced by its total mass at its centre of mass when its
+    side length s and the distance d from that centre to the group's cell
+    satisfy s / d < theta and the two cells do not overlap; otherwise it
+    is opened. Leaves that are never accepted are summed directly. The
+    whole frontier of (group, node) pairs advances one level per pass,
+    for chunks of roughly chunk_size target bodies at a time.
+
+    With targets (e.g. the active bodies of a block time step) the tree is
+    still built over all bodies, but only the leaves holding targets are
+    walked and only the targets accumulate forces.
+
+    Parameters:
+    - positions: (N, 2) array of body positions
+    - masses: (N,) array of body masses
+    - G: Gravitational constant
+    - softening: Plummer softening length (0 disables softening)
+    - theta: Opening angle (0 reproduces direct summation)
+    - leaf_size: Maximum number of bodies in a tree leaf
+    - chunk_size: Approximate number of target bodies handled per pass
+    - targets: Optional indices of the bodies to evaluate (default: all)
+
+    Returns:
+    - accelerations: (N, 2) array of accelerations, or (len(targets), 2)
+      when targets is given
+    """
+    positions = np.asarray(positions, dtype=float)
+    tree = QuadTree(positions, masses, leaf_size=leaf_size)
+    n = len(positions)
+    eps2 = softening ** 2
+    theta2 = theta ** 2
+
+    # Work in the tree's sorted order and scatter back at the end
+    pos = tree.positions
+    acc = np.zeros((n, 2))
+
+    def accumulate(tgt, d, m):
+        r2 = np.einsum("ij,ij->i", d, d) + eps2
+        with np.errstate(divide="ignore"):
+            w = m * r2 ** -1.5
+        w[r2 == 0] = 0.0
+        acc[:, 0] += np.bincount(tgt, weights=w * d[:, 0], minlength=n)
+        acc[:, 1] += np.bincount(tgt, weights=w * d[:, 1], minlength=n)
+
+    leaves = np.flatnonzero(tree.child_count == 0)
+    is_target = None
+    if targets is not None:
+        # Sorted-order index of every target, and the leaves that hold them
+        rank = np.empty(n, dtype=np.int64)
+        rank[tree.order] = np.arange(n)
+        target_rank = rank[np.asarray(targets, dtype=np.int64)]
+        is_target = np.zeros(n, dtype=bool)
+        is_target[target_rank] = True
+        leaves = leaves[np.argsort(tree.start[leaves])]
+        leaf_of = np.repeat(leaves, tree.end[leaves] - tree.start[leaves])
+        leaves = np.unique(leaf_of[target_rank])
+    leaves_per_chunk = max(1, chunk_size // tree.leaf_size)
+
+    for first in range(0, len(leaves), leaves_per_chunk):
+        groups = leaves[first:first + leaves_per_chunk]
+        g_lo = tree.node_lo[groups]
+        g_hi = g_lo + tree.node_size[groups][:, None]
+
+        g = np.arange(len(groups))
+        node = np.zeros(len(groups), dtype=np.int64)
+        far_pairs, near_pairs = [], []
+
+        while len(g):
+            lo = tree.node_lo[node]
+            hi = lo + tree.node_size[node][:, None]
+            center = tree.node_center[node]
+
+            # Distance from the node's centre of mass to the group's cell
+            gap = np.maximum(g_lo[g] - center, 0) + np.maximum(center - g_hi[g], 0)
+            dmin2 = np.einsum("ij,ij->i", gap, gap)
+            overlap = np.all((lo < g_hi[g]) & (g_lo[g] < hi), axis=1)
+
+            leaf = tree.is_leaf(node)
+            accept = ~overlap & (tree.node_size[node] ** 2 < theta2 * dmin2)
+            direct = leaf & ~accept
+            opened = ~leaf & ~accept
+
+            far_pairs.append((g[accept], node[accept]))
+            near_pairs.append((g[direct], node[direct]))
+
+            rep, kids = tree.children(node[opened])
+            g = g[opened][rep]
+            node = kids
+
+        # Monopole approximation for every body of a group against accepted nodes
+        fg = np.concatenate([p[0] for p in far_pairs])
+        fn = np.concatenate([p[1] for p in far_pairs])
+        rep, tgt = tree.members(groups[fg])
+        if is_target is not None:
+            keep = is_target[tgt]
+            rep, tgt = rep[keep], tgt[keep]
+        src = fn[rep]
+        accumulate(tgt, tree.node_center[src] - pos[tgt], tree.node_weight[src])
+
+        # Direct summation between the bodies of a group and its nearby leaves
+        ng = np.concatenate([p[0] for p in near_pairs])
+        nn = np.concatenate([p[1] for p in near_pairs])
+        rep, tgt = tree.members(groups[ng])
+        if is_target is not None:
+            keep = is_target[tgt]
+            rep, tgt = rep[keep], tgt[keep]
+        rep2, src = tree.members(nn[rep])
+        tgt = tgt[rep2]
+        accumulate(tgt, pos[src] - pos[tgt], tree.weights[src])
+
+    if targets is not None:
+        return G * acc[target_rank]
+    out = np.empty_like(acc)
+    out[tree.order] = acc
+    return G * out
+
+def compare_force_backends(positions, masses, thetas=(0.3, 0.5, 0.8), G=1.0, softening=0.0,
+                           leaf_size=8, tile_size=512):
+    """
+    Measure Barnes-Hut accuracy and speed against direct summation.
+
+    Parameters:
+    - positions: (N, 2) array of body positions
+    - masses: (N,) array of body masses
+    - thetas: Opening angles to evaluate
+    - G: Gravitational constant
+    - softening: Plummer softening length
+    - leaf_size: Maximum number of bodies in a tree leaf
+    - tile_size: Bodies per block in the direct kernel
+
+    Returns:
+    - rows: List of dicts with timings and relative force errors per theta
+    """
+    start = time.perf_counter()
+    reference = direct_accelerations(positions, masses, G=G, softening=softening, tile_size=tile_size)
+    direct_time = time.perf_counter() - start
+    ref_norm = np.linalg.norm(reference, axis=1)
+    ref_norm[ref_norm == 0] = 1.0
+
+    rows = []
+    for theta in thetas:
+        start = time.perf_counter()
+        approx = barnes_hut_accelerations(positions, masses, G=G, softening=softening,
+                                          theta=theta, leaf_size=leaf_size)
+        tree_time = time.perf_counter() - start
+        error = np.linalg.norm(approx - reference, axis=1) / ref_norm
+        rows.append({
+            "theta": theta,
+            "direct_time_s": direct_time,
+            "tree_time_s": tree_time,
+            "speedup": direct_time / tree_time if tree_time > 0 else np.inf,
+            "median_rel_error": float(np.median(error)),
+            "p99_rel_error": float(np.percentile(error, 99)),
+        })
+    return rows
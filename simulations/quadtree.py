@@ -0,0 +1,183 @@
+import numpy as np
+
+def _spread_bits(v):
+    """Insert a zero bit between each of the low 32 bits of v (uint64)."""
+    v = v.astype(np.uint64) & np.uint64(0xFFFFFFFF)
+    v = (v | (v << np.uint64(16))) & np.uint64(0x0000FFFF0000FFFF)
+    v = (v | (v << np.uint64(8))) & np.uint64(0x00FF00FF00FF00FF)
+    v = (v | (v << np.uint64(4))) & np.uint64(0x0F0F0F0F0F0F0F0F)
+    v = (v | (v << np.uint64(2))) & np.uint64(0x3333333333333333)
+    v = (v | (v << np.uint64(1))) & np.uint64(0x5555555555555555)
+    return v
+
+def group_ramp(counts):
+    """
+    Return 0..c-1 for every group size c in counts, concatenated.
+
+    Used to expand (group, member) pairs without Python loops.
+    """
+    counts = np.asarray(counts, dtype=np.int64)
+    total = int(counts.sum())
+    offsets = np.cumsum(counts) - counts
+    return np.arange(total, dtype=np.int64) - np.repeat(offsets, counts)
+
+class QuadTree:
+    """
+    Array-backed 2D quadtree built from Morton-sorted points.
+
+    Every node is a row in flat NumPy arrays rather than a Python object.
+    The points of a node occupy the contiguous slice [start, end) of the
+    sorted order, and the children of a node are stored contiguously
+    starting at child_first (child_count == 0 marks a leaf).
+
+    Node moments are computed from the absolute weights, so the tree can
+    carry signed quantities (charges) as well as masses.
+    """
+
+    def __init__(self, positions, weights, leaf_size=8, max_depth=16):
+        """
+        Build the tree.
+
+        Parameters:
+        - positions: (N, 2) array of point positions
+        - weights: (N,) array of point weights (masses or charges)
+        - leaf_size: Maximum number of points in a leaf
+        - max_depth: Maximum subdivision level (points closer than the
+          finest cell share a leaf)
+        """
+        positions = np.asarray(positions, dtype=float)
+        weights = np.asarray(weights, dtype=float)
+        n = len(positions)
+        self.leaf_size = max(1, int(leaf_size))
+        self.max_depth = int(max_depth)
+
+        # Bounding square of all points
+        lo = positions.min(axis=0) if n else np.zeros(2)
+        hi = positions.max(axis=0) if n else np.ones(2)
+        self.size = max(float(np.max(hi - lo)), 1e-12) * (1 + 1e-9)
+        self.origin = lo
+
+        # Integer cell coordinates at the finest level and Morton keys
+        cells = 1 << self.max_depth
+        ij = np.floor((positions - lo) / self.size * cells).astype(np.int64)
+        np.clip(ij, 0, cells - 1, out=ij)
+        keys = _spread_bits(ij[:, 0]) | (_spread_bits(ij[:, 1]) << np.uint64(1))
+
+        order = np.argsort(keys, kind="stable")
+        self.order = order
+        self.keys = keys[order]
+        self.cell_ij = ij[order]
+        self.positions = positions[order]
+        self.weights = weights[order]
+
+        self._build()
+        self._compute_moments()
+
+    def _build(self):
+        n = len(self.keys)
+        starts, ends, levels, parents = [np.array([0])], [np.array([n])], [np.array([0])], [np.array([-1])]
+        n_nodes = 1
+
+        frontier = np.array([0])
+        frontier_start = np.array([0])
+        frontier_end = np.array([n])
+        split_ids, split_first, split_count = [], [], []
+
+        for level in range(1, self.max_depth + 1):
+            split = (frontier_end - frontier_start) > self.leaf_size
+            if not np.any(split):
+                break
+            p_ids = frontier[split]
+            p_start = frontier_start[split]
+            p_end = frontier_end[split]
+
+            # Points of all split parents, concatenated in parent order
+            counts = p_end - p_start
+            idx = np.repeat(p_start, counts) + group_ramp(counts)
+            owner = np.repeat(np.arange(len(p_ids)), counts)
+            shift = np.uint64(2 * (self.max_depth - level))
+            prefix = self.keys[idx] >> shift
+
+            # A new child begins wherever the level prefix changes
+            boundary = np.ones(len(idx), dtype=bool)
+            boundary[1:] = prefix[1:] != prefix[:-1]
+            b = np.flatnonzero(boundary)
+            c_start = idx[b]
+            c_end = idx[np.r_[b[1:], len(idx)] - 1] + 1
+            c_owner = owner[b]
+
+            c_ids = n_nodes + np.arange(len(b))
+            per_parent = np.bincount(c_owner, minlength=len(p_ids))
+            first = n_nodes + np.cumsum(per_parent) - per_parent
+            split_ids.append(p_ids)
+            split_first.append(first)
+            split_count.append(per_parent)
+
+            starts.append(c_start)
+            ends.append(c_end)
+            levels.append(np.full(len(b), level))
+            parents.append(p_ids[c_owner])
+            n_nodes += len(b)
+
+            frontier, frontier_start, frontier_end = c_ids, c_start, c_end
+
+        self.start = np.concatenate(starts)
+        self.end = np.concatenate(ends)
+        self.level = np.concatenate(levels)
+        self.parent = np.concatenate(parents)
+        self.child_first = np.zeros(n_nodes, dtype=np.int64)
+        self.child_count = np.zeros(n_nodes, dtype=np.int64)
+        if split_ids:
+            ids = np.concatenate(split_ids)
+            self.child_first[ids] = np.concatenate(split_first)
+            self.child_count[ids] = np.concatenate(split_count)
+
+        # Geometry: side length and lower-left corner of every node
+        self.node_size = self.size / (2.0 ** self.level)
+        corner_ij = self.cell_ij[np.minimum(self.start, max(n - 1, 0))] >> (self.max_depth - self.level)[:, None]
+        self.node_lo = self.origin + corner_ij * self.node_size[:, None]
+
+    def _compute_moments(self):
+        # Prefix sums over the sorted points give each node's totals in O(1)
+        w = self.weights
+        aw = np.abs(w)
+        cw = np.concatenate([[0.0], np.cumsum(w)])
+        caw = np.concatenate([[0.0], np.cumsum(aw)])
+        cx = np.concatenate([[0.0], np.cumsum(aw * self.positions[:, 0])])
+        cy = np.concatenate([[0.0], np.cumsum(aw * self.positions[:, 1])])
+
+        self.node_weight = cw[self.end] - cw[self.start]
+        abs_weight = caw[self.end] - caw[self.start]
+        safe = np.where(abs_weight > 0, abs_weight, 1.0)
+        center = np.stack([(cx[self.end] - cx[self.start]) / safe,
+                           (cy[self.end] - cy[self.start]) / safe], axis=1)
+        # Fall back to the geometric centre for weightless nodes
+        geometric = self.node_lo + 0.5 * self.node_size[:, None]
+        self.node_center = np.where((abs_weight > 0)[:, None], center, geometric)
+
+    @property
+    def num_nodes(self):
+        return len(self.start)
+
+    def is_leaf(self, nodes):
+        return self.child_count[nodes] == 0
+
+    def contains(self, nodes, points):
+        """Whether each point lies inside the bounding box of the paired node."""
+        lo = self.node_lo[nodes]
+        hi = lo + self.node_size[nodes][:, None]
+        return np.all((points >= lo) & (points <= hi), axis=1)
+
+    def children(self, nodes):
+        """Expand nodes into (repeat index, child node) pairs."""
+        counts = self.child_count[nodes]
+        rep = np.repeat(np.arange(len(nodes)), counts)
+        kids = np.repeat(self.child_first[nodes], counts) + group_ramp(counts)
+        return rep, kids
+
+    def members(self, nodes):
+        """Expand nodes into (repeat index, sorted point index) pairs."""
+        counts = self.end[nodes] - self.start[nodes]
+        rep = np.repeat(np.arange(len(nodes)), counts)
+        pts = np.repeat(self.start[nodes], counts) + group_ramp(counts)
+        return rep, pts
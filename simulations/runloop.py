@@ -0,0 +1,108 @@
+import itertools
+import threading
+import time
+
+import streamlit as st
+from streamlit.runtime import Runtime
+from streamlit.runtime.scriptrunner import get_script_run_ctx
+
+# Upper bound on animation loops running at once across all sessions
+MAX_ACTIVE_LOOPS = 8
+
+_active_loops = threading.BoundedSemaphore(MAX_ACTIVE_LOOPS)
+_tokens = itertools.count()
+
+def _session_is_active():
+    """Whether the browser session driving this script run is still connected."""
+    ctx = get_script_run_ctx()
+    if ctx is None or not Runtime.exists():
+        return True  # Bare mode (tests, plain python): nothing to disconnect from
+    return Runtime.instance().is_active_session(ctx.session_id)
+
+class RunLoop:
+    """
+    Bounded, cancellable replacement for `while True:` animation loops.
+
+    Iterating yields step numbers at most once per interval and ends when
+    - the step budget (max_steps) or time budget (max_seconds) is used up,
+    - the browser session has disconnected,
+    - a newer run of the same loop has started in this session, or
+    - the server already runs MAX_ACTIVE_LOOPS loops.
+    Widget changes interrupt the loop through Streamlit's own rerun
+    mechanism at the next element update inside the loop body.
+
+    The thread CPU time spent in the loop is added to
+    st.session_state["runloop_cpu_seconds"][name] when the loop ends,
+    however it ends.
+
+    Usage:
+        loop = RunLoop("wave", max_steps=600, interval=0.05)
+        for step in loop:
+            ...
+        loop.show_status()
+    """
+
+    def __init__(self, name, max_steps=600, interval=0.05, max_seconds=None):
+        """
+        Parameters:
+        - name: Key for this loop in session state (one per page)
+        - max_steps: Maximum number of iterations per run (None for no limit)
+        - interval: Minimum wall time per iteration in seconds
+        - max_seconds: Maximum wall time per run (None for no limit)
+        """
+        self.name = name
+        self.max_steps = max_steps
+        self.interval = interval
+        self.max_seconds = max_seconds
+        self.steps = 0
+        self.cpu_time = 0.0
+        self.stop_reason = None
+
+    def _stop_reason(self, token, started):
+        if self.max_steps is not None and self.steps >= self.max_steps:
+            return "step budget reached"
+        if self.max_seconds is not None and time.monotonic() - started >= self.max_seconds:
+            return "time budget reached"
+        if st.session_state.get(f"_runloop_{self.name}_token") != token:
+            return "superseded by a newer run"
+        if not _session_is_active():
+            return "session disconnected"
+        return None
+
+    def __iter__(self):
+        token = next(_tokens)
+        st.session_state[f"_runloop_{self.name}_token"] = token
+        if not _active_loops.acquire(blocking=False):
+            self.stop_reason = "server busy"
+            return
+
+        started = time.monotonic()
+        cpu_start = time.thread_time()
+        try:
+            while True:
+                self.stop_reason = self._stop_reason(token, started)
+                if self.stop_reason is not None:
+                    return
+                tick = time.monotonic()
+                yield self.steps
+                self.steps += 1
+                remaining = self.interval - (time.monotonic() - tick)
+                if remaining > 0:
+                    time.sleep(remaining)
+        finally:
+            _active_loops.release()
+            self.cpu_time = time.thread_time() - cpu_start
+            totals = st.session_state.setdefault("runloop_cpu_seconds", {})
+            totals[self.name] = totals.get(self.name, 0.0) + self.cpu_time
+
+    @property
+    def session_cpu_seconds(self):
+        """Total CPU time this session has spent in loops with this name."""
+        return st.session_state.get("runloop_cpu_seconds", {}).get(self.name, 0.0)
+
+    def show_status(self):
+        """Report why the loop stopped and its CPU cost, with a button to run it again."""
+        st.info(f"Animation paused after {self.steps} steps ({self.stop_reason}). "
+                f"CPU time: {self.cpu_time:.2f} s this run, "
+                f"{self.session_cpu_seconds:.2f} s this session.")
+        st.button("Resume Animation", key=f"_runloop_{self.name}_resume")
@@ -0,0 +1,197 @@
+import io
+import shutil
+import subprocess
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+from PIL import Image
+
+# Shared by all sessions so concurrent exports stay bounded
+_EXPORT_POOL = ThreadPoolExecutor(max_workers=2, thread_name_prefix="export")
+
+class SnapshotBuffer:
+    """
+    Thread-safe bounded ring buffer of simulation snapshots.
+
+    The producer appends snapshots; once the buffer is full the oldest
+    snapshot is dropped, so memory stays constant however long a run lasts.
+    Every read refreshes a heartbeat that lets the producer notice when no
+    one is consuming any more.
+    """
+
+    def __init__(self, capacity=200):
+        self._frames = deque(maxlen=capacity)
+        self._lock = threading.Lock()
+        self.last_read = time.monotonic()
+
+    def __len__(self):
+        with self._lock:
+            return len(self._frames)
+
+    def append(self, snapshot):
+        with self._lock:
+            self._frames.append(snapshot)
+
+    def latest(self):
+        """Return the newest snapshot (or None) and refresh the heartbeat."""
+        self.last_read = time.monotonic()
+        with self._lock:
+            return self._frames[-1] if self._frames else None
+
+    def frames(self):
+        """Return a copy of all buffered snapshots, oldest first."""
+        self.last_read = time.monotonic()
+        with self._lock:
+            return list(self._frames)
+
+class SimulationWorker:
+    """
+    Run a simulation in a background thread and stream snapshots.
+
+    The worker calls step_fn steps_per_snapshot times, stores
+    snapshot_fn() in its SnapshotBuffer, and paces itself to at most
+    target_fps snapshots per second. It stops when stop() is called,
+    when max_snapshots have been produced, or when the buffer has not been
+    read for idle_timeout seconds (e.g. the browser tab was closed).
+
+    Once it has stopped, stop_reason says why: "stopped", "finished",
+    "idle" or "error" (with the exception in error).
+
+    step_fn and snapshot_fn run on the worker thread, so they must not
+    call Streamlit or pyplot; snapshot_fn should return copies of arrays.
+    """
+
+    def __init__(self, step_fn, snapshot_fn, capacity=200, steps_per_snapshot=1, target_fps=30,
+                 idle_timeout=30.0, max_snapshots=None):
+        self.buffer = SnapshotBuffer(capacity)
+        self.step_fn = step_fn
+        self.snapshot_fn = snapshot_fn
+        self.steps_per_snapshot = max(1, int(steps_per_snapshot))
+        self.target_fps = target_fps
+        self.idle_timeout = idle_timeout
+        self.max_snapshots = max_snapshots
+        self.snapshots_produced = 0
+        self.error = None
+        self.stop_reason = None
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    @property
+    def running(self):
+        return self._thread.is_alive()
+
+    def start(self):
+        self.buffer.append(self.snapshot_fn())
+        self._thread.start()
+        return self
+
+    def stop(self, timeout=1.0):
+        self._stop.set()
+        if self._thread.is_alive() and threading.current_thread() is not self._thread:
+            self._thread.join(timeout)
+
+    def _run(self):
+        interval = 1.0 / self.target_fps if self.target_fps else 0.0
+        try:
+            while not self._stop.is_set():
+                started = time.monotonic()
+                for _ in range(self.steps_per_snapshot):
+                    self.step_fn()
+                self.buffer.append(self.snapshot_fn())
+                self.snapshots_produced += 1
+
+                if self.max_snapshots is not None and self.snapshots_produced >= self.max_snapshots:
+                    self.stop_reason = "finished"
+                    break
+                if time.monotonic() - self.buffer.last_read > self.idle_timeout:
+                    self.stop_reason = "idle"
+                    break
+
+                # Sleep off the rest of the frame interval (wakes early on stop)
+                remaining = interval - (time.monotonic() - started)
+                if remaining > 0:
+                    self._stop.wait(remaining)
+            else:
+                self.stop_reason = "stopped"
+        except Exception as e:
+            self.error = e
+            self.stop_reason = "error"
+
+def encode_gif(frames, render_fn, fps=20):
+    """
+    Encode snapshots as an animated GIF entirely in memory.
+
+    Parameters:
+    - frames: Sequence of snapshots
+    - render_fn: Callable mapping a snapshot to an (H, W, 3) uint8 RGB array
+    - fps: Playback frame rate
+
+    Returns:
+    - data: GIF file contents as bytes
+    """
+    images = [Image.fromarray(render_fn(frame)) for frame in frames]
+    if not images:
+        raise ValueError("No frames to encode.")
+    out = io.BytesIO()
+    images[0].save(out, format="GIF", save_all=True, append_images=images[1:],
+                   duration=int(1000 / fps), loop=0)
+    return out.getvalue()
+
+def submit_export(encode_fn, frames, render_fn, fps=20):
+    """
+    Encode frames on the shared export pool without blocking the caller.
+
+    Parameters:
+    - encode_fn: encode_gif or encode_mp4
+    - frames: Sequence of snapshots (copied by the caller)
+    - render_fn: Callable mapping a snapshot to an RGB array
+    - fps: Playback frame rate
+
+    Returns:
+    - future: concurrent.futures.Future resolving to the encoded bytes
+    """
+    return _EXPORT_POOL.submit(encode_fn, frames, render_fn, fps)
+
+def mp4_available():
+    """Whether an ffmpeg executable is available for MP4 export."""
+    return shutil.which("ffmpeg") is not None
+
+def encode_mp4(frames, render_fn, fps=20):
+    """
+    Encode snapshots as an H.264 MP4 by piping raw frames through ffmpeg.
+
+    Nothing is written to disk: frames go to ffmpeg's stdin and the
+    fragmented MP4 is read back from its stdout.
+
+    Parameters:
+    - frames: Sequence of snapshots
+    - render_fn: Callable mapping a snapshot to an (H, W, 3) uint8 RGB array
+    - fps: Playback frame rate
+
+    Returns:
+    - data: MP4 file contents as bytes
+    """
+    ffmpeg = shutil.which("ffmpeg")
+    if ffmpeg is None:
+        raise RuntimeError("ffmpeg is not installed; MP4 export is unavailable.")
+    rendered = [render_fn(frame) for frame in frames]
+    if not rendered:
+        raise ValueError("No frames to encode.")
+
+    # H.264 with yuv420p needs even dimensions
+    height, width = rendered[0].shape[:2]
+    height -= height % 2
+    width -= width % 2
+    raw = b"".join(np.ascontiguousarray(img[:height, :width, :3]).tobytes() for img in rendered)
+
+    cmd = [ffmpeg, "-loglevel", "error", "-f", "rawvideo", "-pix_fmt", "rgb24",
+           "-s", f"{width}x{height}", "-r", str(fps), "-i", "pipe:0",
+           "-c:v", "libx264", "-pix_fmt", "yuv420p",
+           "-movflags", "frag_keyframe+empty_moov", "-f", "mp4", "pipe:1"]
+    result = subprocess.run(cmd, input=raw, capture_output=True, check=False)
+    if result.returncode != 0:
+        raise RuntimeError(f"ffmpeg failed: {result.stderr.decode(errors='replace').strip()}")
+    return result.stdout
@@ -0,0 +1,30 @@
+import numpy as np
+
+from simulations.fieldlines import STOP_WEAK, charge_seeds, trace_field_lines
+
+def test_charge_seeds_many_equal_charges():
+    rng = np.random.default_rng(0)
+    positions = rng.uniform(-5, 5, (1000, 2))
+    charges = rng.choice([-1.0, 1.0], 1000)
+    for num_lines in (64, 400):
+        seeds, directions, owners = charge_seeds(positions, charges, num_lines)
+        assert seeds.shape == (num_lines, 2)
+        # Each seed sits on the circle around its own charge, pointing away from positive charges
+        assert np.allclose(np.linalg.norm(seeds - positions[owners], axis=1), 0.1)
+        assert np.array_equal(directions, np.sign(charges[owners]))
+
+def test_charge_seeds_share_lines_by_magnitude():
+    positions = np.array([[0.0, 0.0], [1.0, 0.0], [2.0, 0.0]])
+    _, _, owners = charge_seeds(positions, [3.0, -1.0, 1.0], 10)
+    assert np.bincount(owners, minlength=3).tolist() == [6, 2, 2]
+
+def test_trace_stops_at_null_point():
+    # Two equal charges at (±1, 0); the line from (-0.9, 0) runs into the null at the origin
+    charges = np.array([[-1.0, 0.0], [1.0, 0.0]])
+    def field(points):
+        d = points[:, None, :] - charges[None]
+        return np.sum(d / np.linalg.norm(d, axis=2, keepdims=True)**3, axis=1)
+    lines, stops = trace_field_lines(field, [[-0.9, 0.0]])
+    assert stops[0] == STOP_WEAK
+    assert len(lines[0]) < 100
+    assert np.linalg.norm(lines[0][-1]) < 1e-3
@@ -0,0 +1,23 @@
+import numpy as np
+
+from simulations.nbody import potential_energy
+
+def test_potential_energy_excludes_self_pairs_when_softened():
+    # Two unit masses at distance 1 with softening 0.05: -1 / sqrt(1 + 0.05²)
+    positions = np.array([[0.0, 0.0], [1.0, 0.0]])
+    energy = potential_energy(positions, np.ones(2), softening=0.05)
+    assert np.isclose(energy, -1 / np.sqrt(1 + 0.05**2))
+
+def test_potential_energy_matches_pairwise_sum():
+    rng = np.random.default_rng(1)
+    positions = rng.normal(size=(300, 2))
+    masses = rng.uniform(0.5, 2.0, 300)
+    softening = 0.1
+    expected = 0.0
+    for i in range(300):
+        for j in range(i + 1, 300):
+            r = np.sqrt(np.sum((positions[i] - positions[j])**2) + softening**2)
+            expected -= masses[i] * masses[j] / r
+    # Tiles smaller than N so the diagonal falls inside several blocks
+    energy = potential_energy(positions, masses, softening=softening, tile_size=64)
+    assert np.isclose(energy, expected, rtol=1e-12)